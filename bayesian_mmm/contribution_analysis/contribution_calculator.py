@@ -1,8 +1,11 @@
 from bayesian_mmm.utilities.utilities import check_ndarray_is_matrix
 from typing import Dict, Union, List
-from numpy import ndarray, zeros
+from numpy import (
+    ndarray, asarray, broadcast_to, column_stack, concatenate, maximum, repeat, stack, tile
+)
 from pandas import DataFrame
 
+from bayesian_mmm.contribution_analysis.shapley_attribution import compute_shapley_values
 from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
 from bayesian_mmm.normalizer.normalizer import Normalizer
 
@@ -15,14 +18,28 @@ class ContributionCalculator(InferenceMachine):
         max_lag: int,
         target_normalizer: Normalizer,
         media_nms: List[str],
-        ctrl_nms:List[str]
+        ctrl_nms:List[str],
+        carryover_engine_nm: str = "lag_window",
+        attribution_nm: str = "additive",
+        max_exact_nb_contributors: int = 12,
+        nb_permutations: int = 1000,
+        seed: Union[int, None] = None,
+        predictor_normalizer: Union[Normalizer, None] = None
         ) -> None:
         
-        super().__init__(param_nm_to_val, max_lag)
+        super().__init__(param_nm_to_val, max_lag, carryover_engine_nm)
+
+        if attribution_nm not in ["additive", "shapley"]:
+            raise ValueError("attribution_nm must be 'additive' or 'shapley'")
 
         self.__target_normalizer = target_normalizer
         self.__media_nms = media_nms
         self.__ctrl_nms = ctrl_nms
+        self.__attribution_nm = attribution_nm
+        self.__max_exact_nb_contributors = max_exact_nb_contributors
+        self.__nb_permutations = nb_permutations
+        self.__seed = seed
+        self.__predictor_normalizer = predictor_normalizer
 
     def write_results(self, name: str) -> None:
 
@@ -32,6 +49,83 @@ class ContributionCalculator(InferenceMachine):
 
         return self.__contributions
 
+    def write_counterfactuals(self, name: str) -> None:
+
+        self.__counterfactuals.to_csv("results/counterfactuals_%s.csv" % name, index=False)
+
+    def get_counterfactuals(self) -> DataFrame:
+
+        return self.__counterfactuals
+
+    def compute_counterfactuals(
+            self,
+            spends: ndarray,
+            ctrl_vars: Union[ndarray, None],
+            datetime_index: ndarray,
+            scaling_factors: Union[List[float], None] = None
+        ) -> None:
+
+        # one counterfactual per scaling factor and media, where only
+        # the spends of the media are scaled, 0 switches the media off
+        if scaling_factors is None:
+            scaling_factors = [0.]
+
+        if self.__predictor_normalizer is None:
+            raise ValueError("predictor_normalizer is required to compute counterfactuals")
+
+        check_ndarray_is_matrix(spends, "spends")
+
+        scaling_factors = asarray(scaling_factors, dtype=float)
+        nb_obs, nb_media = spends.shape
+
+        carryover_spends = self._get_carryover_spends(spends)
+        transformed_spends = self._get_diminushing_returns(carryover_spends)
+
+        # the carryover of a media only depends on its spends, the spends of
+        # every media are scaled at once, one carryover per scaling factor
+        scaled_transformed_spends = self._get_diminushing_returns(stack([
+            self._get_carryover_spends(scaled_spends)
+            for scaled_spends in self.__get_scaled_spends(spends, scaling_factors)
+        ]))
+
+        # (nb_obs,) and (nb_scaling_factors, nb_obs, nb_media)
+        normalized_pred = self._get_y(transformed_spends, ctrl_vars)
+        normalized_counterfactual_preds = normalized_pred[:, None] + (
+            (scaled_transformed_spends - transformed_spends) * asarray(self._beta_medias)
+        )
+
+        pred = self.__target_normalizer.reverse_transform(normalized_pred.reshape((-1, 1)))[:, 0]
+        counterfactual_preds = self.__target_normalizer.reverse_transform(
+            normalized_counterfactual_preds.reshape((-1, 1))
+            ).reshape(normalized_counterfactual_preds.shape)
+
+        # one row per scaling factor, media and obs
+        counterfactual_preds = counterfactual_preds.transpose((0, 2, 1)).reshape((-1,))
+        pred = tile(pred, len(scaling_factors) * nb_media)
+
+        self.__counterfactuals = DataFrame({
+            "date": tile(datetime_index, len(scaling_factors) * nb_media),
+            "media_nm": tile(repeat(self.__media_nms, nb_obs), len(scaling_factors)),
+            "scaling_factor": repeat(scaling_factors, nb_media * nb_obs),
+            "pred": pred,
+            "counterfactual_pred": counterfactual_preds,
+            "incremental_effect": pred - counterfactual_preds
+        })
+
+    def __get_scaled_spends(self, spends: ndarray, scaling_factors: ndarray) -> ndarray:
+
+        # the factors apply to the spends, not to the normalized spends
+        nb_obs, nb_media = spends.shape
+
+        raw_spends = maximum(self.__predictor_normalizer.reverse_transform_spends(spends), 0)
+        scaled_spends = tile(raw_spends, (len(scaling_factors), 1))
+        scaled_spends *= repeat(scaling_factors, nb_obs)[:, None]
+
+        # (nb_scaling_factors, nb_obs, nb_media)
+        return self.__predictor_normalizer.transform_spends(scaled_spends).reshape(
+            (len(scaling_factors), nb_obs, nb_media)
+        )
+
     def compute_results(
             self,
             spends: ndarray,
@@ -39,42 +133,60 @@ class ContributionCalculator(InferenceMachine):
             datetime_index: ndarray
         ) -> None:
 
-        normalized_contributions = self.__get_normalized_results(spends, ctrl_vars)
-        contributions = self.__denormalize(normalized_contributions)
+        normalized_contributions = self._get_normalized_results(spends, ctrl_vars)
+
+        if self.__attribution_nm == "shapley":
+            contributions = self.__get_shapley_contributions(normalized_contributions)
+        else:
+            contributions = self.__denormalize(normalized_contributions)
+
         self.__contributions = self.__format(contributions, datetime_index)
 
-    def __get_normalized_results(
+    def _get_normalized_results(
         self, spends: ndarray, ctrl_vars: Union[ndarray, None]
         ) -> ndarray:
 
+        # (nb_obs, nb_contributors), with a leading draw axis when the parameters have one
         check_ndarray_is_matrix(spends, "spends")
 
-        if type(ctrl_vars) == ndarray:
-            check_ndarray_is_matrix(ctrl_vars, "ctrl_vars")
-            nb_ctrl = ctrl_vars.shape[1]
-        else:
-            nb_ctrl = 0
-
-        nb_media = spends.shape[1] 
-        nb_contributors = nb_media + nb_ctrl + 1 # +1 for tau aka baseline
-        nb_obs = spends.shape[0]
-        contributions = zeros((nb_obs, nb_contributors))
-
         transformed_spends = self._get_transformed_spends(spends)
+        contributions = [transformed_spends * asarray(self._beta_medias)[..., None, :]]
 
-        for media_index in range(nb_media):
-            contributions[:, media_index] = (
-                transformed_spends[:, media_index] * self._beta_medias[media_index]
-            )
-
-        for ctrl_index in range(nb_ctrl):
-            contributions[:, nb_media + ctrl_index] = (
-                ctrl_vars[:, ctrl_index] * self._gamma_ctrl[ctrl_index]
-            )
-
-        contributions[:, -1] = self._tau
+        if type(ctrl_vars) == ndarray:
+            check_ndarray_is_matrix(ctrl_vars, "ctrl_vars")
+            contributions.append(ctrl_vars * asarray(self._gamma_ctrl)[..., None, :])
+
+        # tau aka baseline
+        contributions.append(asarray(self._tau, dtype=float)[..., None, None])
+
+        draw_shape = transformed_spends.shape[:-1]
+
+        return concatenate([
+            broadcast_to(contribution, draw_shape + (contribution.shape[-1],))
+            for contribution in contributions
+        ], axis=-1)
+
+    def __get_shapley_contributions(self, normalized_contributions: ndarray) -> ndarray:
+
+        # the reverse transform of the target is not additive, with a log transfo the
+        # medias and ctrl vars interact, the shapley values share the prediction
+        # minus the baseline between them and sum to it in each obs
+        def reverse_transform(normalized_values: ndarray) -> ndarray:
+            return self.__target_normalizer.reverse_transform(
+                normalized_values.reshape((-1, 1))
+                ).reshape(normalized_values.shape)
+
+        baseline = normalized_contributions[:, -1]
+        shapley_values = compute_shapley_values(
+            normalized_contributions[:, :-1],
+            baseline,
+            reverse_transform,
+            self.__max_exact_nb_contributors,
+            self.__nb_permutations,
+            self.__seed
+        )
 
-        return contributions
+        return column_stack([shapley_values, reverse_transform(baseline)])
 
     def __denormalize(self, normalized_contributions: ndarray) -> ndarray:
         
@@ -47,7 +47,7 @@ class ContributionVisualizor:
 
     def __group_at_month_level(self, df: DataFrame) -> DataFrame:
 
-        return df.groupby(Grouper(freq="M")).sum()
+        return df.groupby(Grouper(freq="MS")).sum()
 
     def __create_empty_fig(self) -> None:
 
@@ -0,0 +1,102 @@
+from typing import Dict, List, Union
+from numpy import ndarray
+from pandas import DataFrame
+
+from bayesian_mmm.contribution_analysis.contribution_calculator import ContributionCalculator
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.utilities.running_statistics import RunningStatistics
+
+
+class PosteriorContributionCalculator:
+
+    def __init__(
+        self,
+        sampling_results: Dict,
+        max_lag: int,
+        target_normalizer: Normalizer,
+        media_nms: List[str],
+        ctrl_nms: List[str],
+        carryover_engine_nm: str = "lag_window",
+        quantiles: Union[List[float], None] = None
+        ) -> None:
+
+        if quantiles is None:
+            quantiles = [0.05, 0.95]
+
+        self.__sampling_results = sampling_results
+        self.__max_lag = max_lag
+        self.__target_normalizer = target_normalizer
+        self.__media_nms = media_nms
+        self.__ctrl_nms = ctrl_nms
+        self.__carryover_engine_nm = carryover_engine_nm
+        self.__quantiles = quantiles
+
+        self.__nb_draws = len(sampling_results["tau"])
+
+    def write_results(self, name: str) -> None:
+
+        for stat_nm, contributions in self.__contributions.items():
+            contributions.to_csv(
+                "results/contributions_%s_%s.csv" % (stat_nm, name), index=False
+            )
+
+    def get_results(self) -> Dict[str, DataFrame]:
+
+        # the mean and one frame per quantile, as the point estimate contributions
+        return self.__contributions
+
+    def compute_results(
+            self,
+            spends: ndarray,
+            ctrl_vars: Union[ndarray, None],
+            datetime_index: ndarray,
+            draws_chunk_size: Union[int, None] = None
+        ) -> None:
+
+        if draws_chunk_size is None:
+            draws_chunk_size = self.__nb_draws
+        elif draws_chunk_size < 1:
+            raise ValueError("draws_chunk_size value must be greater or equal 1")
+
+        contributor_nms = self.__media_nms + self.__ctrl_nms + ["baseline"]
+        running_statistics = RunningStatistics(
+            self.__quantiles, (spends.shape[0], len(contributor_nms))
+        )
+
+        # only one chunk of (draws_chunk_size, nb_obs, nb_contributors) contributions
+        # lives at a time, the mean and quantiles are accumulated over the chunks
+        for start in range(0, self.__nb_draws, draws_chunk_size):
+
+            chunk_param_nm_to_val = {
+                param_nm: values[start:start + draws_chunk_size]
+                for param_nm, values in self.__sampling_results.items()
+            }
+
+            contribution_calculator = ContributionCalculator(
+                chunk_param_nm_to_val,
+                self.__max_lag,
+                self.__target_normalizer,
+                self.__media_nms,
+                self.__ctrl_nms,
+                self.__carryover_engine_nm
+            )
+            normalized_contributions = contribution_calculator._get_normalized_results(
+                spends, ctrl_vars
+            )
+
+            running_statistics.update(
+                self.__target_normalizer.reverse_transform(
+                    normalized_contributions.reshape((-1, 1))
+                    ).reshape(normalized_contributions.shape)
+            )
+
+        stat_nm_to_contributions = {"mean": running_statistics.get_mean()}
+        for quantile, quantile_contributions in zip(
+            self.__quantiles, running_statistics.get_quantiles()
+            ):
+            stat_nm_to_contributions["quantile_%s" % quantile] = quantile_contributions
+
+        self.__contributions = {
+            stat_nm: DataFrame(contributions, index=datetime_index, columns=contributor_nms)
+            for stat_nm, contributions in stat_nm_to_contributions.items()
+        }
@@ -0,0 +1,99 @@
+from math import factorial
+from typing import Callable, Union
+import numpy as np
+from numpy import ndarray
+
+PERMUTATIONS_CHUNK_SIZE = 100
+
+
+def compute_shapley_values(
+    contributions: ndarray,
+    baseline: ndarray,
+    value_func: Callable[[ndarray], ndarray],
+    max_exact_nb_contributors: int = 12,
+    nb_permutations: int = 1000,
+    seed: Union[int, None] = None
+    ) -> ndarray:
+
+    # contributions is (nb_obs, nb_contributors) and baseline (nb_obs,), the value of a
+    # coalition in an obs is value_func(baseline + sum of the contributions of the coalition)
+    # minus value_func(baseline), the shapley values of an obs sum to the value of all contributors
+    if contributions.shape[1] <= max_exact_nb_contributors:
+        return compute_exact_shapley_values(contributions, baseline, value_func)
+
+    return compute_sampled_shapley_values(
+        contributions, baseline, value_func, nb_permutations, seed
+    )
+
+
+def compute_exact_shapley_values(
+    contributions: ndarray, baseline: ndarray, value_func: Callable[[ndarray], ndarray]
+    ) -> ndarray:
+
+    nb_contributors = contributions.shape[1]
+
+    # (2^nb_contributors, nb_contributors) membership of each contributor in each coalition
+    coalitions = (
+        np.arange(2**nb_contributors)[:, None] >> np.arange(nb_contributors)
+    ) & 1
+    coalition_sizes = coalitions.sum(axis=1)
+
+    # (2^nb_contributors, nb_obs) values of all the coalitions at once
+    values = value_func(baseline + coalitions.dot(contributions.T))
+
+    # a coalition S weighs |S|!(n-|S|-1)!/n! in the shapley value of a contributor out of S,
+    # negatively, and the same coalition without the contributor in the ones of its members
+    size_weights = np.array([
+        factorial(size) * factorial(nb_contributors - size - 1) / factorial(nb_contributors)
+        for size in range(nb_contributors)
+    ])
+    coalition_weights = np.where(
+        coalitions == 1,
+        size_weights[np.maximum(coalition_sizes - 1, 0)][:, None],
+        -size_weights[np.minimum(coalition_sizes, nb_contributors - 1)][:, None]
+    )
+
+    return values.T.dot(coalition_weights)
+
+
+def compute_sampled_shapley_values(
+    contributions: ndarray,
+    baseline: ndarray,
+    value_func: Callable[[ndarray], ndarray],
+    nb_permutations: int = 1000,
+    seed: Union[int, None] = None
+    ) -> ndarray:
+
+    if nb_permutations < 2:
+        raise ValueError("nb_permutations value must be greater or equal 2")
+
+    nb_obs, nb_contributors = contributions.shape
+    random_generator = np.random.default_rng(seed)
+
+    # each sampled permutation comes with its reverse to reduce the variance
+    permutations = np.argsort(
+        random_generator.random((nb_permutations // 2, nb_contributors)), axis=1
+    )
+    permutations = np.concatenate([permutations, permutations[:, ::-1]])
+
+    shapley_values = np.zeros((nb_obs, nb_contributors))
+    baseline_value = value_func(baseline)
+
+    # the (nb_obs, nb_permutations, nb_contributors) marginal values live one chunk at a time
+    for start in range(0, len(permutations), PERMUTATIONS_CHUNK_SIZE):
+
+        chunk_permutations = permutations[start:start + PERMUTATIONS_CHUNK_SIZE]
+
+        values = value_func(
+            baseline[:, None, None] + np.cumsum(contributions[:, chunk_permutations], axis=-1)
+        )
+        marginal_values = np.diff(values, axis=-1, prepend=np.broadcast_to(
+            baseline_value[:, None, None], values.shape[:-1] + (1,)
+        ))
+
+        # from the order of the permutations back to the order of the contributors
+        shapley_values += np.take_along_axis(
+            marginal_values, np.argsort(chunk_permutations, axis=1)[None], axis=-1
+        ).sum(axis=1)
+
+    return shapley_values / len(permutations)
@@ -0,0 +1,218 @@
+from math import exp
+from typing import Dict, Tuple, Union
+import numpy as np
+from numpy import ndarray
+from numpy.lib.stride_tricks import sliding_window_view
+
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.utilities.utilities import check_ndarray_is_matrix
+
+# numba is optional, the numpy kernel is used without it
+try:
+    from numba import njit
+    NUMBA_IS_AVAILABLE = True
+except ImportError:
+    NUMBA_IS_AVAILABLE = False
+
+HILL_ID = 0
+REACH_ID = 1
+
+
+def compute_fused_kernel(
+    spends: ndarray,
+    lag_weights: ndarray,
+    diminushing_returns_id: int,
+    diminushing_returns_params: ndarray,
+    beta_medias: ndarray,
+    y: ndarray,
+    contributions: ndarray,
+    carryover_spends: ndarray,
+    with_contributions: bool
+    ) -> None:
+
+    # carryover, diminushing returns and linear combination in one pass over the
+    # spends, lag_weights is (max_lag, nb_media) so that the inner loops run along
+    # contiguous rows, carryover_spends is a (nb_media,) workspace, y and contributions
+    # are written in place, only meant to be jit compiled
+    nb_obs, nb_media = spends.shape
+    max_lag = lag_weights.shape[0]
+
+    for obs_index in range(nb_obs):
+
+        carryover_spends[:] = 0.
+        for lag in range(min(max_lag, obs_index + 1)):
+            for media_index in range(nb_media):
+                carryover_spends[media_index] += (
+                    lag_weights[lag, media_index] * spends[obs_index - lag, media_index]
+                )
+
+        obs_y = 0.
+
+        for media_index in range(nb_media):
+
+            if diminushing_returns_id == HILL_ID:
+                transformed_spend = 1 / (1 + (
+                    carryover_spends[media_index] / diminushing_returns_params[0, media_index]
+                    )**(-diminushing_returns_params[1, media_index]))
+            else:
+                exp_spend = exp(-diminushing_returns_params[0, media_index] * carryover_spends[media_index])
+                transformed_spend = (1 - exp_spend) / (1 + exp_spend)
+
+            contribution = beta_medias[media_index] * transformed_spend
+            if with_contributions:
+                contributions[obs_index, media_index] = contribution
+            obs_y += contribution
+
+        y[obs_index] = obs_y
+
+
+if NUMBA_IS_AVAILABLE:
+    # numpy error model, as the numpy kernel, 0 spends give inf instead of raising
+    compute_jit_fused_kernel = njit(cache=True, error_model="numpy")(compute_fused_kernel)
+
+
+def compute_numpy_kernel(
+    spends: ndarray,
+    lag_weights: ndarray,
+    diminushing_returns_id: int,
+    diminushing_returns_params: ndarray,
+    beta_medias: ndarray,
+    y: ndarray,
+    contributions: ndarray,
+    padded_spends: ndarray,
+    workspace: ndarray
+    ) -> None:
+
+    # same outputs as compute_fused_kernel, step by step in the given workspaces,
+    # padded_spends is (nb_obs + max_lag - 1, nb_media) and workspace (nb_obs, nb_media)
+    max_lag = lag_weights.shape[1]
+
+    padded_spends[:max_lag - 1] = 0
+    padded_spends[max_lag - 1:] = spends
+    lagged_spends = sliding_window_view(padded_spends, max_lag, axis=0)[:, :, ::-1]
+
+    np.einsum("nml,ml->nm", lagged_spends, lag_weights, out=contributions)
+
+    with np.errstate(divide="ignore"):
+        if diminushing_returns_id == HILL_ID:
+            np.divide(contributions, diminushing_returns_params[0], out=contributions)
+            np.power(contributions, -diminushing_returns_params[1], out=contributions)
+            np.add(contributions, 1, out=contributions)
+            np.reciprocal(contributions, out=contributions)
+        else:
+            np.multiply(contributions, -diminushing_returns_params[0], out=contributions)
+            np.exp(contributions, out=contributions)
+            np.add(contributions, 1, out=workspace)
+            np.subtract(1, contributions, out=contributions)
+            np.divide(contributions, workspace, out=contributions)
+
+    np.multiply(contributions, beta_medias, out=contributions)
+    np.sum(contributions, axis=1, out=y)
+
+
+class FusedInferenceMachine(InferenceMachine):
+
+    def __init__(
+        self, param_nm_to_val: Dict, max_lag: int, with_numba: Union[bool, None] = None
+        ) -> None:
+
+        super().__init__(param_nm_to_val, max_lag)
+
+        if np.asarray(param_nm_to_val["beta_medias"]).ndim != 1:
+            raise ValueError("FusedInferenceMachine only supports point estimates")
+
+        if with_numba is None:
+            with_numba = NUMBA_IS_AVAILABLE
+        elif with_numba and not NUMBA_IS_AVAILABLE:
+            raise ValueError("numba is required when with_numba is True")
+
+        self.__with_numba = with_numba
+        self.__lag_weights = np.ascontiguousarray(self._get_lag_weights(), dtype=float)
+        self.__transposed_lag_weights = np.ascontiguousarray(self.__lag_weights.T)
+        self.__beta_medias = np.asarray(self._beta_medias, dtype=float)
+        self.__nb_media = len(self.__beta_medias)
+
+        if "ec" in param_nm_to_val.keys():
+            self.__diminushing_returns_id = HILL_ID
+            self.__diminushing_returns_params = np.array(
+                [param_nm_to_val["ec"], param_nm_to_val["slope"]], dtype=float
+            )
+        else:
+            self.__diminushing_returns_id = REACH_ID
+            self.__diminushing_returns_params = np.array(
+                [param_nm_to_val["half_saturation"]], dtype=float
+            )
+
+        # workspaces reused across calls, grown to the largest nb of obs seen,
+        # a FusedInferenceMachine must not be shared between threads
+        self.__y = np.zeros(0)
+        self.__contributions = np.zeros((0, self.__nb_media))
+        self.__padded_spends = np.zeros((0, self.__nb_media))
+        self.__workspace = np.zeros((1, self.__nb_media))
+
+    def predict(self, spends: ndarray, ctrl_vars: Union[ndarray, None]) -> ndarray:
+
+        y, _ = self.__run_kernel(spends, ctrl_vars, False)
+
+        return y.copy()
+
+    def predict_with_contributions(
+        self, spends: ndarray, ctrl_vars: Union[ndarray, None]
+        ) -> Tuple[ndarray, ndarray]:
+
+        # normalized prediction and (nb_obs, nb_media) normalized media contributions
+        y, contributions = self.__run_kernel(spends, ctrl_vars, True)
+
+        return y.copy(), contributions.copy()
+
+    def __run_kernel(
+        self, spends: ndarray, ctrl_vars: Union[ndarray, None], with_contributions: bool
+        ) -> Tuple[ndarray, ndarray]:
+
+        check_ndarray_is_matrix(spends, "spends")
+
+        if spends.shape[1] != self.__nb_media:
+            raise ValueError("spends must have %d columns" % self.__nb_media)
+
+        nb_obs = len(spends)
+        if nb_obs > len(self.__y):
+            self.__y = np.zeros(nb_obs)
+            self.__contributions = np.zeros((nb_obs, self.__nb_media))
+            self.__padded_spends = np.zeros((nb_obs + self.get_max_lag() - 1, self.__nb_media))
+            self.__workspace = np.zeros((nb_obs, self.__nb_media))
+
+        y = self.__y[:nb_obs]
+        contributions = self.__contributions[:nb_obs]
+
+        if self.__with_numba:
+            compute_jit_fused_kernel(
+                np.ascontiguousarray(spends, dtype=float),
+                self.__transposed_lag_weights,
+                self.__diminushing_returns_id,
+                self.__diminushing_returns_params,
+                self.__beta_medias,
+                y,
+                contributions,
+                self.__workspace[0],
+                with_contributions
+            )
+        else:
+            compute_numpy_kernel(
+                np.asarray(spends, dtype=float),
+                self.__lag_weights,
+                self.__diminushing_returns_id,
+                self.__diminushing_returns_params,
+                self.__beta_medias,
+                y,
+                contributions,
+                self.__padded_spends[:nb_obs + self.get_max_lag() - 1],
+                self.__workspace[:nb_obs]
+            )
+
+        y += self._tau
+
+        if type(ctrl_vars) == ndarray:
+            check_ndarray_is_matrix(ctrl_vars, "ctrl_vars")
+            y += ctrl_vars.dot(np.asarray(self._gamma_ctrl))
+
+        return y, contributions
@@ -1,20 +1,36 @@
 from pickle import dump, load
-from typing import Dict, Union
-from numpy import ndarray, dot
+from typing import Dict, Tuple, Union
+from numpy import ndarray, asarray, einsum
 
 from bayesian_mmm.spend_transformation.spend_transformation import (
-    add_lagged_values_along_z,
+    view_lagged_values_along_z,
     compute_adstock,
+    compute_adstock_lag_weights,
     compute_geo_decay,
+    compute_geo_decay_lag_weights,
     compute_hill,
-    compute_reach
+    compute_hill_derivative,
+    compute_hill_inverse,
+    compute_reach,
+    compute_reach_derivative,
+    compute_reach_inverse
     )
+from bayesian_mmm.spend_transformation.transform_cache import (
+    TransformCache,
+    get_array_key,
+    get_transform_key
+)
 from bayesian_mmm.utilities.utilities import check_ndarray_is_matrix
 
 
 class InferenceMachine:
 
-    def __init__(self, param_nm_to_val: Dict, max_lag: int) -> None:
+    # class level default, also for inference machines pickled before the cache existed
+    __transform_cache = None
+
+    def __init__(
+        self, param_nm_to_val: Dict, max_lag: int, carryover_engine_nm: str = "lag_window"
+        ) -> None:
 
         if "delay" in param_nm_to_val.keys():
             self.__carryover_func = compute_adstock
@@ -27,6 +43,8 @@ class InferenceMachine:
                 "retain_rates":param_nm_to_val["retain_rate"]
                 }
 
+        self.__carryover_params["engine_nm"] = carryover_engine_nm
+
         if "ec" in param_nm_to_val.keys():
             self.__diminushing_returns_func = compute_hill
             self.__diminushing_returns_params = {
@@ -49,28 +67,115 @@ class InferenceMachine:
         self.__max_lag = max_lag
 
 
+    def __getstate__(self) -> Dict:
+
+        # the transform cache is shared with the other consumers of a run, it is not saved
+        state = self.__dict__.copy()
+        state.pop("_InferenceMachine__transform_cache", None)
+
+        return state
+
+    def set_transform_cache(self, transform_cache: Union[TransformCache, None]) -> None:
+
+        self.__transform_cache = transform_cache
+
+    def get_max_lag(self) -> int:
+
+        return self.__max_lag
+
     def predict(self, spends: ndarray, ctrl_vars: Union[ndarray, None]) -> ndarray:
 
         transformed_spends = self._get_transformed_spends(spends)        
 
-        y = dot(transformed_spends, self._beta_medias) + self._tau
+        return self._get_y(transformed_spends, ctrl_vars)
+
+    def _get_y(self, transformed_spends: ndarray, ctrl_vars: Union[ndarray, None]) -> ndarray:
+
+        # parameters may have a leading draw axis, y is then (nb_draws, nb_obs)
+        y = einsum("...nm,...m->...n", transformed_spends, asarray(self._beta_medias))
+        y += asarray(self._tau)[..., None]
 
         if type(ctrl_vars) == ndarray:
             check_ndarray_is_matrix(ctrl_vars, "ctrl_vars")
-            y += dot(ctrl_vars, self._gamma_ctrl)
+            y += einsum("nc,...c->...n", ctrl_vars, asarray(self._gamma_ctrl))
 
         return y
 
     def _get_transformed_spends(self, spends: ndarray) -> ndarray:
 
-        lagged_spends = add_lagged_values_along_z(spends, self.__max_lag)
+        if self.__transform_cache is None:
+            return self._get_diminushing_returns(self._get_carryover_spends(spends))
+
+        return self.__transform_cache.get(
+            get_transform_key(
+                self.__diminushing_returns_func,
+                self.__diminushing_returns_params,
+                self.__get_carryover_key(spends)
+            ),
+            lambda: self._get_diminushing_returns(self._get_carryover_spends(spends))
+        )
+
+    def _get_carryover_spends(self, spends: ndarray) -> ndarray:
+
+        if self.__transform_cache is None:
+            return self.__compute_carryover_spends(spends)
+
+        return self.__transform_cache.get(
+            self.__get_carryover_key(spends), lambda: self.__compute_carryover_spends(spends)
+        )
+
+    def __compute_carryover_spends(self, spends: ndarray) -> ndarray:
+
+        lagged_spends = view_lagged_values_along_z(spends, self.__max_lag)
 
-        transformed_spends = self.__carryover_func(lagged_spends, **self.__carryover_params)
-        transformed_spends = self.__diminushing_returns_func(
-            transformed_spends, **self.__diminushing_returns_params
+        return self.__carryover_func(lagged_spends, **self.__carryover_params)
+
+    def __get_carryover_key(self, spends: ndarray) -> Tuple:
+
+        # same key as the CarryoverVisualizor for the same params and spends
+        return get_transform_key(
+            self.__carryover_func, self.__carryover_params, self.__max_lag, get_array_key(spends)
+        )
+
+    def _get_diminushing_returns(self, carryover_spends: ndarray) -> ndarray:
+
+        return self.__diminushing_returns_func(
+            carryover_spends, **self.__diminushing_returns_params
             )
 
-        return transformed_spends
+    def _get_diminushing_returns_derivative(self, carryover_spends: ndarray) -> ndarray:
+
+        if self.__diminushing_returns_func == compute_hill:
+            derivative_func = compute_hill_derivative
+        else:
+            derivative_func = compute_reach_derivative
+
+        return derivative_func(carryover_spends, **self.__diminushing_returns_params)
+
+    def _get_diminushing_returns_inverse(self, transformed_spends: ndarray) -> ndarray:
+
+        if self.__diminushing_returns_func == compute_hill:
+            inverse_func = compute_hill_inverse
+        else:
+            inverse_func = compute_reach_inverse
+
+        return inverse_func(transformed_spends, **self.__diminushing_returns_params)
+
+    def _get_lag_weights(self) -> ndarray:
+
+        # normalized so that the carryover is a weighted mean of the lagged spends
+        retain_rates = asarray(self.__carryover_params["retain_rates"], dtype=float)
+
+        if self.__carryover_func == compute_adstock:
+            lag_weights = compute_adstock_lag_weights(
+                asarray(self.__carryover_params["delays"], dtype=float),
+                retain_rates,
+                self.__max_lag
+                )
+        else:
+            lag_weights = compute_geo_decay_lag_weights(retain_rates, self.__max_lag)
+
+        return lag_weights / lag_weights.sum(axis=-1)[..., None]
 
    
 
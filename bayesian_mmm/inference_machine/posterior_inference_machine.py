@@ -0,0 +1,100 @@
+from pickle import dump, load
+from typing import Dict, Iterator, List, Union
+from numpy import ndarray, concatenate, quantile, zeros
+
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+
+
+class PosteriorInferenceMachine:
+
+    def __init__(
+        self, sampling_results: Dict, max_lag: int, carryover_engine_nm: str = "lag_window"
+        ) -> None:
+
+        self.__sampling_results = sampling_results
+        self.__max_lag = max_lag
+        self.__carryover_engine_nm = carryover_engine_nm
+
+        self.__nb_draws = len(sampling_results["tau"])
+
+    def get_nb_draws(self) -> int:
+
+        return self.__nb_draws
+
+    def predict_draws(
+        self,
+        spends: ndarray,
+        ctrl_vars: Union[ndarray, None],
+        draws_chunk_size: Union[int, None] = None
+        ) -> ndarray:
+
+        return concatenate(list(self.__predict_by_chunk(spends, ctrl_vars, draws_chunk_size)))
+
+    def predict_bands(
+        self,
+        spends: ndarray,
+        ctrl_vars: Union[ndarray, None],
+        quantiles: List[float],
+        draws_chunk_size: Union[int, None] = None,
+        target_normalizer: Union[Normalizer, None] = None
+        ) -> Dict[str, ndarray]:
+
+        # only the (nb_draws, nb_obs) predictions are kept, the
+        # (nb_draws, nb_obs, nb_media) transformed spends live one chunk at a time
+        y = zeros((self.__nb_draws, spends.shape[0]))
+
+        start = 0
+        for draws_y in self.__predict_by_chunk(spends, ctrl_vars, draws_chunk_size):
+
+            if target_normalizer is not None:
+                draws_y = target_normalizer.reverse_transform(
+                    draws_y.reshape((-1, 1))
+                    ).reshape(draws_y.shape)
+
+            y[start:start + draws_y.shape[0]] = draws_y
+            start += draws_y.shape[0]
+
+        return {"mean": y.mean(axis=0), "quantiles": quantile(y, quantiles, axis=0)}
+
+    def __predict_by_chunk(
+        self,
+        spends: ndarray,
+        ctrl_vars: Union[ndarray, None],
+        draws_chunk_size: Union[int, None]
+        ) -> Iterator[ndarray]:
+
+        if draws_chunk_size is None:
+            draws_chunk_size = self.__nb_draws
+        elif draws_chunk_size < 1:
+            raise ValueError("draws_chunk_size value must be greater or equal 1")
+
+        for start in range(0, self.__nb_draws, draws_chunk_size):
+
+            chunk_param_nm_to_val = {
+                param_nm: values[start:start + draws_chunk_size]
+                for param_nm, values in self.__sampling_results.items()
+            }
+
+            inference_machine = InferenceMachine(
+                chunk_param_nm_to_val, self.__max_lag, self.__carryover_engine_nm
+            )
+
+            yield inference_machine.predict(spends, ctrl_vars)
+
+
+
+def save_posterior_inference_machine(
+    posterior_inference_machine: PosteriorInferenceMachine, name: str
+    ) -> None:
+
+    with open("./results/inference_machine/posterior_%s.pkl" % name, "wb") as f:
+        dump(posterior_inference_machine, f)
+
+
+def load_posterior_inference_machine(name: str) -> PosteriorInferenceMachine:
+
+    with open("./results/inference_machine/posterior_%s.pkl" % name, "rb") as f:
+        posterior_inference_machine = load(f)
+
+    return posterior_inference_machine
@@ -0,0 +1,81 @@
+from pickle import dump, load
+from typing import Dict, Union
+from numpy import ndarray, arange, einsum, roll, zeros
+
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.utilities.utilities import check_ndarray_is_matrix
+
+
+class StreamingPredictor(InferenceMachine):
+
+    def __init__(self, param_nm_to_val: Dict, max_lag: int) -> None:
+
+        super().__init__(param_nm_to_val, max_lag)
+
+        self.__lag_weights = self._get_lag_weights()
+        self.__max_lag = max_lag
+        self.__nb_media = self.__lag_weights.shape[0]
+
+        # ring buffer of the last max_lag spends, the spends
+        # of the next period are written at row self.__position
+        self.__spends_buffer = zeros((max_lag, self.__nb_media))
+        self.__position = 0
+
+    def warm_start(self, spends: ndarray) -> None:
+
+        self.__check_spends(spends)
+
+        last_spends = spends[-self.__max_lag:]
+
+        self.__spends_buffer = zeros((self.__max_lag, self.__nb_media))
+        self.__spends_buffer[self.__max_lag - len(last_spends):] = last_spends
+        self.__position = 0
+
+    def get_last_spends(self) -> ndarray:
+
+        # from the oldest to the most recent period
+        return roll(self.__spends_buffer, -self.__position, axis=0)
+
+    def update(self, spends: ndarray, ctrl_vars: Union[ndarray, None]) -> ndarray:
+
+        self.__check_spends(spends)
+
+        carryover_spends = zeros(spends.shape)
+
+        for obs_index, obs_spends in enumerate(spends):
+
+            self.__spends_buffer[self.__position] = obs_spends
+
+            # buffer rows from lag 0 to lag max_lag - 1
+            lag_rows = (self.__position - arange(self.__max_lag)) % self.__max_lag
+            carryover_spends[obs_index] = einsum(
+                "ml,lm->m", self.__lag_weights, self.__spends_buffer[lag_rows]
+            )
+
+            self.__position = (self.__position + 1) % self.__max_lag
+
+        transformed_spends = self._get_diminushing_returns(carryover_spends)
+
+        return self._get_y(transformed_spends, ctrl_vars)
+
+    def __check_spends(self, spends: ndarray) -> None:
+
+        check_ndarray_is_matrix(spends, "spends")
+
+        if spends.shape[1] != self.__nb_media:
+            raise ValueError("spends must have %d columns" % self.__nb_media)
+
+
+
+def save_streaming_predictor(streaming_predictor: StreamingPredictor, name: str) -> None:
+
+    with open("./results/inference_machine/streaming_%s.pkl" % name, "wb") as f:
+        dump(streaming_predictor, f)
+
+
+def load_streaming_predictor(name: str) -> StreamingPredictor:
+
+    with open("./results/inference_machine/streaming_%s.pkl" % name, "rb") as f:
+        streaming_predictor = load(f)
+
+    return streaming_predictor
@@ -76,6 +76,73 @@ class Normalizer:
 
         return self.__reverse_transfo_func(descaled_values)
 
+    def get_derivative(self, values: ndarray) -> ndarray:
+
+        # derivative of the normalized values with respect to the values
+        check_ndarray_is_matrix(values, "values")
+        self.__check_non_negative_values_with_log_transfo(values)
+
+        if self.__transfo_nm == "log":
+            transfo_derivative = 1 / (values + 1)
+        elif self.__transfo_nm == "sqrt":
+            transfo_derivative = 0.5 / np.sqrt(values)
+        else:
+            transfo_derivative = np.ones(values.shape)
+
+        # MaxAbsScaler divides by scale_ while MinMaxScaler multiplies by it
+        if self.__scaler_nm == "max_abs":
+            return transfo_derivative / self.__scaler.scale_
+
+        return transfo_derivative * self.__scaler.scale_
+
+    def get_reverse_derivative(self, normalized_values: ndarray) -> ndarray:
+
+        # derivative of the reverse transformed values with respect to the normalized values
+        check_ndarray_is_matrix(normalized_values, "normalized_values")
+
+        descaled_values = self.__scaler.inverse_transform(normalized_values)
+
+        if self.__transfo_nm == "log":
+            reverse_transfo_derivative = np.exp(descaled_values)
+        elif self.__transfo_nm == "sqrt":
+            reverse_transfo_derivative = 2 * descaled_values
+        else:
+            reverse_transfo_derivative = np.ones(descaled_values.shape)
+
+        if self.__scaler_nm == "max_abs":
+            return reverse_transfo_derivative * self.__scaler.scale_
+
+        return reverse_transfo_derivative / self.__scaler.scale_
+
+    def transform_spends(self, spends: ndarray) -> ndarray:
+
+        return self.transform(self.__pad_spends(spends))[:, :spends.shape[1]]
+
+    def reverse_transform_spends(self, normalized_spends: ndarray) -> ndarray:
+
+        return self.reverse_transform(
+            self.__pad_spends(normalized_spends)
+            )[:, :normalized_spends.shape[1]]
+
+    def get_spends_derivative(self, spends: ndarray) -> ndarray:
+
+        return self.get_derivative(self.__pad_spends(spends))[:, :spends.shape[1]]
+
+    def __pad_spends(self, spends: ndarray) -> ndarray:
+
+        # the predictors are the spends followed by the ctrl vars, the ctrl vars are filled
+        # with ones, where the transfos and their derivatives are finite, and left out
+        check_ndarray_is_matrix(spends, "spends")
+
+        values = np.ones((len(spends), self.get_nb_features()))
+        values[:, :spends.shape[1]] = spends
+
+        return values
+
+    def get_nb_features(self) -> int:
+
+        return len(self.__scaler.scale_)
+
     def save(self, name: str):
 
         with open("./results/normalizer/scaler_%s.pkl" % name, "wb") as f:
@@ -104,5 +171,7 @@ def load_normalizer(name: str) -> Normalizer:
     normalizer = Normalizer(**init_args)
     normalizer.set_fitted_scaler(scaler)
 
+    return normalizer
+
 
 
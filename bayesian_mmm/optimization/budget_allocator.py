@@ -0,0 +1,97 @@
+from typing import Dict, Tuple, Union
+import numpy as np
+from numpy import ndarray
+
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.optimization.projected_gradient import get_bounds, maximize_on_budget
+from bayesian_mmm.spend_transformation.spend_transformation import MIN_NORMALIZED_SPEND
+
+
+class BudgetAllocator(InferenceMachine):
+
+    def __init__(
+        self,
+        param_nm_to_val: Dict,
+        max_lag: int,
+        predictor_normalizer: Normalizer,
+        target_normalizer: Normalizer
+        ) -> None:
+
+        super().__init__(param_nm_to_val, max_lag)
+
+        self.__predictor_normalizer = predictor_normalizer
+        self.__target_normalizer = target_normalizer
+        self.__nb_media = len(self._beta_medias)
+
+    def get_response(self, spends: ndarray, ctrl_vars: Union[ndarray, None] = None) -> float:
+
+        # the response to the spends repeated in every period, at steady state. The lag
+        # weights sum to 1, constant spends have a carryover equal to the spends, so the
+        # response, and the allocation maximizing it, do not depend on the carryover params
+        normalized_spends, normalized_ctrl_vars = self.__normalize(spends, ctrl_vars)
+        normalized_spends = np.maximum(normalized_spends, MIN_NORMALIZED_SPEND)
+
+        y = self._get_y(
+            self._get_diminushing_returns(normalized_spends[None, :]),
+            None if ctrl_vars is None else normalized_ctrl_vars[None, :]
+        )
+
+        return float(self.__target_normalizer.reverse_transform(y.reshape((-1, 1)))[0, 0])
+
+    def allocate(
+        self,
+        budget: float,
+        min_spends: Union[ndarray, None] = None,
+        max_spends: Union[ndarray, None] = None,
+        max_iter: int = 500,
+        tol: float = 1e-9
+        ) -> ndarray:
+
+        min_spends, max_spends = get_bounds(budget, self.__nb_media, min_spends, max_spends)
+
+        # target normalization is increasing so the normalized target is maximized
+        return maximize_on_budget(
+            self.__get_objective_and_gradient,
+            np.full(self.__nb_media, budget / self.__nb_media),
+            budget,
+            min_spends,
+            max_spends,
+            max_iter,
+            tol
+        )
+
+    def __get_objective_and_gradient(self, spends: ndarray) -> Tuple[float, ndarray]:
+
+        normalized_spends, _ = self.__normalize(spends, None)
+        normalized_spends = np.maximum(normalized_spends, MIN_NORMALIZED_SPEND)[None, :]
+
+        objective = self._get_diminushing_returns(normalized_spends)[0].dot(self._beta_medias)
+
+        # chain rule through the saturation and the predictors normalization
+        gradient = np.asarray(self._beta_medias) * (
+            self._get_diminushing_returns_derivative(normalized_spends)[0]
+            * self.__get_normalization_derivative(spends)
+        )
+
+        return objective, gradient
+
+    def __normalize(
+        self, spends: ndarray, ctrl_vars: Union[ndarray, None]
+        ) -> Tuple[ndarray, Union[ndarray, None]]:
+
+        if ctrl_vars is None:
+            return self.__predictor_normalizer.transform_spends(spends[None, :])[0], None
+
+        normalized_values = self.__predictor_normalizer.transform(
+            np.concatenate([spends, ctrl_vars])[None, :]
+            )[0]
+
+        return normalized_values[:self.__nb_media], normalized_values[self.__nb_media:]
+
+    def __get_normalization_derivative(self, spends: ndarray) -> ndarray:
+
+        return self.__predictor_normalizer.get_spends_derivative(
+            np.maximum(spends, MIN_NORMALIZED_SPEND)[None, :]
+            )[0]
+
@@ -0,0 +1,172 @@
+from typing import Dict, Tuple, Union
+import numpy as np
+from numpy import ndarray
+from numpy.lib.stride_tricks import sliding_window_view
+
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.optimization.projected_gradient import get_bounds, maximize_on_budget
+from bayesian_mmm.spend_transformation.spend_transformation import (
+    MIN_NORMALIZED_SPEND,
+    view_lagged_values_along_z
+)
+from bayesian_mmm.utilities.utilities import check_ndarray_is_matrix
+
+
+class FlightingOptimizer(InferenceMachine):
+
+    def __init__(
+        self,
+        param_nm_to_val: Dict,
+        max_lag: int,
+        predictor_normalizer: Normalizer,
+        target_normalizer: Normalizer
+        ) -> None:
+
+        super().__init__(param_nm_to_val, max_lag)
+
+        self.__max_lag = max_lag
+        self.__predictor_normalizer = predictor_normalizer
+        self.__target_normalizer = target_normalizer
+        self.__nb_media = len(self._beta_medias)
+        self.__lag_weights = self._get_lag_weights()
+
+    def get_response(
+        self,
+        schedule: ndarray,
+        history_spends: ndarray,
+        ctrl_vars: Union[ndarray, None] = None
+        ) -> ndarray:
+
+        y, _ = self.__forward(schedule, self.__get_tail(history_spends), ctrl_vars)
+
+        return self.__target_normalizer.reverse_transform(y.reshape((-1, 1))).reshape((-1,))
+
+    def get_objective_and_gradient(
+        self,
+        schedule: ndarray,
+        history_spends: ndarray,
+        ctrl_vars: Union[ndarray, None] = None
+        ) -> Tuple[float, ndarray]:
+
+        return self.__get_objective_and_gradient(
+            schedule, self.__get_tail(history_spends), ctrl_vars
+        )
+
+    def optimize(
+        self,
+        budget: float,
+        history_spends: ndarray,
+        nb_periods: int,
+        min_spends: Union[ndarray, None] = None,
+        max_spends: Union[ndarray, None] = None,
+        ctrl_vars: Union[ndarray, None] = None,
+        max_iter: int = 500,
+        tol: float = 1e-9
+        ) -> ndarray:
+
+        shape = (nb_periods, self.__nb_media)
+        tail = self.__get_tail(history_spends)
+
+        # min and max spends are per media or per period and media
+        min_spends, max_spends = get_bounds(
+            budget,
+            nb_periods * self.__nb_media,
+            None if min_spends is None else np.broadcast_to(min_spends, shape).reshape((-1,)),
+            None if max_spends is None else np.broadcast_to(max_spends, shape).reshape((-1,))
+        )
+
+        # started from the media split of the historical tail
+        initial_schedule = np.tile(tail.sum(axis=0) + MIN_NORMALIZED_SPEND, (nb_periods, 1))
+        initial_schedule *= budget / initial_schedule.sum()
+
+        def get_objective_and_gradient(flat_schedule: ndarray) -> Tuple[float, ndarray]:
+            objective, gradient = self.__get_objective_and_gradient(
+                flat_schedule.reshape(shape), tail, ctrl_vars
+            )
+            return objective, gradient.reshape((-1,))
+
+        schedule = maximize_on_budget(
+            get_objective_and_gradient,
+            initial_schedule.reshape((-1,)),
+            budget,
+            min_spends,
+            max_spends,
+            max_iter,
+            tol
+        )
+
+        return schedule.reshape(shape)
+
+    def __get_tail(self, history_spends: ndarray) -> ndarray:
+
+        # the max_lag - 1 last periods are carried over in the horizon
+        check_ndarray_is_matrix(history_spends, "history_spends")
+
+        tail = np.zeros((self.__max_lag - 1, self.__nb_media))
+        if self.__max_lag > 1:
+            last_spends = history_spends[-(self.__max_lag - 1):]
+            tail[len(tail) - len(last_spends):] = last_spends
+
+        return tail
+
+    def __forward(
+        self, schedule: ndarray, tail: ndarray, ctrl_vars: Union[ndarray, None]
+        ) -> Tuple[ndarray, Dict]:
+
+        check_ndarray_is_matrix(schedule, "schedule")
+
+        normalized_spends = self.__predictor_normalizer.transform_spends(
+            np.concatenate([tail, np.maximum(schedule, 0)])
+            )
+
+        # carryover of the horizon periods, the tail being their first lags
+        lagged_spends = view_lagged_values_along_z(normalized_spends, self.__max_lag)[len(tail):]
+        raw_carryover_spends = np.einsum("tml,ml->tm", lagged_spends, self.__lag_weights)
+        carryover_spends = np.maximum(raw_carryover_spends, MIN_NORMALIZED_SPEND)
+
+        if ctrl_vars is not None:
+            ctrl_vars = self.__predictor_normalizer.transform(
+                np.column_stack([np.maximum(schedule, 0), ctrl_vars])
+                )[:, self.__nb_media:]
+
+        y = self._get_y(self._get_diminushing_returns(carryover_spends), ctrl_vars)
+
+        return y, {
+            "raw_carryover_spends": raw_carryover_spends,
+            "carryover_spends": carryover_spends
+        }
+
+    def __get_objective_and_gradient(
+        self, schedule: ndarray, tail: ndarray, ctrl_vars: Union[ndarray, None]
+        ) -> Tuple[float, ndarray]:
+
+        y, intermediates = self.__forward(schedule, tail, ctrl_vars)
+
+        # objective is the total target over the horizon in its original scale
+        objective = self.__target_normalizer.reverse_transform(y.reshape((-1, 1))).sum()
+
+        # reverse accumulation, from the target to the carryover spends
+        y_adjoint = self.__target_normalizer.get_reverse_derivative(y.reshape((-1, 1)))
+        carryover_adjoint = y_adjoint * np.asarray(self._beta_medias) * (
+            self._get_diminushing_returns_derivative(intermediates["carryover_spends"])
+        )
+        # the clipped carryover spends do not depend on the spends, e.g. spends
+        # below the training min of a min_max scaler
+        carryover_adjoint *= intermediates["raw_carryover_spends"] > MIN_NORMALIZED_SPEND
+
+        # the normalized spends of period t are carried over in periods t to t + max_lag - 1
+        padded_carryover_adjoint = np.concatenate([
+            carryover_adjoint, np.zeros((self.__max_lag - 1, self.__nb_media))
+        ])
+        normalized_spends_adjoint = np.einsum(
+            "tml,ml->tm",
+            sliding_window_view(padded_carryover_adjoint, self.__max_lag, axis=0),
+            self.__lag_weights
+        )
+
+        normalization_derivative = self.__predictor_normalizer.get_spends_derivative(
+            np.maximum(schedule, MIN_NORMALIZED_SPEND)
+            )
+
+        return objective, normalized_spends_adjoint * normalization_derivative
@@ -0,0 +1,112 @@
+from typing import Callable, Tuple, Union
+import numpy as np
+from numpy import ndarray
+
+from bayesian_mmm.spend_transformation.spend_transformation import MIN_NORMALIZED_SPEND
+
+MAX_NB_STEP_HALVINGS = 60
+ROUNDING_TOL = 1e-12
+
+
+def get_bounds(
+    budget: float,
+    nb_spends: int,
+    min_spends: Union[ndarray, None],
+    max_spends: Union[ndarray, None]
+    ) -> Tuple[ndarray, ndarray]:
+
+    if min_spends is None:
+        min_spends = np.zeros(nb_spends)
+    if max_spends is None:
+        max_spends = np.full(nb_spends, budget)
+
+    min_spends = np.broadcast_to(np.asarray(min_spends, dtype=float), (nb_spends,))
+    max_spends = np.broadcast_to(np.asarray(max_spends, dtype=float), (nb_spends,))
+
+    if (min_spends < 0).any():
+        raise ValueError("min_spends values must be greater or equal 0")
+
+    if (min_spends > max_spends).any():
+        raise ValueError("min_spends values must be inferior or equal max_spends")
+
+    if not min_spends.sum() <= budget <= max_spends.sum():
+        raise ValueError("budget must be between the sum of min_spends and max_spends")
+
+    return min_spends, max_spends
+
+
+def maximize_on_budget(
+    objective_and_gradient_func: Callable[[ndarray], Tuple[float, ndarray]],
+    initial_spends: ndarray,
+    budget: float,
+    min_spends: ndarray,
+    max_spends: ndarray,
+    max_iter: int = 500,
+    tol: float = 1e-9
+    ) -> ndarray:
+
+    spends = project_on_budget(initial_spends, budget, min_spends, max_spends)
+    objective, gradient = objective_and_gradient_func(spends)
+    step_size = 0.1 * budget / max(np.abs(gradient).max(), MIN_NORMALIZED_SPEND)
+
+    # projected gradient ascent with backtracking line search, the step is halved
+    # at most MAX_NB_STEP_HALVINGS times, below that the ascent has converged
+    for _ in range(max_iter):
+
+        has_converged = True
+
+        for _ in range(MAX_NB_STEP_HALVINGS):
+
+            # the step moves the spends by at most step_size times the max gradient
+            if step_size * np.abs(gradient).max() <= tol * budget:
+                break
+
+            new_spends = project_on_budget(
+                spends + step_size * gradient, budget, min_spends, max_spends
+            )
+
+            # the projection alone moves the spends by rounding errors
+            if np.abs(new_spends - spends).max() <= max(tol, ROUNDING_TOL) * budget:
+                break
+
+            new_objective, new_gradient = objective_and_gradient_func(new_spends)
+            if new_objective >= objective + 1e-4 * gradient.dot(new_spends - spends):
+                has_converged = False
+                break
+
+            step_size /= 2
+
+        if has_converged:
+            break
+
+        spends, objective, gradient = new_spends, new_objective, new_gradient
+        step_size *= 2
+
+    return spends
+
+
+def project_on_budget(
+    spends: ndarray, budget: float, min_spends: ndarray, max_spends: ndarray
+    ) -> ndarray:
+
+    # euclidean projection on {sum(x) = budget, min_spends <= x <= max_spends}
+    # is x = clip(spends - shift), the sum of x is piecewise linear in the shift
+    # with breakpoints where a spend leaves its max (slope -1) or reaches its min
+    breakpoints = np.concatenate([spends - max_spends, spends - min_spends])
+    slope_changes = np.concatenate([-np.ones(len(spends)), np.ones(len(spends))])
+
+    order = np.argsort(breakpoints, kind="stable")
+    breakpoints, slope_changes = breakpoints[order], slope_changes[order]
+
+    slopes = np.cumsum(slope_changes)[:-1]
+    sums = max_spends.sum() + np.concatenate([[0.], np.cumsum(slopes * np.diff(breakpoints))])
+
+    # sums is non increasing, the shift lies between the breakpoints around budget
+    index = min(max(np.searchsorted(-sums, -budget), 1), len(sums) - 1)
+
+    if slopes[index - 1] == 0:
+        shift = breakpoints[index]
+    else:
+        shift = breakpoints[index - 1] + (budget - sums[index - 1]) / slopes[index - 1]
+
+    return np.clip(spends - shift, min_spends, max_spends)
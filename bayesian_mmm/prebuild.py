@@ -0,0 +1,67 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Dict
+
+from bayesian_mmm.sampling.stan_model_cache import StanModelCache
+from bayesian_mmm.sampling.stan_model_generator import create_stan_model
+from bayesian_mmm.utilities.utilities import load_config
+
+CARRYOVER_TRANSFO_NMS = ["adstock", "geo_decay"]
+DIMINUSHING_RETURNS_TRANSFO_NMS = ["hill", "reach"]
+WITH_CTRL_VARS = [True, False]
+
+
+def prebuild_stan_model(
+    carryover_transfo_nm: str,
+    diminushing_returns_transfo_nm: str,
+    with_ctrl_vars: bool,
+    vectorized: bool,
+    with_lagged_spends: bool,
+    stan_model_cache_args: Dict
+    ) -> None:
+
+    # the compiled model is only stored in the cache, not sent back to the parent process
+    create_stan_model(
+        carryover_transfo_nm,
+        diminushing_returns_transfo_nm,
+        with_ctrl_vars,
+        vectorized,
+        with_lagged_spends,
+        StanModelCache(**stan_model_cache_args)
+    )
+
+
+def run(config_file_nm: str = "train") -> None:
+
+    config = load_config(config_file_nm)
+
+    stan_model_cache_args = config.get("STAN_MODEL_CACHE")
+
+    if not stan_model_cache_args:
+        raise ValueError("STAN_MODEL_CACHE must be set in config to prebuild models")
+
+    variants = product(
+        CARRYOVER_TRANSFO_NMS, DIMINUSHING_RETURNS_TRANSFO_NMS, WITH_CTRL_VARS
+    )
+
+    with ProcessPoolExecutor() as executor:
+
+        futures = [
+            executor.submit(
+                prebuild_stan_model,
+                *variant,
+                config.get("VECTORIZED_STAN_CODE", False),
+                not config.get("CARRYOVER_IN_STAN_MODEL", False),
+                stan_model_cache_args
+            )
+            for variant in variants
+        ]
+
+        for future in futures:
+            future.result()
+
+
+
+if __name__ == "__main__":
+
+    run()
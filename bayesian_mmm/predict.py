@@ -1,22 +1,37 @@
 
+from functools import lru_cache
 from bayesian_mmm.utilities.utilities import load_config
-from typing import Union
+from typing import Dict, List, Union
 from numpy import ndarray
-from bayesian_mmm.normalizer.normalizer import load_normalizer
-from bayesian_mmm.inference_machine.inference_machine import load_inference_machine
+from bayesian_mmm.serving.model_registry import ModelRegistry
 
 
 
-def predict(spends: ndarray, ctrl_vars: Union[ndarray, None]):
+@lru_cache(maxsize=1)
+def get_model_registry(max_nb_models: int, with_content_hash: bool) -> ModelRegistry:
 
-    config = load_config("predict")
-
-    target_normalizer = load_normalizer("target_"+config["EXPERIMENT_NM"])
-    inference_machine = load_inference_machine(config["EXPERIMENT_NM"])
+    # kept across calls, a new registry is only created when its settings change
+    return ModelRegistry(max_nb_models, with_content_hash)
 
-    pred = inference_machine.predict(spends, ctrl_vars)
-    pred = target_normalizer.denormalize(pred)
-
-    return pred
 
+def predict(
+    spends: ndarray,
+    ctrl_vars: Union[ndarray, None],
+    quantiles: Union[List[float], None] = None
+    ) -> Union[ndarray, Dict[str, ndarray]]:
 
+    # the config is read at each call, the artifacts are loaded once by
+    # the registry and reloaded when updated
+    config = load_config("predict")
+    model_registry = get_model_registry(
+        config.get("MODEL_REGISTRY_MAX_NB_MODELS", 8),
+        config.get("MODEL_REGISTRY_WITH_CONTENT_HASH", False)
+    )
+
+    return model_registry.predict(
+        config["EXPERIMENT_NM"],
+        spends,
+        ctrl_vars,
+        quantiles,
+        config.get("DRAWS_CHUNK_SIZE")
+    )
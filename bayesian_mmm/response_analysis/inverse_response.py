@@ -0,0 +1,76 @@
+from typing import Dict
+import numpy as np
+from numpy import ndarray
+
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.utilities.utilities import check_ndarray_is_matrix
+
+
+class InverseResponseCalculator(InferenceMachine):
+
+    def __init__(
+        self,
+        param_nm_to_val: Dict,
+        max_lag: int,
+        predictor_normalizer: Normalizer,
+        target_normalizer: Normalizer
+        ) -> None:
+
+        super().__init__(param_nm_to_val, max_lag)
+
+        self.__predictor_normalizer = predictor_normalizer
+        self.__target_normalizer = target_normalizer
+        self.__nb_media = np.asarray(self._beta_medias).shape[-1]
+
+    def get_incremental_outcomes(self, spends: ndarray) -> ndarray:
+
+        # contributions of constant spends at steady state, as BudgetAllocator.get_response
+        self.__check_media_values(spends, "spends")
+
+        normalized_spends = self.__predictor_normalizer.transform_spends(spends)
+
+        normalized_contributions = self._get_diminushing_returns(normalized_spends) * (
+            np.asarray(self._beta_medias)[..., None, :]
+        )
+
+        return self.__target_normalizer.reverse_transform(
+            normalized_contributions.reshape((-1, 1))
+            ).reshape(normalized_contributions.shape)
+
+    def get_required_spends(self, incremental_outcomes: ndarray) -> ndarray:
+
+        # constant spends of each media whose steady state contribution is incremental_outcomes,
+        # inf when the outcome is out of reach of the saturation of the media
+        self.__check_media_values(incremental_outcomes, "incremental_outcomes")
+
+        if (incremental_outcomes < 0).any():
+            raise ValueError("incremental_outcomes value must be greater or equal 0")
+
+        normalized_contributions = self.__target_normalizer.transform(
+            incremental_outcomes.reshape((-1, 1))
+            ).reshape(incremental_outcomes.shape)
+
+        with np.errstate(divide="ignore"):
+            transformed_spends = normalized_contributions / np.asarray(self._beta_medias)[..., None, :]
+
+        normalized_spends = self._get_diminushing_returns_inverse(transformed_spends)
+
+        # unreachable outcomes are kept out of the predictor normalizer
+        is_reachable = np.isfinite(normalized_spends)
+        reachable_normalized_spends = np.where(is_reachable, normalized_spends, 0)
+
+        reachable_spends = self.__predictor_normalizer.reverse_transform_spends(
+            reachable_normalized_spends.reshape((-1, self.__nb_media))
+            )
+
+        return np.where(
+            is_reachable, reachable_spends.reshape(normalized_spends.shape), np.inf
+        )
+
+    def __check_media_values(self, values: ndarray, values_nm: str) -> None:
+
+        check_ndarray_is_matrix(values, values_nm)
+
+        if values.shape[1] != self.__nb_media:
+            raise ValueError("%s must have %d columns" % (values_nm, self.__nb_media))
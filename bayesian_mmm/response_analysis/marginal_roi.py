@@ -0,0 +1,88 @@
+from typing import Dict, List, Union
+import numpy as np
+from numpy import ndarray
+
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.spend_transformation.spend_transformation import (
+    MIN_NORMALIZED_SPEND,
+    compute_hill,
+    compute_hill_derivative,
+    compute_reach,
+    compute_reach_derivative
+)
+
+
+def compute_marginal_roi(
+    sampling_results: Dict,
+    predictor_normalizer: Normalizer,
+    target_normalizer: Normalizer,
+    max_spends: ndarray,
+    nb_grid_points: int = 100,
+    quantiles: Union[List[float], None] = None,
+    media_chunk_size: Union[int, None] = None
+    ) -> Dict[str, ndarray]:
+
+    if quantiles is None:
+        quantiles = [0.05, 0.5, 0.95]
+
+    if nb_grid_points < 2:
+        raise ValueError("nb_grid_points value must be greater or equal 2")
+
+    nb_media = np.asarray(sampling_results["beta_medias"]).shape[-1]
+
+    if media_chunk_size is None:
+        media_chunk_size = nb_media
+    elif media_chunk_size < 1:
+        raise ValueError("media_chunk_size value must be greater or equal 1")
+
+    max_spends = np.broadcast_to(np.asarray(max_spends, dtype=float), (nb_media,))
+    spend_grid = np.linspace(0, max_spends, nb_grid_points)
+
+    normalized_spend_grid = np.maximum(
+        predictor_normalizer.transform_spends(spend_grid), MIN_NORMALIZED_SPEND
+    )
+    normalization_derivative = predictor_normalizer.get_spends_derivative(spend_grid)
+
+    if "ec" in sampling_results.keys():
+        transfo_func, derivative_func = compute_hill, compute_hill_derivative
+        transfo_param_nm_to_nm = {"ec": "ecs", "slope": "slopes"}
+    else:
+        transfo_func, derivative_func = compute_reach, compute_reach_derivative
+        transfo_param_nm_to_nm = {"half_saturation": "half_saturations"}
+
+    mean_marginal_rois = np.zeros((nb_grid_points, nb_media))
+    quantile_marginal_rois = np.zeros((len(quantiles), nb_grid_points, nb_media))
+
+    # a unit of spend sustained at steady state adds a unit of carryover, as the lag
+    # weights sum to 1, so the marginal roi chains the saturation, the predictor
+    # normalization and the contribution reverse transform derivatives.
+    # the (nb_draws, nb_grid_points, nb_media) arrays live one chunk of media at a time
+    for start in range(0, nb_media, media_chunk_size):
+
+        media_slice = slice(start, start + media_chunk_size)
+        transfo_params = {
+            nm: np.asarray(sampling_results[param_nm])[:, media_slice]
+            for param_nm, nm in transfo_param_nm_to_nm.items()
+        }
+        beta_medias = np.asarray(sampling_results["beta_medias"])[:, None, media_slice]
+
+        normalized_contributions = transfo_func(
+            normalized_spend_grid[:, media_slice], **transfo_params
+            ) * beta_medias
+
+        marginal_rois = target_normalizer.get_reverse_derivative(
+            normalized_contributions.reshape((-1, 1))
+            ).reshape(normalized_contributions.shape)
+        marginal_rois *= beta_medias * derivative_func(
+            normalized_spend_grid[:, media_slice], **transfo_params
+            )
+        marginal_rois *= normalization_derivative[:, media_slice]
+
+        mean_marginal_rois[:, media_slice] = marginal_rois.mean(axis=0)
+        quantile_marginal_rois[:, :, media_slice] = np.quantile(marginal_rois, quantiles, axis=0)
+
+    return {
+        "spend_grid": spend_grid,
+        "mean": mean_marginal_rois,
+        "quantiles": quantile_marginal_rois
+    }
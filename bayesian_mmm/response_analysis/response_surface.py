@@ -0,0 +1,181 @@
+from typing import Dict, List, Union
+import numpy as np
+from numpy import ndarray
+
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.spend_transformation.spend_transformation import (
+    compute_hill,
+    compute_reach
+)
+
+
+class ResponseSurface:
+
+    def __init__(
+        self,
+        media_nms: List[str],
+        spend_grid: ndarray,
+        quantiles: ndarray,
+        responses: ndarray,
+        draw_responses: Union[ndarray, None] = None
+        ) -> None:
+
+        # spend_grid is (nb_grid_points, nb_media), responses (nb_quantiles, nb_grid_points, nb_media)
+        # and draw_responses (nb_draws, nb_grid_points, nb_media)
+        self.__media_nms = list(media_nms)
+        self.__spend_grid = spend_grid
+        self.__quantiles = np.asarray(quantiles, dtype=float)
+        self.__responses = responses
+        self.__draw_responses = draw_responses
+
+    def get_media_nms(self) -> List[str]:
+
+        return self.__media_nms
+
+    def get_quantiles(self) -> ndarray:
+
+        return self.__quantiles
+
+    def get_response(
+        self, media_nm: str, spends: Union[ndarray, float], quantile: float = 0.5
+        ) -> ndarray:
+
+        media_index = self.__get_media_index(media_nm)
+
+        quantile_indices = np.flatnonzero(np.isclose(self.__quantiles, quantile))
+        if len(quantile_indices) == 0:
+            raise ValueError("%s is not a precomputed quantile" % quantile)
+
+        # spends out of the grid get the response of the closest grid bound
+        return np.interp(
+            spends,
+            self.__spend_grid[:, media_index],
+            self.__responses[quantile_indices[0], :, media_index]
+        )
+
+    def get_draw_responses(self, media_nm: str, spends: Union[ndarray, float]) -> ndarray:
+
+        if self.__draw_responses is None:
+            raise ValueError("response surface built without draws")
+
+        media_index = self.__get_media_index(media_nm)
+        spend_grid = self.__spend_grid[:, media_index]
+
+        return np.array([
+            np.interp(spends, spend_grid, draw_responses[:, media_index])
+            for draw_responses in self.__draw_responses
+        ])
+
+    def to_arrays(self) -> Dict[str, ndarray]:
+
+        arrays = {
+            "media_nms": np.array(self.__media_nms),
+            "spend_grid": self.__spend_grid,
+            "quantiles": self.__quantiles,
+            "responses": self.__responses
+        }
+
+        if self.__draw_responses is not None:
+            arrays["draw_responses"] = self.__draw_responses
+
+        return arrays
+
+    def __get_media_index(self, media_nm: str) -> int:
+
+        try:
+            return self.__media_nms.index(media_nm)
+        except ValueError:
+            raise ValueError("%s is not a media of the response surface" % media_nm)
+
+
+
+def create_response_surface(
+    sampling_results: Dict,
+    predictor_normalizer: Normalizer,
+    target_normalizer: Normalizer,
+    media_nms: List[str],
+    max_spends: ndarray,
+    nb_grid_points: int = 200,
+    quantiles: Union[List[float], None] = None,
+    with_draws: bool = False
+    ) -> ResponseSurface:
+
+    if quantiles is None:
+        quantiles = [0.05, 0.5, 0.95]
+
+    if nb_grid_points < 2:
+        raise ValueError("nb_grid_points value must be greater or equal 2")
+
+    nb_media = len(media_nms)
+    max_spends = np.broadcast_to(np.asarray(max_spends, dtype=float), (nb_media,))
+
+    spend_grid = np.linspace(0, max_spends, nb_grid_points)
+
+    normalized_spend_grid = predictor_normalizer.transform_spends(spend_grid)
+
+    if "ec" in sampling_results.keys():
+        transfo_func = compute_hill
+        transfo_param_nm_to_nm = {"ec": "ecs", "slope": "slopes"}
+    else:
+        transfo_func = compute_reach
+        transfo_param_nm_to_nm = {"half_saturation": "half_saturations"}
+
+    responses = np.zeros((len(quantiles), nb_grid_points, nb_media))
+    draw_responses = []
+
+    # at steady state the carryover of constant spends is the spends,
+    # medias are processed one at a time to bound the memory to nb_draws * nb_grid_points
+    for media_index in range(nb_media):
+
+        media_slice = slice(media_index, media_index + 1)
+
+        transformed_spends = transfo_func(
+            normalized_spend_grid[:, media_slice],
+            **{
+                nm: np.asarray(sampling_results[param_nm])[:, media_slice]
+                for param_nm, nm in transfo_param_nm_to_nm.items()
+            }
+        )
+        normalized_responses = (
+            transformed_spends
+            * np.asarray(sampling_results["beta_medias"])[:, None, media_slice]
+        )[:, :, 0]
+
+        media_draw_responses = target_normalizer.reverse_transform(
+            normalized_responses.reshape((-1, 1))
+            ).reshape(normalized_responses.shape)
+
+        responses[:, :, media_index] = np.quantile(media_draw_responses, quantiles, axis=0)
+
+        if with_draws:
+            draw_responses.append(media_draw_responses)
+
+    return ResponseSurface(
+        media_nms,
+        spend_grid,
+        np.array(quantiles),
+        responses,
+        np.stack(draw_responses, axis=-1) if with_draws else None
+    )
+
+
+def save_response_surface(response_surface: ResponseSurface, name: str) -> None:
+
+    np.savez_compressed(
+        "./results/inference_machine/response_surface_%s.npz" % name,
+        **response_surface.to_arrays()
+    )
+
+
+def load_response_surface(name: str) -> ResponseSurface:
+
+    with np.load("./results/inference_machine/response_surface_%s.npz" % name) as arrays:
+        response_surface = ResponseSurface(
+            arrays["media_nms"].tolist(),
+            arrays["spend_grid"],
+            arrays["quantiles"],
+            arrays["responses"],
+            arrays["draw_responses"] if "draw_responses" in arrays.files else None
+        )
+
+    return response_surface
@@ -0,0 +1,143 @@
+from typing import Dict
+import numpy as np
+from numpy import ndarray
+from scipy.special import ndtri
+from scipy.stats import rankdata
+
+TAIL_QUANTILES = [0.05, 0.95]
+
+
+def compute_diagnostics(chain_draws: Dict[str, ndarray]) -> Dict:
+
+    # chain_draws maps each param to its draws of shape (nb_chains, nb_draws) + param shape,
+    # the diagnostics of each param have the param shape, as nested lists
+    param_nm_to_diagnostics = {}
+
+    for param_nm, draws in chain_draws.items():
+        param_nm_to_diagnostics[param_nm] = {
+            "rhat": compute_rhat(draws).tolist(),
+            "ess_bulk": compute_ess_bulk(draws).tolist(),
+            "ess_tail": compute_ess_tail(draws).tolist()
+        }
+
+    # constant draws have no diagnostics (nan), they do not count in the summary
+    return {
+        "max_rhat": float(np.nanmax(np.hstack([
+            np.ravel(diagnostics["rhat"]) for diagnostics in param_nm_to_diagnostics.values()
+        ]))),
+        "min_ess_bulk": float(np.nanmin(np.hstack([
+            np.ravel(diagnostics["ess_bulk"]) for diagnostics in param_nm_to_diagnostics.values()
+        ]))),
+        "min_ess_tail": float(np.nanmin(np.hstack([
+            np.ravel(diagnostics["ess_tail"]) for diagnostics in param_nm_to_diagnostics.values()
+        ]))),
+        "params": param_nm_to_diagnostics
+    }
+
+
+def compute_rhat(draws: ndarray) -> ndarray:
+
+    # rank normalized split R-hat of Vehtari et al. (2021), the max of the one
+    # of the draws (location) and the one of their distance to the median (scale)
+    split_draws = split_chains(draws)
+    folded_draws = np.abs(split_draws - np.median(split_draws, axis=(0, 1)))
+
+    return np.maximum(
+        compute_split_rhat(rank_normalize(split_draws)),
+        compute_split_rhat(rank_normalize(folded_draws))
+    )
+
+
+def compute_ess_bulk(draws: ndarray) -> ndarray:
+
+    return compute_split_ess(rank_normalize(split_chains(draws)))
+
+
+def compute_ess_tail(draws: ndarray) -> ndarray:
+
+    # min of the ess of the indicators of the draws below the tail quantiles
+    split_draws = split_chains(draws)
+    quantiles = np.quantile(split_draws, TAIL_QUANTILES, axis=(0, 1))
+
+    return np.minimum(*[
+        compute_split_ess((split_draws <= quantile).astype(float)) for quantile in quantiles
+    ])
+
+
+def split_chains(draws: ndarray) -> ndarray:
+
+    # each chain cut in two halves, the middle draw is dropped when nb_draws is odd
+    nb_chains, nb_draws = draws.shape[:2]
+    half_nb_draws = nb_draws // 2
+
+    if half_nb_draws < 2:
+        raise ValueError("diagnostics require at least 4 draws per chain")
+
+    return np.concatenate(
+        [draws[:, :half_nb_draws], draws[:, nb_draws - half_nb_draws:]], axis=0
+    )
+
+
+def rank_normalize(draws: ndarray) -> ndarray:
+
+    # normal scores of the ranks of the draws of all the chains pooled together
+    nb_chains, nb_draws = draws.shape[:2]
+    nb_values = nb_chains * nb_draws
+
+    ranks = rankdata(draws.reshape((nb_values,) + draws.shape[2:]), axis=0)
+
+    return ndtri((ranks - 3 / 8) / (nb_values + 1 / 4)).reshape(draws.shape)
+
+
+def compute_split_rhat(split_draws: ndarray) -> ndarray:
+
+    nb_draws = split_draws.shape[1]
+
+    chain_means = split_draws.mean(axis=1)
+    within_chain_var = split_draws.var(axis=1, ddof=1).mean(axis=0)
+    between_chain_var = nb_draws * chain_means.var(axis=0, ddof=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rhat = np.sqrt(
+            ((nb_draws - 1) / nb_draws * within_chain_var + between_chain_var / nb_draws)
+            / within_chain_var
+        )
+
+    # constant draws, e.g. an indicator of a tail quantile out of the draws
+    return np.where(within_chain_var > 0, rhat, np.nan)
+
+
+def compute_split_ess(split_draws: ndarray) -> ndarray:
+
+    # effective sample size of Geyer's initial monotone sequence estimator,
+    # the autocovariances of every chain and cell are computed at once by fft
+    nb_chains, nb_draws = split_draws.shape[:2]
+
+    centered_draws = split_draws - split_draws.mean(axis=1, keepdims=True)
+    fft_size = 2 ** int(np.ceil(np.log2(2 * nb_draws)))
+    spectrum = np.fft.rfft(centered_draws, n=fft_size, axis=1)
+    autocovariances = np.fft.irfft(spectrum * np.conj(spectrum), n=fft_size, axis=1)[:, :nb_draws]
+    autocovariances /= nb_draws
+
+    chain_vars = autocovariances[:, 0] * nb_draws / (nb_draws - 1)
+    within_chain_var = chain_vars.mean(axis=0)
+    var_plus = within_chain_var * (nb_draws - 1) / nb_draws + split_draws.mean(axis=1).var(axis=0, ddof=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        autocorrelations = 1 - (within_chain_var - autocovariances.mean(axis=0)) / var_plus
+    autocorrelations[0] = 1
+
+    # sums of consecutive pairs of autocorrelations, kept while positive and made non increasing
+    nb_pairs = nb_draws // 2
+    pair_sums = autocorrelations[:2 * nb_pairs:2] + autocorrelations[1:2 * nb_pairs:2]
+    is_kept = np.cumprod(pair_sums > 0, axis=0).astype(bool)
+    pair_sums = np.minimum.accumulate(np.where(is_kept, pair_sums, np.inf), axis=0)
+
+    integrated_time = -1 + 2 * np.where(is_kept, pair_sums, 0).sum(axis=0)
+
+    # antithetic chains can give an ess above the nb of draws, it is bounded as in stan
+    nb_values = nb_chains * nb_draws
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ess = nb_values / np.maximum(integrated_time, 1 / np.log10(nb_values))
+
+    return np.where(var_plus > 0, ess, np.nan)
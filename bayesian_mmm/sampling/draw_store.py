@@ -0,0 +1,80 @@
+from collections.abc import Mapping
+from os import listdir, makedirs, path, remove
+from typing import Dict, Iterator, Tuple, Union
+import numpy as np
+from numpy import ndarray
+
+DRAW_STORE_DIR_TEMPLATE = "./results/draws/%s"
+
+
+class DrawStore(Mapping):
+
+    def __init__(self, dir_path: str, with_chain_axis: bool = False) -> None:
+
+        # param_nm -> draws, each param is memory-mapped on its first access only
+        if not path.isdir(dir_path):
+            raise ValueError("no draws stored in %s" % dir_path)
+
+        self.__dir_path = dir_path
+        self.__with_chain_axis = with_chain_axis
+        self.__param_nms = sorted(
+            file_nm[:-len(".npy")] for file_nm in listdir(dir_path) if file_nm.endswith(".npy")
+        )
+        self.__param_nm_to_draws = {}
+
+    def __getitem__(self, param_nm: str) -> ndarray:
+
+        if param_nm not in self.__param_nm_to_draws:
+
+            if param_nm not in self.__param_nms:
+                raise KeyError(param_nm)
+
+            # (nb_chains, nb_draws) + param shape, read from disk as it is used
+            draws = np.load(path.join(self.__dir_path, param_nm + ".npy"), mmap_mode="r")
+
+            # without the chain axis the chains follow each other, as a view of the file
+            if not self.__with_chain_axis:
+                draws = draws.reshape((-1,) + draws.shape[2:])
+
+            self.__param_nm_to_draws[param_nm] = draws
+
+        return self.__param_nm_to_draws[param_nm]
+
+    def __iter__(self) -> Iterator[str]:
+
+        return iter(self.__param_nms)
+
+    def __len__(self) -> int:
+
+        return len(self.__param_nms)
+
+    def __reduce__(self) -> Tuple:
+
+        # pickled as a reference to its dir, e.g. within a posterior inference
+        # machine, the draws are memory-mapped again once unpickled
+        return (DrawStore, (self.__dir_path, self.__with_chain_axis))
+
+
+def save_draws(
+    chain_draws: Dict[str, ndarray], name: str, dtype: Union[str, None] = None
+    ) -> None:
+
+    # one .npy file per param, of shape (nb_chains, nb_draws) + param shape, uncompressed
+    # so that it can be memory-mapped, dtype e.g. "float32" halves the size on disk
+    dir_path = DRAW_STORE_DIR_TEMPLATE % name
+    makedirs(dir_path, exist_ok=True)
+
+    # the params of a previous model of the experiment must not be mixed with the new ones
+    for file_nm in listdir(dir_path):
+        if file_nm.endswith(".npy"):
+            remove(path.join(dir_path, file_nm))
+
+    for param_nm, draws in chain_draws.items():
+        if dtype is not None:
+            draws = draws.astype(dtype, copy=False)
+        np.save(path.join(dir_path, param_nm + ".npy"), draws)
+
+
+def load_draws(name: str, with_chain_axis: bool = False) -> DrawStore:
+
+    return DrawStore(DRAW_STORE_DIR_TEMPLATE % name, with_chain_axis)
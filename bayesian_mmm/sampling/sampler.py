@@ -1,18 +1,36 @@
-from typing import Dict, Union
-from numpy import array, ndarray
+from json import dump
+from timeit import default_timer
+from typing import Dict, List, Union
+from numpy import array, concatenate, moveaxis, ndarray
+from numpy.random import default_rng
 
+from bayesian_mmm.sampling.convergence_diagnostics import compute_diagnostics
 from bayesian_mmm.sampling.stan_model_wrapper import StanModelWrapper
 from bayesian_mmm.utilities.utilities import (
     check_ndarray_is_matrix, check_ndarray_is_vector
 )
 from bayesian_mmm.spend_transformation.spend_transformation import add_lagged_values_along_z
 
+RELEVANT_PARAM_NMS_UNIVERSE = [
+    "retain_rate", "delay",
+    "ec", "slope", "half_saturation",
+    "beta_medias", "gamma_ctrl", "tau"
+]
+
 class Sampler:
 
-    def __init__(self, stan_model: StanModelWrapper, max_lag: int) -> None:
+    def __init__(
+        self,
+        stan_model: StanModelWrapper,
+        max_lag: int,
+        with_lagged_spends: bool = True,
+        permutation_seed: int = 2021
+        ) -> None:
         
         self.__stan_model = stan_model
         self.__max_lag = max_lag
+        self.__with_lagged_spends = with_lagged_spends
+        self.__permutation_seed = permutation_seed
 
     def create_stan_input(
         self,
@@ -24,15 +42,31 @@ class Sampler:
         check_ndarray_is_matrix(spends, "lagged_spends")
         check_ndarray_is_vector(revenue, "revenue")
 
-        lagged_spends = add_lagged_values_along_z(spends, self.__max_lag)
+        if self.__with_lagged_spends:
 
-        self.__args = {
-            "N":lagged_spends.shape[0],
-            "Y":revenue,
-            "max_lag":lagged_spends.shape[2],
-            "num_media":lagged_spends.shape[1],
-            "X_media":lagged_spends
-        }
+            lagged_spends = add_lagged_values_along_z(spends, self.__max_lag)
+
+            self.__args = {
+                "N":lagged_spends.shape[0],
+                "Y":revenue,
+                "max_lag":lagged_spends.shape[2],
+                "num_media":lagged_spends.shape[1],
+                "X_media":lagged_spends
+            }
+
+        else:
+
+            # carryover is computed by the stan model from the raw spends
+            if self.__max_lag > len(spends):
+                raise ValueError("max_lag value superior to nb of obs in spends")
+
+            self.__args = {
+                "N":spends.shape[0],
+                "Y":revenue,
+                "max_lag":self.__max_lag,
+                "num_media":spends.shape[1],
+                "X_media":spends
+            }
 
         if type(ctrl_vars) == ndarray:
 
@@ -44,25 +78,151 @@ class Sampler:
 
     def run_sampling(self, n_iter: int, chains: int) -> Dict:
 
+        start = default_timer()
+
+        # (nb_draws, nb_chains) + param shape
         sampling_results = self.__stan_model.sample(
             self.__args,
             n_iter,
-            chains
+            chains,
+            self.__get_relevant_param_nms(),
+            permuted=False
         )
 
-        RELEVANT_PARAM_NMS_UNIVERSE = [
-            "retain_rate", "delay",
-            "ec", "slope", "half_saturation",
-            "beta_medias", "gamma_ctrl", "tau"
-        ]
+        self.__chain_draws = {
+            param_nm: moveaxis(sampled_values, 1, 0)
+            for param_nm, sampled_values in sampling_results.items()
+            if param_nm in RELEVANT_PARAM_NMS_UNIVERSE
+        }
 
-        sampling_relevant_results = {}
+        # a random subset of n_iter draws across all the chains
+        sampling_relevant_results = {
+            param_nm: permuted_values[-n_iter:]
+            for param_nm, permuted_values in self.__get_permuted_draws().items()
+        }
 
-        for param_nm, sampled_values in sampling_results.items():
-            if param_nm in RELEVANT_PARAM_NMS_UNIVERSE:
-                sampling_relevant_results[param_nm] = sampled_values[-n_iter:]
+        self.__sampling_info = {"nb_rounds": 1, "duration_s": default_timer() - start}
+        self.__diagnostics = None
         
         return sampling_relevant_results
 
+    def run_adaptive_sampling(
+        self,
+        n_iter_per_round: int,
+        chains: int,
+        max_rhat: float = 1.01,
+        min_ess_bulk: float = 400,
+        min_ess_tail: float = 400,
+        max_duration_s: float = 3600,
+        max_nb_rounds: int = 10
+        ) -> Dict:
+
+        # sampling in rounds of n_iter_per_round draws per chain, the chains go on from
+        # one round to the next until the diagnostics of all their draws reach the
+        # thresholds, or a next round as long as the mean round would end after max_duration_s
+        if n_iter_per_round < 4:
+            raise ValueError("n_iter_per_round value must be greater or equal 4")
+        if max_nb_rounds < 1:
+            raise ValueError("max_nb_rounds value must be greater or equal 1")
+
+        start = default_timer()
+        relevant_param_nms = self.__get_relevant_param_nms()
+
+        # the first round starts with as many warmup iterations as draws
+        sampling_results = self.__stan_model.sample(
+            self.__args, 2 * n_iter_per_round, chains, relevant_param_nms, permuted=False
+        )
+        param_nm_to_rounds = {param_nm: [] for param_nm in relevant_param_nms}
+        nb_rounds = 0
+
+        while True:
+
+            for param_nm in relevant_param_nms:
+                param_nm_to_rounds[param_nm].append(sampling_results[param_nm])
+            nb_rounds += 1
+
+            # (nb_draws, nb_chains) + param shape
+            sampled_values = {
+                param_nm: concatenate(rounds) for param_nm, rounds in param_nm_to_rounds.items()
+            }
+            self.__chain_draws = {
+                param_nm: moveaxis(values, 1, 0) for param_nm, values in sampled_values.items()
+            }
+            diagnostics = compute_diagnostics(self.__chain_draws)
+
+            is_converged = (
+                (diagnostics["max_rhat"] <= max_rhat)
+                and (diagnostics["min_ess_bulk"] >= min_ess_bulk)
+                and (diagnostics["min_ess_tail"] >= min_ess_tail)
+            )
+            duration_s = default_timer() - start
+
+            if is_converged or (nb_rounds == max_nb_rounds) or (
+                duration_s * (nb_rounds + 1) / nb_rounds > max_duration_s
+                ):
+                break
+
+            sampling_results = self.__stan_model.continue_sampling(
+                self.__args, n_iter_per_round, relevant_param_nms, permuted=False
+            )
+
+        self.__sampling_info = {
+            "nb_rounds": nb_rounds, "duration_s": duration_s, "is_converged": is_converged
+        }
+        self.__diagnostics = diagnostics
 
-        
+        return self.__get_permuted_draws()
+
+    def get_chain_draws(self) -> Dict:
+
+        # all the draws of the last sampling, of shape (nb_chains, nb_draws) + param shape
+        try:
+            return self.__chain_draws
+        except AttributeError:
+            raise ValueError("sampling is not run yet")
+
+    def get_diagnostics(self) -> Dict:
+
+        # split R-hat, bulk and tail ess of each param of the last sampling, with their
+        # max and mins over all the params, the nb of rounds and the sampling duration
+        chain_draws = self.get_chain_draws()
+
+        if self.__diagnostics is None:
+            self.__diagnostics = compute_diagnostics(chain_draws)
+
+        diagnostics = dict(self.__sampling_info)
+        diagnostics["nb_draws_per_chain"] = next(iter(chain_draws.values())).shape[1]
+        diagnostics.update(self.__diagnostics)
+
+        return diagnostics
+
+    def write_diagnostics(self, name: str) -> None:
+
+        with open("./results/diagnostics_%s.json" % name, "w") as f:
+            dump(self.get_diagnostics(), f)
+
+    def __get_permuted_draws(self) -> Dict:
+
+        # the draws of all the chains in one random order shared by the params, as stan
+        # permuted extraction, consumers such as the running quantiles are order sensitive
+        permutation = None
+        param_nm_to_permuted_draws = {}
+
+        for param_nm, chain_draws in self.__chain_draws.items():
+
+            draws = chain_draws.reshape((-1,) + chain_draws.shape[2:])
+            if permutation is None:
+                permutation = default_rng(self.__permutation_seed).permutation(len(draws))
+
+            param_nm_to_permuted_draws[param_nm] = draws[permutation]
+
+        return param_nm_to_permuted_draws
+
+    def __get_relevant_param_nms(self) -> List[str]:
+
+        # only the relevant params of the model are requested to stan
+        param_nms = self.__stan_model.get_param_nms()
+
+        return [
+            param_nm for param_nm in RELEVANT_PARAM_NMS_UNIVERSE if param_nm in param_nms
+        ]
@@ -0,0 +1,128 @@
+from hashlib import sha256
+from os import fdopen, listdir, makedirs, path, remove, replace, utime
+from pickle import dump, load, HIGHEST_PROTOCOL
+from tempfile import mkstemp
+from typing import Any, List, Tuple, Union
+
+
+ENTRY_EXTENSION = ".pkl"
+
+
+class StanModelCache:
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_size_mb: Union[float, None] = None,
+        max_nb_models: Union[int, None] = None
+        ) -> None:
+
+        if (max_size_mb is not None) and (max_size_mb <= 0):
+            raise ValueError("max_size_mb value must be greater than 0")
+
+        if (max_nb_models is not None) and (max_nb_models < 1):
+            raise ValueError("max_nb_models value must be greater or equal 1")
+
+        self.__cache_dir = cache_dir
+        self.__max_size = None if max_size_mb is None else max_size_mb * 1024 ** 2
+        self.__max_nb_models = max_nb_models
+
+        makedirs(self.__cache_dir, exist_ok=True)
+
+    def get_key(self, code: str, toolchain_version: str) -> str:
+
+        return sha256((toolchain_version + "\n" + code).encode("utf-8")).hexdigest()
+
+    def load(self, key: str) -> Union[Any, None]:
+
+        entry_path = self.__get_entry_path(key)
+
+        try:
+            with open(entry_path, "rb") as f:
+                model = load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # truncated entry or pickled under another pystan or cython build
+            # (AttributeError, ImportError, TypeError...), recompiled as a miss
+            try:
+                remove(entry_path)
+            except FileNotFoundError:
+                pass
+            return None
+
+        # entries mtime is used as last access time for lru eviction
+        utime(entry_path)
+
+        return model
+
+    def save(self, key: str, model: Any) -> None:
+
+        # written to a temporary file first then renamed so that
+        # concurrent runs never read a partially written entry
+        fd, tmp_path = mkstemp(dir=self.__cache_dir, suffix=".tmp")
+
+        try:
+            with fdopen(fd, "wb") as f:
+                dump(model, f, protocol=HIGHEST_PROTOCOL)
+            replace(tmp_path, self.__get_entry_path(key))
+        except BaseException:
+            if path.exists(tmp_path):
+                remove(tmp_path)
+            raise
+
+        self.__evict()
+
+    def __get_entry_path(self, key: str) -> str:
+
+        return path.join(self.__cache_dir, key + ENTRY_EXTENSION)
+
+    def __get_entries(self) -> List[Tuple[float, int, str]]:
+
+        entries = []
+
+        for file_nm in listdir(self.__cache_dir):
+
+            if not file_nm.endswith(ENTRY_EXTENSION):
+                continue
+
+            entry_path = path.join(self.__cache_dir, file_nm)
+
+            try:
+                entries.append(
+                    (path.getmtime(entry_path), path.getsize(entry_path), entry_path)
+                )
+            except FileNotFoundError:
+                # evicted by a concurrent run
+                continue
+
+        entries.sort()
+
+        return entries
+
+    def __evict(self) -> None:
+
+        entries = self.__get_entries()
+        total_size = sum([size for _, size, _ in entries])
+
+        # the most recently used entry is always kept
+        while len(entries) > 1 and (
+            self.__is_over_size_limit(total_size) or self.__is_over_nb_limit(len(entries))
+            ):
+
+            _, size, entry_path = entries.pop(0)
+
+            try:
+                remove(entry_path)
+            except FileNotFoundError:
+                pass
+
+            total_size -= size
+
+    def __is_over_size_limit(self, total_size: int) -> bool:
+
+        return (self.__max_size is not None) and (total_size > self.__max_size)
+
+    def __is_over_nb_limit(self, nb_models: int) -> bool:
+
+        return (self.__max_nb_models is not None) and (nb_models > self.__max_nb_models)
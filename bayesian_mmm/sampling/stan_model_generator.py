@@ -1,5 +1,6 @@
-from typing import Dict, List
+from typing import Dict, List, Union
 
+from bayesian_mmm.sampling.stan_model_cache import StanModelCache
 from bayesian_mmm.sampling.stan_model_wrapper import StanModelWrapper
 
 class StanModelGenerator:
@@ -8,15 +9,20 @@ class StanModelGenerator:
         self,
         carryover_transfo_nm: str,
         diminushing_returns_transfo_nm: str,
-        with_ctrl_vars: bool
+        with_ctrl_vars: bool,
+        vectorized: bool = False,
+        with_lagged_spends: bool = True
         ) -> None:
 
         self.__catch_input_error_carryover_transfo_nm(carryover_transfo_nm)
         self.__catch_input_error_diminushing_returns_transfo_nm(diminushing_returns_transfo_nm)
+        self.__catch_input_error_with_lagged_spends(with_lagged_spends, vectorized)
 
         self.__carryover_transfo_nm = carryover_transfo_nm
         self.__diminushing_returns_transfo_nm = diminushing_returns_transfo_nm
         self.__with_ctrl_vars = with_ctrl_vars
+        self.__vectorized = vectorized
+        self.__with_lagged_spends = with_lagged_spends
 
     def __catch_input_error_carryover_transfo_nm(self, carryover_transfo_nm: str) -> None:
 
@@ -30,14 +36,20 @@ class StanModelGenerator:
             if diminushing_returns_transfo_nm not in ["hill", "reach"]:
                 raise ValueError("diminushing_returns_transfo_nm must be 'hill' or 'reach'")
 
-    def create_model(self) -> None:
+    def __catch_input_error_with_lagged_spends(
+        self, with_lagged_spends: bool, vectorized: bool
+        ) -> None:
+
+        if (not with_lagged_spends) and (not vectorized):
+            raise ValueError("with_lagged_spends=False requires vectorized=True")
+
+    def create_model(self, cache: Union[StanModelCache, None] = None) -> None:
 
         self.__create_functions_code()
         self.__create_data_code()
         self.__create_parameters_code()
-        self.__create_transformed_parameters_code()
         self.__create_model_code()
-        self.__compile_code()
+        self.__compile_code(cache)
 
     def get_model(self) -> StanModelWrapper:
 
@@ -78,6 +90,9 @@ class StanModelGenerator:
 
     def __get_carryover_code(self) -> str:
 
+        if self.__vectorized:
+            return self.__get_carryover_weights_code()
+
         if self.__carryover_transfo_nm == "geo_decay":
             code = (
                 "real Geo_decay(row_vector t, int max_lag, real retain_rate) {\n"
@@ -101,19 +116,62 @@ class StanModelGenerator:
 
         return code
 
+    def __get_carryover_weights_code(self) -> str:
+
+        if self.__carryover_transfo_nm == "geo_decay":
+            code = (
+                "row_vector Geo_decay_weights(int max_lag, real retain_rate) {\n"
+                "   row_vector[max_lag] weights;\n"
+                "   for (lag in 1 : max_lag) {\n"
+                "       weights[lag] <- pow(retain_rate, lag - 1);\n"
+                "   }\n"
+                "   return weights / sum(weights);\n"
+                "}"
+            )
+        elif self.__carryover_transfo_nm == "adstock":
+            code = (
+                "row_vector Adstock_weights(int max_lag, real retain_rate, real delay) {\n"
+                "   row_vector[max_lag] weights;\n"
+                "   for (lag in 1 : max_lag) {\n"
+                "       weights[lag] <- pow(retain_rate, (lag - 1 - delay) ^ 2);\n"
+                "   }\n"
+                "   return weights / sum(weights);\n"
+                "}"
+            )
+
+        return code
+
     def __create_data_code(self) -> None:
 
-        self.__data_code = (
-            "data {\n"
-            "   int<lower=1> N;\n"
-            "   real<lower=0> Y[N];\n"
-            "   int<lower=1> max_lag;\n"
-            "   int<lower=1> num_media;\n"
-            "   row_vector[max_lag] X_media[N, num_media];\n"
-            "%s}"
-        )
+        if self.__with_lagged_spends:
+            self.__data_code = (
+                "data {\n"
+                "   int<lower=1> N;\n"
+                "   real<lower=0> Y[N];\n"
+                "   int<lower=1> max_lag;\n"
+                "   int<lower=1> num_media;\n"
+                "   row_vector[max_lag] X_media[N, num_media];\n"
+                "%s}"
+            )
+        else:
+            self.__data_code = (
+                "data {\n"
+                "   int<lower=1> N;\n"
+                "   real<lower=0> Y[N];\n"
+                "   int<lower=1, upper=N> max_lag;\n"
+                "   int<lower=1> num_media;\n"
+                "   matrix[N, num_media] X_media;\n"
+                "%s}"
+            )
 
-        if self.__with_ctrl_vars:
+        if self.__with_ctrl_vars and self.__vectorized:
+
+            self.__data_code = self.__data_code % (
+                "   int<lower=1> num_ctrl;\n"
+                "   matrix[N, num_ctrl] X_ctrl;\n"
+            )
+
+        elif self.__with_ctrl_vars:
 
             self.__data_code = self.__data_code % (
                 "   int<lower=1> num_ctrl;\n"
@@ -181,10 +239,17 @@ class StanModelGenerator:
         return code
 
 
-    def __create_transformed_parameters_code(self) -> None:
+    def __get_mean_response_code(self) -> str:
+
+        # the mean response and its intermediates are local variables of the model
+        # block, as transformed parameters stan would save them for each draw
+        if not self.__with_lagged_spends:
+            return self.__get_convolution_mean_response_code()
+
+        if self.__vectorized:
+            return self.__get_vectorized_mean_response_code()
 
-        self.__transformed_parameters_code = (
-            "transformed parameters {\n"
+        code = (
             "   real mu[N];\n"
             "   real cum_effect;\n"
             "   row_vector[num_media] cum_effects_hill[N];\n"
@@ -197,7 +262,6 @@ class StanModelGenerator:
             "    dot_product(cum_effects_hill[nn], beta_medias)\n"
             "    %s;\n"
             "   }\n"
-            "}"
         )
 
         carryover_call = self.__get_carryover_call()
@@ -208,12 +272,88 @@ class StanModelGenerator:
         else:
             ctrl_contribution = ""
 
-        self.__transformed_parameters_code = self.__transformed_parameters_code % (
+        return code % (
             carryover_call, 
             diminushing_returns_call,
             ctrl_contribution
         )
 
+    def __get_vectorized_mean_response_code(self) -> str:
+
+        # lag weights only depend on the media parameters,
+        # they are computed once per media instead of once per obs and media
+        code = (
+            "   vector[N] mu;\n"
+            "   matrix[N, num_media] cum_effects_hill;\n"
+            "   for (media in 1 : num_media) {\n"
+            "       row_vector[max_lag] lag_weights = %s\n"
+            "       for (nn in 1 : N) {\n"
+            "           cum_effects_hill[nn, media] <- %s\n"
+            "       }\n"
+            "   }\n"
+            "   mu <- tau + cum_effects_hill * beta_medias%s;\n"
+        )
+
+        carryover_weights_call = self.__get_carryover_weights_call()
+        diminushing_returns_call = self.__get_diminushing_returns_call(
+            "dot_product(X_media[nn, media], lag_weights)"
+        )
+
+        if self.__with_ctrl_vars:
+            ctrl_contribution = " + X_ctrl * gamma_ctrl"
+        else:
+            ctrl_contribution = ""
+
+        return code % (
+            carryover_weights_call,
+            diminushing_returns_call,
+            ctrl_contribution
+        )
+
+    def __get_convolution_mean_response_code(self) -> str:
+
+        # carryover is the convolution of the raw spends with the lag weights,
+        # computed one lag (ie one band of the toeplitz matrix) at a time
+        code = (
+            "   vector[N] mu;\n"
+            "   matrix[N, num_media] cum_effects_hill;\n"
+            "   for (media in 1 : num_media) {\n"
+            "       row_vector[max_lag] lag_weights = %s\n"
+            "       vector[N] cum_effects = lag_weights[1] * col(X_media, media);\n"
+            "       for (lag in 2 : max_lag) {\n"
+            "           cum_effects[lag:N] <- cum_effects[lag:N]\n"
+            "           + lag_weights[lag] * X_media[1:(N - lag + 1), media];\n"
+            "       }\n"
+            "       for (nn in 1 : N) {\n"
+            "           cum_effects_hill[nn, media] <- %s\n"
+            "       }\n"
+            "   }\n"
+            "   mu <- tau + cum_effects_hill * beta_medias%s;\n"
+        )
+
+        carryover_weights_call = self.__get_carryover_weights_call()
+        diminushing_returns_call = self.__get_diminushing_returns_call("cum_effects[nn]")
+
+        if self.__with_ctrl_vars:
+            ctrl_contribution = " + X_ctrl * gamma_ctrl"
+        else:
+            ctrl_contribution = ""
+
+        return code % (
+            carryover_weights_call,
+            diminushing_returns_call,
+            ctrl_contribution
+        )
+
+    def __get_carryover_weights_call(self) -> str:
+
+        if self.__carryover_transfo_nm == "adstock":
+            call = "Adstock_weights(max_lag, retain_rate[media], delay[media]);"
+        elif self.__carryover_transfo_nm == "geo_decay":
+            call = "Geo_decay_weights(max_lag, retain_rate[media]);"
+
+        return call
+
     def __get_carryover_call(self) -> str:
 
         if self.__carryover_transfo_nm == "adstock":
@@ -223,38 +363,49 @@ class StanModelGenerator:
 
         return call
 
-    def __get_diminushing_returns_call(self) -> str:
+    def __get_diminushing_returns_call(self, cum_effect: str = "cum_effect") -> str:
 
         if self.__diminushing_returns_transfo_nm == "hill":
-            call = "Hill(cum_effect, ec[media], slope[media]);"
+            call = "Hill(%s, ec[media], slope[media]);" % cum_effect
         elif self.__diminushing_returns_transfo_nm == "reach":
-            call = "Reach(cum_effect, half_saturation[media]);"
+            call = "Reach(%s, half_saturation[media]);" % cum_effect
 
         return call
 
     def __create_model_code(self) -> None:
 
+        if self.__vectorized:
+            beta_medias_prior = "   beta_medias ~ normal(0,1);\n"
+        else:
+            beta_medias_prior = (
+                "   for (media_index in 1 : num_media) {\n"
+                "       beta_medias[media_index] ~ normal(0,1);\n"
+                "   }\n"
+            )
+
         self.__model_code = (
             "model {\n"
             "%s"
             "%s"
+            "%s"
             "   tau ~ normal(0,5);\n"
-            "   for (media_index in 1 : num_media) {\n"
-            "       beta_medias[media_index] ~ normal(0,1);\n"
-            "   }\n"
+            "%s"
             "%s"
             "   noise_var ~ inv_gamma(0.05, 0.05 * 0.01);\n"
             "   Y ~ normal(mu, sqrt(noise_var));\n"
             "}"
         )
 
+        mean_response_code = self.__get_mean_response_code()
         carryover_prior = self.__get_carryover_prior()
         diminushing_returns_prior = self.__get_diminushing_returns_prior()
         ctrl_coef_prior = self.__get_ctrl_coef_prior()
 
         self.__model_code = self.__model_code % (
+            mean_response_code,
             carryover_prior,
             diminushing_returns_prior,
+            beta_medias_prior,
             ctrl_coef_prior
         )
 
@@ -288,7 +439,9 @@ class StanModelGenerator:
 
     def __get_ctrl_coef_prior(self) -> str:
 
-        if self.__with_ctrl_vars:
+        if self.__with_ctrl_vars and self.__vectorized:
+            prior = "   gamma_ctrl ~ normal(0,1);\n"
+        elif self.__with_ctrl_vars:
             prior = (
                 "   for (ctrl_index in 1 : num_ctrl){\n"
                 "       gamma_ctrl[ctrl_index] ~ normal(0,1);\n"
@@ -299,15 +452,35 @@ class StanModelGenerator:
 
         return prior
 
-    def __compile_code(self) -> None:
+    def __compile_code(self, cache: Union[StanModelCache, None]) -> None:
         
         code = (
             self.__function_code + '\n'
             + self.__data_code + '\n'
             + self.__parameters_code + '\n'
-            + self.__transformed_parameters_code + '\n'
             + self.__model_code
         )
 
         self.__model = StanModelWrapper(code=code)
-        self.__model.compile()
+        self.__model.compile(cache)
+
+
+def create_stan_model(
+    carryover_transfo_nm: str,
+    diminushing_returns_transfo_nm: str,
+    with_ctrl_vars: bool,
+    vectorized: bool = False,
+    with_lagged_spends: bool = True,
+    cache: Union[StanModelCache, None] = None
+    ) -> StanModelWrapper:
+
+    stan_model_generator = StanModelGenerator(
+        carryover_transfo_nm,
+        diminushing_returns_transfo_nm,
+        with_ctrl_vars,
+        vectorized,
+        with_lagged_spends
+    )
+    stan_model_generator.create_model(cache)
+
+    return stan_model_generator.get_model()
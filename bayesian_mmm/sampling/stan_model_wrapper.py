@@ -1,6 +1,12 @@
-from typing import Dict, OrderedDict
+from platform import machine
+from re import DOTALL, search, sub
+from sys import version
+from typing import Dict, List, OrderedDict, Union
+import numpy as np
 import pystan
 
+from bayesian_mmm.sampling.stan_model_cache import StanModelCache
+
 
 DEFAULT_CODE = """
 functions {
@@ -30,7 +36,7 @@ parameters {
     vector<lower=0,upper=1>[num_media] ec;
     vector<lower=0>[num_media] slope;
 }
-transformed parameters {
+model {
     // a vector of the mean response
     real mu[N];
     real cum_effect;
@@ -48,8 +54,6 @@ transformed parameters {
         dot_product(cum_effects_hill[nn], beta_medias) +
         dot_product(X_ctrl[nn], gamma_ctrl);
     }
-}
-model {
     retain_rate ~ beta(3,3);
     delay ~ uniform(0, max_lag - 1);
     slope ~ gamma(3, 1);
@@ -72,14 +76,88 @@ class StanModelWrapper:
         
         self.__code = code
 
-    def compile(self) -> None:
+    def compile(self, cache: Union[StanModelCache, None] = None) -> None:
+
+        if cache is None:
+            self.__model = pystan.StanModel(model_code=self.__code, verbose=False)
+            return
+
+        key = cache.get_key(self.__code, get_toolchain_version())
+        self.__model = cache.load(key)
+
+        if self.__model is None:
+            self.__model = pystan.StanModel(model_code=self.__code, verbose=False)
+            cache.save(key, self.__model)
+
+    def get_param_nms(self) -> List[str]:
 
-        self.__model = pystan.StanModel(model_code=self.__code, verbose=False)
+        # names declared in the parameters block, the only ones stan saves
+        parameters_code = search(
+            r"(?<!transformed )parameters\s*{(.*?)}", self.__code, DOTALL
+        ).group(1)
 
-    def sample(self, args: Dict, n_iter: int, chains: Dict) -> OrderedDict:
+        return [
+            sub(r"\[.*?\]", "", declaration).split()[-1]
+            for declaration in parameters_code.split(";")
+            if declaration.strip()
+        ]
+
+    def sample(
+        self,
+        args: Dict,
+        n_iter: int,
+        chains: Dict,
+        pars: Union[List[str], None] = None,
+        permuted: bool = True
+        ) -> OrderedDict:
+
+        # stan only saves the params of the parameters block, all of them as
+        # continue_sampling starts from the last position of each chain, and only
+        # the draws of pars are extracted, not permuted the draws of each param
+        # are (nb_draws, nb_chains) + param shape
+        results = self.__model.sampling(
+            data=args, iter=n_iter, chains=chains, pars=self.get_param_nms()
+        )
+
+        self.__last_positions = results.get_last_position()
+        self.__stepsizes = results.get_stepsize()
+        self.__inv_metrics = results.get_inv_metric()
+
+        return results.extract(pars=pars, permuted=permuted)
+
+    def continue_sampling(
+        self,
+        args: Dict,
+        n_iter: int,
+        pars: Union[List[str], None] = None,
+        permuted: bool = True
+        ) -> OrderedDict:
+
+        # n_iter more draws of each chain of the last sampling, without warmup, the chains
+        # keep their adapted metric, the step size is the mean of the adapted ones
+        try:
+            last_positions = self.__last_positions
+        except AttributeError:
+            raise ValueError("sample must be called before continue_sampling")
+
+        results = self.__model.sampling(
+            data=args,
+            iter=n_iter,
+            warmup=0,
+            chains=len(last_positions),
+            init=last_positions,
+            pars=self.get_param_nms(),
+            control={
+                "adapt_engaged": False,
+                "stepsize": float(np.mean(self.__stepsizes)),
+                "inv_metric": dict(enumerate(self.__inv_metrics))
+            }
+        )
 
-        results = self.__model.sampling(data=args, iter=n_iter, chains=chains)
+        self.__last_positions = results.get_last_position()
 
-        return results.extract()
+        return results.extract(pars=pars, permuted=permuted)
 
+def get_toolchain_version() -> str:
 
+    return "pystan %s | python %s | %s" % (pystan.__version__, version, machine())
@@ -0,0 +1,128 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Tuple, Union
+import numpy as np
+from numpy import ndarray
+
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.spend_transformation.spend_transformation import view_lagged_values_along_z
+from bayesian_mmm.utilities.utilities import check_ndarray_is_matrix, check_ndarray_is_tensor
+
+# work given to each process of run_scenarios, in nb of lagged spends (nb_plans * nb_periods
+# * nb_media * max_lag), about a second in one process, below which starting the process and
+# sending it the plans costs more than it saves
+MIN_NB_LAGGED_SPENDS_PER_PROCESS = 2 * 10 ** 8
+
+
+class ScenarioEngine(InferenceMachine):
+
+    def __init__(self, param_nm_to_val: Dict, max_lag: int) -> None:
+
+        super().__init__(param_nm_to_val, max_lag)
+
+        self.__max_lag = max_lag
+        self.__lag_weights = self._get_lag_weights()
+
+    def predict_scenarios(
+        self,
+        plans: ndarray,
+        ctrl_vars: Union[ndarray, None] = None,
+        prefix_spends: Union[ndarray, None] = None
+        ) -> Tuple[ndarray, ndarray]:
+
+        check_ndarray_is_tensor(plans, "plans")
+
+        nb_plans, nb_periods, nb_media = plans.shape
+
+        if prefix_spends is None:
+            prefix_spends = np.zeros((0, nb_media))
+        check_ndarray_is_matrix(prefix_spends, "prefix_spends")
+
+        # the plans are laid side by side along the media axis so that a
+        # single lagged view and weighted sum covers all of them
+        spends = np.concatenate([
+            np.broadcast_to(prefix_spends, (nb_plans,) + prefix_spends.shape), plans
+            ], axis=1)
+        spends = spends.transpose((1, 0, 2)).reshape((spends.shape[1], nb_plans * nb_media))
+
+        # zero spends before the prefix, as when predicting on the prefix followed by a plan
+        padded_spends = np.concatenate([np.zeros((self.__max_lag - 1, spends.shape[1])), spends])
+        lagged_spends = view_lagged_values_along_z(padded_spends, self.__max_lag)[-nb_periods:]
+
+        carryover_spends = np.einsum(
+            "nml,ml->nm", lagged_spends, np.tile(self.__lag_weights, (nb_plans, 1))
+            )
+        carryover_spends = carryover_spends.reshape((nb_periods, nb_plans, nb_media)).transpose((1, 0, 2))
+
+        transformed_spends = self._get_diminushing_returns(carryover_spends)
+
+        y = self._get_y(transformed_spends, ctrl_vars)
+        contributions = transformed_spends * np.asarray(self._beta_medias)
+
+        return y, contributions
+
+
+
+def run_scenarios(
+    scenario_engine: ScenarioEngine,
+    target_normalizer: Normalizer,
+    plans: ndarray,
+    baseline_plan: Union[ndarray, None] = None,
+    ctrl_vars: Union[ndarray, None] = None,
+    prefix_spends: Union[ndarray, None] = None,
+    chunk_size: int = 256,
+    nb_processes: int = 1,
+    min_nb_lagged_spends_per_process: int = MIN_NB_LAGGED_SPENDS_PER_PROCESS
+    ) -> Dict[str, ndarray]:
+
+    check_ndarray_is_tensor(plans, "plans")
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size value must be greater or equal 1")
+
+    # the first plan is the baseline by default
+    if baseline_plan is None:
+        baseline_plan = plans[0]
+    check_ndarray_is_matrix(baseline_plan, "baseline_plan")
+
+    predict_chunk = partial(
+        scenario_engine.predict_scenarios, ctrl_vars=ctrl_vars, prefix_spends=prefix_spends
+    )
+    chunks = [plans[start:start + chunk_size] for start in range(0, len(plans), chunk_size)]
+
+    # the plans are scored in this process unless there is enough work for several
+    nb_processes = min(
+        nb_processes,
+        len(chunks),
+        plans.size * scenario_engine.get_max_lag() // max(min_nb_lagged_spends_per_process, 1)
+    )
+
+    if nb_processes > 1:
+        with ProcessPoolExecutor(nb_processes) as executor:
+            results = list(executor.map(predict_chunk, chunks))
+    else:
+        results = [predict_chunk(chunk) for chunk in chunks]
+
+    target = denormalize(target_normalizer, np.concatenate([y for y, _ in results]))
+    contributions = denormalize(
+        target_normalizer, np.concatenate([contributions for _, contributions in results])
+    )
+
+    baseline_y, baseline_contributions = predict_chunk(baseline_plan[None, :, :])
+    baseline_target = denormalize(target_normalizer, baseline_y)
+    baseline_contributions = denormalize(target_normalizer, baseline_contributions)
+
+    return {
+        "target": target,
+        "contributions": contributions,
+        "target_delta": target - baseline_target,
+        "contributions_delta": contributions - baseline_contributions
+    }
+
+
+def denormalize(target_normalizer: Normalizer, normalized_values: ndarray) -> ndarray:
+
+    return target_normalizer.reverse_transform(
+        normalized_values.reshape((-1, 1))
+        ).reshape(normalized_values.shape)
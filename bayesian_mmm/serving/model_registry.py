@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from hashlib import sha256
+from os import path, stat
+from pickle import UnpicklingError
+from threading import Lock
+from typing import Dict, List, Tuple, Union
+from numpy import ndarray
+
+from bayesian_mmm.inference_machine.inference_machine import load_inference_machine
+from bayesian_mmm.inference_machine.posterior_inference_machine import (
+    load_posterior_inference_machine
+)
+from bayesian_mmm.normalizer.normalizer import load_normalizer
+
+
+ARTIFACT_PATH_TEMPLATES = [
+    "./results/inference_machine/%s.pkl",
+    "./results/normalizer/scaler_target_%s.pkl",
+    "./results/normalizer/args_target_%s.json"
+]
+POSTERIOR_ARTIFACT_PATH_TEMPLATE = "./results/inference_machine/posterior_%s.pkl"
+
+
+class ModelRegistry:
+
+    def __init__(self, max_nb_models: int = 8, with_content_hash: bool = False) -> None:
+
+        if max_nb_models < 1:
+            raise ValueError("max_nb_models value must be greater or equal 1")
+
+        self.__max_nb_models = max_nb_models
+        self.__with_content_hash = with_content_hash
+
+        # experiment_nm -> entry, from the least to the most recently used
+        self.__entries = OrderedDict()
+        self.__lock = Lock()
+
+    def get_loaded_experiment_nms(self) -> List[str]:
+
+        with self.__lock:
+            return list(self.__entries.keys())
+
+    def get(self, experiment_nm: str) -> Dict:
+
+        with self.__lock:
+            entry = self.__entries.get(experiment_nm)
+            if entry is not None:
+                self.__entries.move_to_end(experiment_nm)
+
+        try:
+            artifact_paths = self.__get_artifact_paths(experiment_nm)
+            mtimes = self.__get_mtimes(artifact_paths)
+
+            if (entry is not None) and (entry["mtimes"] == mtimes):
+                return entry
+
+            content_hash = self.__get_content_hash(artifact_paths)
+
+            if (entry is not None) and (content_hash is not None) and (
+                entry["content_hash"] == content_hash
+                ):
+                # touched but unchanged artifacts are not reloaded
+                entry = dict(entry, mtimes=mtimes)
+            else:
+                entry = self.__load(experiment_nm, artifact_paths, mtimes, content_hash)
+        except (EOFError, UnpicklingError, ValueError, OSError) as error:
+            # artifacts being written or replaced by a training run, the
+            # current version is kept until the next call
+            if entry is None:
+                raise error
+            return entry
+
+        # the new version is swapped in at once, concurrent
+        # calls get either the previous or the new entry
+        with self.__lock:
+            self.__entries[experiment_nm] = entry
+            self.__entries.move_to_end(experiment_nm)
+            while len(self.__entries) > self.__max_nb_models:
+                self.__entries.popitem(last=False)
+
+        return entry
+
+    def predict(
+        self,
+        experiment_nm: str,
+        spends: ndarray,
+        ctrl_vars: Union[ndarray, None],
+        quantiles: Union[List[float], None] = None,
+        draws_chunk_size: Union[int, None] = None
+        ) -> Union[ndarray, Dict[str, ndarray]]:
+
+        entry = self.get(experiment_nm)
+        target_normalizer = entry["target_normalizer"]
+
+        if quantiles is not None:
+            if entry["posterior_inference_machine"] is None:
+                raise ValueError("no posterior inference machine for %s" % experiment_nm)
+            return entry["posterior_inference_machine"].predict_bands(
+                spends, ctrl_vars, quantiles, draws_chunk_size, target_normalizer
+            )
+
+        pred = entry["inference_machine"].predict(spends, ctrl_vars)
+
+        return target_normalizer.reverse_transform(pred.reshape((-1, 1))).reshape((-1,))
+
+    def __get_artifact_paths(self, experiment_nm: str) -> List[str]:
+
+        artifact_paths = [template % experiment_nm for template in ARTIFACT_PATH_TEMPLATES]
+
+        posterior_artifact_path = POSTERIOR_ARTIFACT_PATH_TEMPLATE % experiment_nm
+        if path.exists(posterior_artifact_path):
+            artifact_paths.append(posterior_artifact_path)
+
+        return artifact_paths
+
+    def __get_mtimes(self, artifact_paths: List[str]) -> Tuple:
+
+        return tuple([
+            (artifact_path, stat(artifact_path).st_mtime_ns) for artifact_path in artifact_paths
+        ])
+
+    def __get_content_hash(self, artifact_paths: List[str]) -> Union[str, None]:
+
+        if not self.__with_content_hash:
+            return None
+
+        content_hash = sha256()
+        for artifact_path in artifact_paths:
+            with open(artifact_path, "rb") as f:
+                content_hash.update(f.read())
+
+        return content_hash.hexdigest()
+
+    def __load(
+        self,
+        experiment_nm: str,
+        artifact_paths: List[str],
+        mtimes: Tuple,
+        content_hash: Union[str, None]
+        ) -> Dict:
+
+        with_posterior = POSTERIOR_ARTIFACT_PATH_TEMPLATE % experiment_nm in artifact_paths
+
+        return {
+            "mtimes": mtimes,
+            "content_hash": content_hash,
+            "inference_machine": load_inference_machine(experiment_nm),
+            "target_normalizer": load_normalizer("target_" + experiment_nm),
+            "posterior_inference_machine": load_posterior_inference_machine(experiment_nm)
+                if with_posterior else None
+        }
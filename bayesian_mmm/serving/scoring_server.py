@@ -0,0 +1,382 @@
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps, loads
+from queue import Empty, Queue
+from threading import Lock, Thread
+from timeit import default_timer
+from typing import Dict, List, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from numpy import ndarray
+
+from bayesian_mmm.serving.model_registry import ModelRegistry
+from bayesian_mmm.utilities.utilities import check_ndarray_is_matrix, load_config
+
+# pyarrow is optional, arrow payloads are answered with a 415 without it
+try:
+    from pyarrow import BufferOutputStream, ipc, table as arrow_table
+    PYARROW_IS_AVAILABLE = True
+except ImportError:
+    PYARROW_IS_AVAILABLE = False
+
+JSON_CONTENT_TYPE = "application/json"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_CTRL_COLUMN_PREFIX = "ctrl_"
+REQUEST_TIMEOUT_S = 30
+
+
+class ScoringMetrics:
+
+    def __init__(self, nb_latencies: int = 1000) -> None:
+
+        self.__lock = Lock()
+        self.__start_time = default_timer()
+        self.__nb_requests = 0
+        self.__nb_errors = 0
+        self.__nb_batches = 0
+        self.__nb_batched_requests = 0
+        # latencies of the last nb_latencies requests
+        self.__latencies = deque(maxlen=nb_latencies)
+
+    def record_request(self, latency: float, with_error: bool = False) -> None:
+
+        with self.__lock:
+            self.__nb_requests += 1
+            self.__nb_errors += int(with_error)
+            self.__latencies.append(latency)
+
+    def record_batch(self, batch_size: int) -> None:
+
+        with self.__lock:
+            self.__nb_batches += 1
+            self.__nb_batched_requests += batch_size
+
+    def get(self) -> Dict:
+
+        with self.__lock:
+            uptime = default_timer() - self.__start_time
+            latencies = np.array(self.__latencies)
+            metrics = {
+                "uptime_s": uptime,
+                "nb_requests": self.__nb_requests,
+                "nb_errors": self.__nb_errors,
+                "nb_batches": self.__nb_batches,
+                "mean_batch_size": self.__nb_batched_requests / max(self.__nb_batches, 1),
+                "throughput_rps": self.__nb_requests / uptime
+            }
+
+        if len(latencies) > 0:
+            metrics.update({
+                "latency_mean_ms": float(latencies.mean() * 1e3),
+                "latency_p50_ms": float(np.quantile(latencies, 0.5) * 1e3),
+                "latency_p99_ms": float(np.quantile(latencies, 0.99) * 1e3)
+            })
+
+        return metrics
+
+
+class MicroBatcher:
+
+    def __init__(
+        self,
+        model_registry: ModelRegistry,
+        batch_window_ms: float = 5,
+        max_batch_size: int = 256,
+        metrics: Union[ScoringMetrics, None] = None
+        ) -> None:
+
+        if batch_window_ms < 0:
+            raise ValueError("batch_window_ms value must be greater or equal 0")
+
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size value must be greater or equal 1")
+
+        self.__model_registry = model_registry
+        self.__batch_window = batch_window_ms / 1e3
+        self.__max_batch_size = max_batch_size
+        self.__metrics = metrics
+
+        self.__queue = Queue()
+        self.__thread = None
+
+    def start(self) -> None:
+
+        self.__thread = Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+
+        self.__queue.put(None)
+        self.__thread.join()
+
+    def submit(
+        self, experiment_nm: str, spends: ndarray, ctrl_vars: Union[ndarray, None]
+        ) -> Future:
+
+        check_ndarray_is_matrix(spends, "spends")
+        if ctrl_vars is not None:
+            check_ndarray_is_matrix(ctrl_vars, "ctrl_vars")
+            if len(ctrl_vars) != len(spends):
+                raise ValueError("ctrl_vars and spends must have the same nb of obs")
+
+        future = Future()
+        self.__queue.put((experiment_nm, spends, ctrl_vars, future))
+
+        return future
+
+    def __run(self) -> None:
+
+        while True:
+
+            request = self.__queue.get()
+            if request is None:
+                return
+
+            batch = [request]
+            deadline = default_timer() + self.__batch_window
+
+            # requests arriving within the batch window are scored together
+            while len(batch) < self.__max_batch_size:
+                try:
+                    request = self.__queue.get(timeout=max(deadline - default_timer(), 0))
+                except Empty:
+                    break
+                if request is None:
+                    self.__score_batch(batch)
+                    return
+                batch.append(request)
+
+            self.__score_batch(batch)
+
+    def __score_batch(self, batch: List[Tuple]) -> None:
+
+        experiment_nm_to_requests = {}
+        for request in batch:
+            experiment_nm_to_requests.setdefault(request[0], []).append(request)
+
+        for experiment_nm, requests in experiment_nm_to_requests.items():
+
+            try:
+                preds = self.__score(experiment_nm, requests)
+            except Exception:
+                # a faulty request must not fail the others of the batch
+                for request in requests:
+                    self.__score_request(experiment_nm, request)
+            else:
+                for (_, _, _, future), pred in zip(requests, preds):
+                    future.set_result(pred)
+
+            if self.__metrics is not None:
+                self.__metrics.record_batch(len(requests))
+
+    def __score_request(self, experiment_nm: str, request: Tuple) -> None:
+
+        try:
+            request[3].set_result(self.__score(experiment_nm, [request])[0])
+        except Exception as error:
+            request[3].set_exception(error)
+
+    def __score(self, experiment_nm: str, requests: List[Tuple]) -> List[ndarray]:
+
+        entry = self.__model_registry.get(experiment_nm)
+        inference_machine = entry["inference_machine"]
+
+        # max_lag - 1 rows of zero spends between two requests so
+        # that the carryover does not leak from one to the next
+        separator_size = inference_machine.get_max_lag() - 1
+        nb_media = requests[0][1].shape[1]
+        nb_ctrl = max([
+            0 if ctrl_vars is None else ctrl_vars.shape[1] for _, _, ctrl_vars, _ in requests
+        ])
+
+        spends_parts, ctrl_vars_parts, obs_slices = [], [], []
+        start = 0
+
+        for _, spends, ctrl_vars, _ in requests:
+
+            # missing ctrl_vars contribute 0, as when predicting without them
+            if ctrl_vars is None:
+                ctrl_vars = np.zeros((len(spends), nb_ctrl))
+
+            spends_parts += [np.zeros((separator_size, nb_media)), spends]
+            ctrl_vars_parts += [np.zeros((separator_size, nb_ctrl)), ctrl_vars]
+
+            start += separator_size
+            obs_slices.append(slice(start, start + len(spends)))
+            start += len(spends)
+
+        pred = inference_machine.predict(
+            np.concatenate(spends_parts),
+            np.concatenate(ctrl_vars_parts) if nb_ctrl > 0 else None
+        )
+        pred = entry["target_normalizer"].reverse_transform(pred.reshape((-1, 1))).reshape((-1,))
+
+        return [pred[obs_slice] for obs_slice in obs_slices]
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self) -> None:
+
+        if urlparse(self.path).path != "/metrics":
+            self.__send(404, JSON_CONTENT_TYPE, dumps({"error": "not found"}).encode())
+            return
+
+        self.__send(200, JSON_CONTENT_TYPE, dumps(self.server.metrics.get()).encode())
+
+    def do_POST(self) -> None:
+
+        url = urlparse(self.path)
+        if url.path != "/predict":
+            self.__send(404, JSON_CONTENT_TYPE, dumps({"error": "not found"}).encode())
+            return
+
+        start_time = default_timer()
+        content_type = self.headers.get("Content-Type", JSON_CONTENT_TYPE).split(";")[0]
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        if (content_type == ARROW_CONTENT_TYPE) and not PYARROW_IS_AVAILABLE:
+            self.server.metrics.record_request(default_timer() - start_time, True)
+            self.__send(415, JSON_CONTENT_TYPE, dumps({
+                "error": "pyarrow is required for %s payloads" % ARROW_CONTENT_TYPE
+            }).encode())
+            return
+
+        try:
+            if content_type == ARROW_CONTENT_TYPE:
+                experiment_nm = parse_qs(url.query)["experiment_nm"][0]
+                spends, ctrl_vars = read_arrow_payload(body)
+            else:
+                payload = loads(body)
+                experiment_nm = payload["experiment_nm"]
+                spends = np.array(payload["spends"], dtype=float)
+                ctrl_vars = payload.get("ctrl_vars")
+                ctrl_vars = None if ctrl_vars is None else np.array(ctrl_vars, dtype=float)
+
+            pred = self.server.micro_batcher.submit(
+                experiment_nm, spends, ctrl_vars
+                ).result(REQUEST_TIMEOUT_S)
+
+        except Exception as error:
+            self.server.metrics.record_request(default_timer() - start_time, True)
+            self.__send(400, JSON_CONTENT_TYPE, dumps({"error": repr(error)}).encode())
+            return
+
+        if content_type == ARROW_CONTENT_TYPE:
+            self.__send(200, ARROW_CONTENT_TYPE, write_arrow_payload(pred))
+        else:
+            self.__send(200, JSON_CONTENT_TYPE, dumps({"pred": pred.tolist()}).encode())
+
+        self.server.metrics.record_request(default_timer() - start_time)
+
+    def log_message(self, format: str, *args) -> None:
+
+        # one log line per request is too verbose at the expected request rates
+        pass
+
+    def __send(self, status: int, content_type: str, body: bytes) -> None:
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ScoringServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+    # the default listen backlog of 5 resets connections of concurrent clients
+    request_queue_size = 128
+
+    def __init__(
+        self, server_address: Tuple[str, int], micro_batcher: MicroBatcher, metrics: ScoringMetrics
+        ) -> None:
+
+        super().__init__(server_address, ScoringRequestHandler)
+
+        self.micro_batcher = micro_batcher
+        self.metrics = metrics
+
+    def server_close(self) -> None:
+
+        super().server_close()
+        self.micro_batcher.stop()
+
+
+
+def read_arrow_payload(body: bytes) -> Tuple[ndarray, Union[ndarray, None]]:
+
+    table = ipc.open_stream(body).read_all()
+
+    spend_nms = [nm for nm in table.column_names if not nm.startswith(ARROW_CTRL_COLUMN_PREFIX)]
+    ctrl_nms = [nm for nm in table.column_names if nm.startswith(ARROW_CTRL_COLUMN_PREFIX)]
+
+    spends = np.column_stack([table.column(nm).to_numpy() for nm in spend_nms]).astype(float)
+    ctrl_vars = np.column_stack([
+        table.column(nm).to_numpy() for nm in ctrl_nms
+    ]).astype(float) if len(ctrl_nms) > 0 else None
+
+    return spends, ctrl_vars
+
+
+def write_arrow_payload(pred: ndarray) -> bytes:
+
+    pred_table = arrow_table({"pred": pred})
+    sink = BufferOutputStream()
+
+    with ipc.new_stream(sink, pred_table.schema) as writer:
+        writer.write_table(pred_table)
+
+    return sink.getvalue().to_pybytes()
+
+
+def create_scoring_server(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    batch_window_ms: float = 5,
+    max_batch_size: int = 256,
+    model_registry: Union[ModelRegistry, None] = None
+    ) -> ScoringServer:
+
+    # the micro batcher is started here and stopped by server_close
+    metrics = ScoringMetrics()
+    micro_batcher = MicroBatcher(
+        ModelRegistry() if model_registry is None else model_registry,
+        batch_window_ms,
+        max_batch_size,
+        metrics
+    )
+    scoring_server = ScoringServer((host, port), micro_batcher, metrics)
+    micro_batcher.start()
+
+    return scoring_server
+
+
+def run(config_file_nm: str = "serve") -> None:
+
+    config = load_config(config_file_nm)
+
+    scoring_server = create_scoring_server(
+        config["HOST"],
+        config["PORT"],
+        config["BATCH_WINDOW_MS"],
+        config["MAX_BATCH_SIZE"],
+        ModelRegistry(
+            config.get("MODEL_REGISTRY_MAX_NB_MODELS", 8),
+            config.get("MODEL_REGISTRY_WITH_CONTENT_HASH", False)
+        )
+    )
+
+    try:
+        scoring_server.serve_forever()
+    finally:
+        scoring_server.server_close()
+
+
+
+if __name__ == "__main__":
+
+    run()
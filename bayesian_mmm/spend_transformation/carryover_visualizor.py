@@ -1,17 +1,29 @@
-from typing import Dict, List
+from typing import Dict, List, Union
 from numpy import ndarray, arange
 import plotly.graph_objects as go
 
 from bayesian_mmm.spend_transformation.spend_transformation import (
-    add_lagged_values_along_z,
+    view_lagged_values_along_z,
     compute_adstock,
     compute_geo_decay
 )
+from bayesian_mmm.spend_transformation.transform_cache import (
+    TransformCache,
+    get_array_key,
+    get_transform_key
+)
 from bayesian_mmm.utilities.utilities import generate_random_color
 
 class CarryoverVisualizor:
 
-    def __init__(self, param_nm_to_val: Dict, media_nms: List[str], max_lag: int) -> None:
+    def __init__(
+        self,
+        param_nm_to_val: Dict,
+        media_nms: List[str],
+        max_lag: int,
+        carryover_engine_nm: str = "lag_window",
+        transform_cache: Union[TransformCache, None] = None
+        ) -> None:
 
         if "delay" in param_nm_to_val.keys():
             self.__transfo_func = compute_adstock
@@ -23,14 +35,25 @@ class CarryoverVisualizor:
             self.__transfo_func = compute_geo_decay
             self.__transfo_params = {"retain_rates":param_nm_to_val["retain_rate"]}
 
+        self.__transfo_params["engine_nm"] = carryover_engine_nm
+
         self.__media_nms = media_nms
         self.__max_lag = max_lag
+        self.__transform_cache = transform_cache
         
 
     def write_fig(self, spends: ndarray, name: str) -> None:
 
-        lagged_spends = add_lagged_values_along_z(spends, self.__max_lag)
-        transformed_spends = self.__transfo_func(lagged_spends, **self.__transfo_params)
+        if self.__transform_cache is None:
+            transformed_spends = self.__compute_transformed_spends(spends)
+        else:
+            # same key as the InferenceMachine carryover for the same params and spends
+            transformed_spends = self.__transform_cache.get(
+                get_transform_key(
+                    self.__transfo_func, self.__transfo_params, self.__max_lag, get_array_key(spends)
+                ),
+                lambda: self.__compute_transformed_spends(spends)
+            )
 
         xvalues = arange(spends.shape[0])
         
@@ -57,4 +80,10 @@ class CarryoverVisualizor:
                 )
             )
 
-        fig.write_html("results/plot/carryover_%s.html" % name, auto_open=False)
\ No newline at end of file
+        fig.write_html("results/plot/carryover_%s.html" % name, auto_open=False)
+
+    def __compute_transformed_spends(self, spends: ndarray) -> ndarray:
+
+        lagged_spends = view_lagged_values_along_z(spends, self.__max_lag)
+
+        return self.__transfo_func(lagged_spends, **self.__transfo_params)
\ No newline at end of file
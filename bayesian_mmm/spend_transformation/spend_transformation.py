@@ -1,7 +1,16 @@
 from typing import List
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+from bayesian_mmm.utilities.utilities import (
+    check_ndarray_is_matrix, check_ndarray_is_matrix_or_tensor, check_ndarray_is_tensor
+)
+
+# lower bound of the normalized spends given to the diminushing returns, where
+# they and their derivatives are finite
+MIN_NORMALIZED_SPEND = 1e-12
 
-from bayesian_mmm.utilities.utilities import check_ndarray_is_matrix, check_ndarray_is_tensor
 
 def add_lagged_values_along_z(spends: np.ndarray, max_lag: int) -> np.ndarray:
     
@@ -23,93 +32,229 @@ def add_lagged_values_along_z(spends: np.ndarray, max_lag: int) -> np.ndarray:
     return lagged_spends
 
 
+def view_lagged_values_along_z(spends: np.ndarray, max_lag: int) -> np.ndarray:
+
+    if max_lag < 1:
+        raise ValueError("max_lag value must superior or equal 1")
+    
+    if max_lag > len(spends):
+        raise ValueError("max_lag value superior to nb of obs in spends")
+
+    check_ndarray_is_matrix(spends, "spends")
+
+    padded_spends = np.zeros((len(spends) + max_lag - 1, spends.shape[1]))
+    padded_spends[max_lag - 1:] = spends
+
+    # window[obs, media, k] = padded_spends[obs + k, media], k = max_lag - 1 - lag
+    # the read-only view costs no copy of the spends per lag
+    return sliding_window_view(padded_spends, max_lag, axis=0)[:, :, ::-1]
+
+
+def compute_adstock_lag_weights(
+    delays: np.ndarray, retain_rates: np.ndarray, max_lag: int
+    ) -> np.ndarray:
+
+    lags = np.arange(max_lag)
+
+    return np.power(retain_rates[..., None], (lags - delays[..., None])**2)
+
+
+def compute_geo_decay_lag_weights(retain_rates: np.ndarray, max_lag: int) -> np.ndarray:
+
+    lags = np.arange(max_lag)
+
+    return np.power(retain_rates[..., None], lags)
+
+
+def compute_carryover(
+    lagged_spends: np.ndarray, lag_weights: np.ndarray, engine_nm: str = "lag_window"
+    ) -> np.ndarray:
+
+    # lag_weights is (nb_media, max_lag) or (nb_draws, nb_media, max_lag)
+    # the result is (nb_obs, nb_media) or (nb_draws, nb_obs, nb_media)
+    if engine_nm == "lag_window":
+        carryover_spends = np.einsum("nml,...ml->...nm", lagged_spends, lag_weights)
+    elif engine_nm == "fft":
+        # lag 0 of the lagged spends are the spends
+        carryover_spends = compute_fft_convolution(lagged_spends[:, :, 0], lag_weights)
+    else:
+        raise ValueError("engine_nm must be 'lag_window' or 'fft'")
+
+    return carryover_spends / lag_weights.sum(axis=-1)[..., None, :]
+
+
+def compute_fft_convolution(spends: np.ndarray, lag_weights: np.ndarray) -> np.ndarray:
+
+    nb_obs = spends.shape[0]
+    fft_size = nb_obs + lag_weights.shape[-1] - 1
+
+    spends_fft = np.fft.rfft(spends, n=fft_size, axis=0)
+    lag_weights_fft = np.swapaxes(np.fft.rfft(lag_weights, n=fft_size, axis=-1), -1, -2)
+
+    convolution = np.fft.irfft(spends_fft * lag_weights_fft, n=fft_size, axis=-2)
+
+    return convolution[..., :nb_obs, :]
+
+
+def compute_recursive_geo_decay(
+    spends: np.ndarray, retain_rates: np.ndarray, max_lag: int
+    ) -> np.ndarray:
+
+    nb_obs, nb_media = spends.shape
+    flat_retain_rates = retain_rates.reshape((-1, nb_media))
+
+    decayed_spends = np.zeros((flat_retain_rates.shape[0], nb_obs, nb_media))
+
+    for draw_index, draw_retain_rates in enumerate(flat_retain_rates):
+        for media_index, retain_rate in enumerate(draw_retain_rates):
+            decayed_spends[draw_index, :, media_index] = lfilter(
+                [1.], [1., -retain_rate], spends[:, media_index]
+            )
+
+    decayed_spends = decayed_spends.reshape(retain_rates.shape[:-1] + (nb_obs, nb_media))
+
+    # the infinite decay is truncated to max_lag by removing
+    # the decayed spends of obs - max_lag, decayed max_lag more times
+    carryover_spends = decayed_spends.copy()
+    carryover_spends[..., max_lag:, :] -= (
+        np.power(retain_rates, max_lag)[..., None, :] * decayed_spends[..., :-max_lag, :]
+    )
+
+    lag_weights = compute_geo_decay_lag_weights(retain_rates, max_lag)
+
+    return carryover_spends / lag_weights.sum(axis=-1)[..., None, :]
+
+
 def compute_adstock(
-    lagged_spends: np.ndarray, delays: List[float], retain_rates: List[float]
+    lagged_spends: np.ndarray,
+    delays: List[float],
+    retain_rates: List[float],
+    engine_nm: str = "lag_window"
     ) -> np.ndarray:
         
     check_ndarray_is_tensor(lagged_spends, "lagged_spends")
 
-    for delay in delays:
+    if engine_nm not in ["lag_window", "fft"]:
+        raise ValueError("engine_nm must be 'lag_window' or 'fft'")
 
-        if delay < 0:
-            raise ValueError("delay value must superior or equal 0")
+    delays = np.asarray(delays, dtype=float)
+    retain_rates = np.asarray(retain_rates, dtype=float)
 
-        if delay > lagged_spends.shape[2]:
-            raise ValueError("delay value must be inferior than max_lag")
+    if (delays < 0).any():
+        raise ValueError("delay value must superior or equal 0")
 
-    for retain_rate in retain_rates:
+    if (delays > lagged_spends.shape[2]).any():
+        raise ValueError("delay value must be inferior than max_lag")
 
-        if (retain_rate < 0) or (retain_rate > 1):
-            raise ValueError("retain_rate value must be in [0,1]")
+    if ((retain_rates < 0) | (retain_rates > 1)).any():
+        raise ValueError("retain_rate value must be in [0,1]")
 
+    lag_weights = compute_adstock_lag_weights(delays, retain_rates, lagged_spends.shape[2])
 
-    adstock_spends = np.zeros(lagged_spends.shape[:-1])
+    return compute_carryover(lagged_spends, lag_weights, engine_nm)
 
-    for media_index in range(lagged_spends.shape[1]):
 
-        lag_weights = np.arange(lagged_spends.shape[2])
-        lag_weights = np.power(retain_rates[media_index], (lag_weights - delays[media_index])**2)
-        adstock_spends[:,media_index] = np.dot(lagged_spends[:,media_index,:], lag_weights) / lag_weights.sum()
+def compute_geo_decay(
+    lagged_spends: np.ndarray, retain_rates: List[float], engine_nm: str = "lag_window"
+    ) -> np.ndarray:
 
-    return adstock_spends
+    check_ndarray_is_tensor(lagged_spends, "lagged_spends")
 
+    if engine_nm not in ["lag_window", "fft", "recursive"]:
+        raise ValueError("engine_nm must be 'lag_window', 'fft' or 'recursive'")
 
-def compute_geo_decay(lagged_spends: np.ndarray, retain_rates: List[float]) -> np.ndarray:
+    retain_rates = np.asarray(retain_rates, dtype=float)
 
-    check_ndarray_is_tensor(lagged_spends, "lagged_spends")
+    if ((retain_rates < 0) | (retain_rates > 1)).any():
+        raise ValueError("retain_rate value must be in [0,1]")
 
-    for retain_rate in retain_rates:
+    if engine_nm == "recursive":
+        # lag 0 of the lagged spends are the spends
+        return compute_recursive_geo_decay(
+            lagged_spends[:, :, 0], retain_rates, lagged_spends.shape[2]
+        )
 
-        if (retain_rate < 0) or (retain_rate > 1):
-            raise ValueError("retain_rate value must be in [0,1]")
+    lag_weights = compute_geo_decay_lag_weights(retain_rates, lagged_spends.shape[2])
 
-    # 
-    carryover_spends = np.zeros(lagged_spends.shape[:-1])
+    return compute_carryover(lagged_spends, lag_weights, engine_nm)
 
-    for media_index in range(lagged_spends.shape[1]):
 
-        lag_weights = np.arange(lagged_spends.shape[2])
-        lag_weights = np.power(retain_rates[media_index], lag_weights)
-        carryover_spends[:,media_index] = np.dot(lagged_spends[:,media_index,:], lag_weights) / lag_weights.sum()
+def compute_hill(spends: np.ndarray, ecs: List[float], slopes: List[float]) -> np.ndarray:
 
-    return carryover_spends
+    check_ndarray_is_matrix_or_tensor(spends, "spends")
 
+    ecs = np.asarray(ecs, dtype=float)
+    slopes = np.asarray(slopes, dtype=float)
 
-def compute_hill(spends: np.ndarray, ecs: List[float], slopes: List[float]) -> np.ndarray:
+    if ((ecs < 0) | (ecs > 1)).any():
+        raise ValueError("ec value must be in [0,1]")
 
-    check_ndarray_is_matrix(spends, "spends")
+    if (slopes < 0).any():
+        raise ValueError("slope value must be greater than 0")
 
-    for ec in ecs:
+    # parameters of shape (nb_draws, nb_media) are broadcast along the obs axis
+    return 1 / (1 + (spends / ecs[..., None, :])**(-slopes[..., None, :]))
 
-        if (ec < 0) or (ec > 1):
-            raise ValueError("ec value must be in [0,1]")
 
-    for slope in slopes:
+def compute_hill_derivative(
+    spends: np.ndarray, ecs: List[float], slopes: List[float]
+    ) -> np.ndarray:
 
-        if slope < 0:
-            raise ValueError("slope value must be greater than 0")
+    # derivative of compute_hill with respect to the spends, spends must be > 0
+    hill_spends = compute_hill(spends, ecs, slopes)
 
+    return np.asarray(slopes, dtype=float)[..., None, :] / spends * hill_spends * (1 - hill_spends)
 
-    hill_spends = np.zeros(spends.shape)
 
-    for media_index in range(spends.shape[1]):
-        hill_spends[:, media_index] = 1 / (1 + (spends[:, media_index] / ecs[media_index])**(-slopes[media_index]))
+def compute_hill_inverse(
+    transformed_spends: np.ndarray, ecs: List[float], slopes: List[float]
+    ) -> np.ndarray:
+
+    # spends of which compute_hill is transformed_spends, inf when they are greater or equal 1
+    check_ndarray_is_matrix_or_tensor(transformed_spends, "transformed_spends")
+
+    ecs = np.asarray(ecs, dtype=float)[..., None, :]
+    slopes = np.asarray(slopes, dtype=float)[..., None, :]
+
+    with np.errstate(divide="ignore"):
+        odds = transformed_spends / (1 - np.minimum(transformed_spends, 1))
+
+    return ecs * odds**(1 / slopes)
 
-    return hill_spends
 
 def compute_reach(spends: np.ndarray, half_saturations: List[float]) -> np.ndarray:
 
-    check_ndarray_is_matrix(spends, "spends")
+    check_ndarray_is_matrix_or_tensor(spends, "spends")
 
-    for half_saturation in half_saturations:
+    half_saturations = np.asarray(half_saturations, dtype=float)
 
-        if half_saturation < 0:
-            raise ValueError("half_saturation value must be greater than 0")
-    
-    reach_spends = np.zeros(spends.shape)
+    if (half_saturations < 0).any():
+        raise ValueError("half_saturation value must be greater than 0")
+
+    exp_spends = np.exp(-half_saturations[..., None, :]*spends)
+
+    return (1 - exp_spends) / (1 + exp_spends)
+
+
+def compute_reach_derivative(spends: np.ndarray, half_saturations: List[float]) -> np.ndarray:
+
+    # derivative of compute_reach with respect to the spends
+    check_ndarray_is_matrix_or_tensor(spends, "spends")
+
+    half_saturations = np.asarray(half_saturations, dtype=float)[..., None, :]
+    exp_spends = np.exp(-half_saturations*spends)
+
+    return 2 * half_saturations * exp_spends / (1 + exp_spends)**2
+
+
+def compute_reach_inverse(
+    transformed_spends: np.ndarray, half_saturations: List[float]
+    ) -> np.ndarray:
 
-    for media_index in range(spends.shape[1]):
-        reach_spends[:, media_index] = (1 - np.exp(-half_saturations[media_index]*spends[:,media_index])) / (1 + np.exp(-half_saturations[media_index]*spends[:,media_index]))
+    # spends of which compute_reach is transformed_spends, inf when they are greater or equal 1
+    check_ndarray_is_matrix_or_tensor(transformed_spends, "transformed_spends")
 
-    return reach_spends
+    half_saturations = np.asarray(half_saturations, dtype=float)[..., None, :]
 
+    with np.errstate(divide="ignore"):
+        return 2 * np.arctanh(np.minimum(transformed_spends, 1)) / half_saturations
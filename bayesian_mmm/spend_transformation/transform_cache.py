@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Any, Callable, Dict, Tuple
+import numpy as np
+from numpy import ndarray
+
+
+class TransformCache:
+
+    def __init__(self, max_size_mb: float = 500) -> None:
+
+        if max_size_mb < 0:
+            raise ValueError("max_size_mb value must be greater or equal 0")
+
+        self.__max_size = max_size_mb * 1e6
+        self.__size = 0
+        self.__nb_hits = 0
+        self.__nb_misses = 0
+
+        # key -> transformed spends, from the least to the most recently used
+        self.__entries = OrderedDict()
+
+    def get(self, key: Tuple, compute_func: Callable[[], ndarray]) -> ndarray:
+
+        # the transformed spends are shared between consumers, so they are read-only
+        if key in self.__entries:
+            self.__nb_hits += 1
+            self.__entries.move_to_end(key)
+            return self.__entries[key]
+
+        self.__nb_misses += 1
+        transformed_spends = np.asarray(compute_func())
+        transformed_spends.flags.writeable = False
+
+        # transformed spends larger than the cache are not kept
+        if transformed_spends.nbytes <= self.__max_size:
+
+            self.__entries[key] = transformed_spends
+            self.__size += transformed_spends.nbytes
+
+            while self.__size > self.__max_size:
+                _, evicted_transformed_spends = self.__entries.popitem(last=False)
+                self.__size -= evicted_transformed_spends.nbytes
+
+        return transformed_spends
+
+    def get_nb_hits(self) -> int:
+
+        return self.__nb_hits
+
+    def get_nb_misses(self) -> int:
+
+        return self.__nb_misses
+
+    def get_size_mb(self) -> float:
+
+        return self.__size / 1e6
+
+
+
+def get_array_key(array: Any) -> Tuple:
+
+    # arrays equal in shape, dtype and values share their key, whatever their identity
+    array = np.ascontiguousarray(array)
+
+    return (array.shape, array.dtype.str, sha256(array.tobytes()).hexdigest())
+
+
+def get_transform_key(transfo_func: Callable, transfo_params: Dict, *keys: Any) -> Tuple:
+
+    param_keys = tuple(
+        (param_nm, val if isinstance(val, str) else get_array_key(val))
+        for param_nm, val in sorted(transfo_params.items())
+    )
+
+    return (transfo_func.__name__, param_keys) + keys
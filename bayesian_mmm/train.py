@@ -1,14 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from bayesian_mmm.normalizer.normalizer import Normalizer
 from bayesian_mmm.contribution_analysis.contribution_calculator import ContributionCalculator
+from bayesian_mmm.contribution_analysis.posterior_contribution_calculator import (
+    PosteriorContributionCalculator
+)
 from bayesian_mmm.contribution_analysis.contribution_visualizor import ContributionVisualizor
 from bayesian_mmm.evaluator.evaluator import Evaluator
 from bayesian_mmm.inference_machine.inference_machine import InferenceMachine, save_inference_machine
+from bayesian_mmm.inference_machine.posterior_inference_machine import (
+    PosteriorInferenceMachine,
+    save_posterior_inference_machine
+)
+from bayesian_mmm.response_analysis.response_surface import (
+    create_response_surface,
+    save_response_surface
+)
+from bayesian_mmm.sampling.draw_store import load_draws, save_draws
 from bayesian_mmm.sampling.parameter_estimation import estimate_parameters
 from bayesian_mmm.sampling.sample_visualizor import SampleVisualizor
 from bayesian_mmm.sampling.sampler import Sampler
+from bayesian_mmm.sampling.stan_model_cache import StanModelCache
 from bayesian_mmm.utilities.utilities import load_config, load_df, split_train_test
-from bayesian_mmm.sampling.stan_model_generator import StanModelGenerator
+from bayesian_mmm.sampling.stan_model_generator import create_stan_model
 from bayesian_mmm.spend_transformation.carryover_visualizor import CarryoverVisualizor
+from bayesian_mmm.spend_transformation.transform_cache import TransformCache
 from bayesian_mmm.spend_transformation.diminushing_returns_visualizor import DiminushingReturnsVisualizor
 
 def run(config_file_nm: str = "train") -> None:
@@ -21,7 +37,21 @@ def run(config_file_nm: str = "train") -> None:
     ctrl_nms = config["CTRL_NMS"]
     target_nm = config["TARGET_NM"]
     date_nm = config["DATE_NM"]
-    
+
+    # compilation only depends on config, it runs while data is loaded and normalized
+    stan_model_cache_args = config.get("STAN_MODEL_CACHE")
+    executor = ThreadPoolExecutor(max_workers=1)
+    stan_model_future = executor.submit(
+        create_stan_model,
+        config["CARRYOVER_TRANSFO_NM"],
+        config["DIMINUSHING_RETURNS_TRANSFO_NM"],
+        len(ctrl_nms) > 0,
+        config.get("VECTORIZED_STAN_CODE", False),
+        not config.get("CARRYOVER_IN_STAN_MODEL", False),
+        StanModelCache(**stan_model_cache_args) if stan_model_cache_args else None
+    )
+    executor.shutdown(wait=False)
+
     df = load_df(config["DATA_SOURCE_PATH"], date_nm)
 
     train, test = split_train_test(df, config["NB_TEST_OBS"])
@@ -52,25 +82,31 @@ def run(config_file_nm: str = "train") -> None:
         test[target_nm].values.reshape((-1,1))
     )
 
-    stan_model_generator = StanModelGenerator(
-        config["CARRYOVER_TRANSFO_NM"],
-        config["DIMINUSHING_RETURNS_TRANSFO_NM"],
-        len(ctrl_nms) > 0
-    )
-    stan_model_generator.create_model()
-    stan_model = stan_model_generator.get_model()
-    del stan_model_generator
+    stan_model = stan_model_future.result()
 
-    sampler = Sampler(stan_model, config["MAX_LAG"])
+    sampler = Sampler(
+        stan_model,
+        config["MAX_LAG"],
+        not config.get("CARRYOVER_IN_STAN_MODEL", False)
+    )
     sampler.create_stan_input(
         train[media_nms].values,
         train[ctrl_nms].values if len(ctrl_nms) > 0 else None,
         train[target_nm].values
     )
-    sampling_results = sampler.run_sampling(
-        config["SAMPLING_N_ITER"],
-        config["SAMPLING_N_PROCESSORS"]
-    )
+    if "ADAPTIVE_SAMPLING" in config.keys():
+        sampling_results = sampler.run_adaptive_sampling(
+            chains=config["SAMPLING_N_PROCESSORS"],
+            **config["ADAPTIVE_SAMPLING"]
+        )
+    else:
+        sampling_results = sampler.run_sampling(
+            config["SAMPLING_N_ITER"],
+            config["SAMPLING_N_PROCESSORS"]
+        )
+    sampler.write_diagnostics(experiment_nm)
+    if "DRAW_STORE" in config.keys():
+        save_draws(sampler.get_chain_draws(), experiment_nm, config["DRAW_STORE"]["dtype"])
     del sampler
 
     sample_visualizor = SampleVisualizor(
@@ -84,10 +120,16 @@ def run(config_file_nm: str = "train") -> None:
         sampling_results, config["PARAMETER_ESTIMATOR_NM"]
         )
 
+    # the transformed spends of the point estimates are computed once for
+    # the visualizors, the evaluator and the contribution calculator
+    transform_cache = TransformCache(config.get("TRANSFORM_CACHE_MAX_SIZE_MB", 500))
+
     carryover_visualizor = CarryoverVisualizor(
         parameter_estimation,
         media_nms,
-        config["MAX_LAG"]
+        config["MAX_LAG"],
+        config.get("CARRYOVER_ENGINE_NM", "lag_window"),
+        transform_cache
     )
     carryover_visualizor.write_fig(train[media_nms].values, experiment_nm)
     del carryover_visualizor
@@ -98,8 +140,37 @@ def run(config_file_nm: str = "train") -> None:
         )
     diminushing_returns_visualizor.write_fig(train[media_nms].values, experiment_nm)
 
-    inference_machine = InferenceMachine(parameter_estimation, config["MAX_LAG"])
+    inference_machine = InferenceMachine(
+        parameter_estimation,
+        config["MAX_LAG"],
+        config.get("CARRYOVER_ENGINE_NM", "lag_window")
+    )
     save_inference_machine(inference_machine, experiment_nm)
+    inference_machine.set_transform_cache(transform_cache)
+
+    if config.get("SAVE_POSTERIOR_INFERENCE_MACHINE", False):
+        # built on the stored draws when there are some, it only refers to them once saved
+        posterior_inference_machine = PosteriorInferenceMachine(
+            load_draws(experiment_nm) if "DRAW_STORE" in config.keys() else sampling_results,
+            config["MAX_LAG"],
+            config.get("CARRYOVER_ENGINE_NM", "lag_window")
+        )
+        save_posterior_inference_machine(posterior_inference_machine, experiment_nm)
+        del posterior_inference_machine
+
+    if "RESPONSE_SURFACE" in config.keys():
+        response_surface_args = dict(config["RESPONSE_SURFACE"])
+        max_spends_ratio = response_surface_args.pop("max_spends_ratio")
+        response_surface = create_response_surface(
+            sampling_results,
+            predictor_normalizer,
+            target_normalizer,
+            media_nms,
+            df[media_nms].values.max(axis=0) * max_spends_ratio,
+            **response_surface_args
+        )
+        save_response_surface(response_surface, experiment_nm)
+        del response_surface
 
     evaluator = Evaluator(
         inference_machine,
@@ -121,14 +192,46 @@ def run(config_file_nm: str = "train") -> None:
         config["MAX_LAG"],
         target_normalizer,
         media_nms,
-        ctrl_nms
+        ctrl_nms,
+        config.get("CARRYOVER_ENGINE_NM", "lag_window"),
+        predictor_normalizer=predictor_normalizer,
+        **config.get("CONTRIBUTION_ATTRIBUTION", {})
     )
+    contribution_calculator.set_transform_cache(transform_cache)
     contribution_calculator.compute_results(
         train[media_nms].values,
         train[ctrl_nms].values if len(ctrl_nms) > 0 else None,
         train.index.values
     )
     contribution_calculator.write_results(experiment_nm)
+
+    if "POSTERIOR_CONTRIBUTIONS" in config.keys():
+        posterior_contribution_calculator = PosteriorContributionCalculator(
+            sampling_results,
+            config["MAX_LAG"],
+            target_normalizer,
+            media_nms,
+            ctrl_nms,
+            config.get("CARRYOVER_ENGINE_NM", "lag_window"),
+            config["POSTERIOR_CONTRIBUTIONS"]["quantiles"]
+        )
+        posterior_contribution_calculator.compute_results(
+            train[media_nms].values,
+            train[ctrl_nms].values if len(ctrl_nms) > 0 else None,
+            train.index.values,
+            config["POSTERIOR_CONTRIBUTIONS"]["draws_chunk_size"]
+        )
+        posterior_contribution_calculator.write_results(experiment_nm)
+        del posterior_contribution_calculator
+
+    if "COUNTERFACTUAL_SCALING_FACTORS" in config.keys():
+        contribution_calculator.compute_counterfactuals(
+            train[media_nms].values,
+            train[ctrl_nms].values if len(ctrl_nms) > 0 else None,
+            train.index.values,
+            config["COUNTERFACTUAL_SCALING_FACTORS"]
+        )
+        contribution_calculator.write_counterfactuals(experiment_nm)
     
     contribution = contribution_calculator.get_results()
     contribution_visualizor = ContributionVisualizor(contribution, train[media_nms])
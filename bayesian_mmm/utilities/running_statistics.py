@@ -0,0 +1,117 @@
+from typing import List, Tuple
+import numpy as np
+from numpy import ndarray
+
+
+class RunningStatistics:
+
+    def __init__(
+        self, quantiles: List[float], shape: Tuple[int, ...], nb_summary_values: int = 1000
+        ) -> None:
+
+        # mean and quantiles of each cell of an array of the given shape, updated
+        # with batches of values without keeping them, the values of each cell are
+        # summarized by weighted values, compressed to nb_summary_values of them when
+        # there are twice as many, the quantiles are exact until the first compression,
+        # then each compression adds a rank error of at most 1 / (2 * nb_summary_values)
+        # of the values seen, whatever the order of the values
+        quantiles = np.asarray(quantiles, dtype=float)
+
+        if ((quantiles <= 0) | (quantiles >= 1)).any():
+            raise ValueError("quantile value must be in ]0,1[")
+        if nb_summary_values < 2:
+            raise ValueError("nb_summary_values value must be greater or equal 2")
+
+        self.__quantiles = quantiles
+        self.__shape = tuple(shape)
+        self.__nb_summary_values = nb_summary_values
+        self.__nb_values = 0
+        self.__sum = np.zeros(self.__shape)
+
+        # (nb_summary_values,) + shape values sorted along the first axis, and their weights
+        self.__summary_values = np.zeros((0,) + self.__shape)
+        self.__summary_weights = np.zeros((0,) + self.__shape)
+
+    def update(self, values: ndarray) -> None:
+
+        # values is (nb_values,) + shape
+        if values.shape[1:] != self.__shape:
+            raise ValueError("values must be of shape (nb_values,) + %s" % str(self.__shape))
+
+        self.__sum += values.sum(axis=0)
+        self.__nb_values += len(values)
+
+        all_values = np.concatenate([self.__summary_values, values])
+        all_weights = np.concatenate([self.__summary_weights, np.ones(values.shape)])
+
+        order = np.argsort(all_values, axis=0, kind="stable")
+        self.__summary_values = np.take_along_axis(all_values, order, axis=0)
+        self.__summary_weights = np.take_along_axis(all_weights, order, axis=0)
+
+        # the summary is compressed to its values at evenly spaced probabilities,
+        # each of them then weighs the same share of the values seen
+        if len(self.__summary_values) > 2 * self.__nb_summary_values:
+            self.__summary_values = self.__get_summary_quantiles(
+                np.linspace(0, 1, self.__nb_summary_values)
+            )
+            self.__summary_weights = np.full(
+                self.__summary_values.shape, self.__nb_values / self.__nb_summary_values
+            )
+
+    def get_nb_values(self) -> int:
+
+        return self.__nb_values
+
+    def get_mean(self) -> ndarray:
+
+        return self.__sum / self.__nb_values
+
+    def get_quantiles(self) -> ndarray:
+
+        # (nb_quantiles,) + shape
+        return self.__get_summary_quantiles(self.__quantiles)
+
+    def __get_summary_quantiles(self, probabilities: ndarray) -> ndarray:
+
+        nb_summary_values = len(self.__summary_values)
+        probabilities = np.asarray(probabilities)
+
+        if nb_summary_values == 1:
+            return np.repeat(self.__summary_values, len(probabilities), axis=0)
+
+        # linear interpolation of the summary values at their cumulated weights, the
+        # first value at probability 0 and the last at 1, as np.quantile with unit weights
+        weights = self.__summary_weights
+        cum_weights = np.cumsum(weights, axis=0) - weights / 2 - weights[:1] / 2
+        cdf = cum_weights / cum_weights[-1:]
+
+        # the cells are put one after the other on the probability axis, shifted by
+        # their index, so that all of them are interpolated with one searchsorted
+        nb_cells = int(np.prod(self.__shape))
+        cell_indices = np.tile(np.arange(nb_cells), len(probabilities))
+
+        flat_cdf = (cdf.reshape((nb_summary_values, nb_cells)) + np.arange(nb_cells)).T.ravel()
+        flat_values = self.__summary_values.reshape((nb_summary_values, nb_cells)).T.ravel()
+        targets = (probabilities[:, None] + np.arange(nb_cells)).ravel()
+
+        # the last value of a cell and the first of the next one share their shifted cdf
+        upper_indices = np.clip(
+            np.searchsorted(flat_cdf, targets, side="left"),
+            cell_indices * nb_summary_values + 1,
+            (cell_indices + 1) * nb_summary_values - 1
+        )
+        lower_indices = upper_indices - 1
+
+        lower_cdf, upper_cdf = flat_cdf[lower_indices], flat_cdf[upper_indices]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fractions = np.where(
+                upper_cdf > lower_cdf,
+                np.clip((targets - lower_cdf) / (upper_cdf - lower_cdf), 0, 1),
+                0
+            )
+
+        quantiles = flat_values[lower_indices] + fractions * (
+            flat_values[upper_indices] - flat_values[lower_indices]
+        )
+
+        return quantiles.reshape((len(probabilities),) + self.__shape)
@@ -39,6 +39,11 @@ def check_ndarray_is_tensor(array: ndarray, var_nm: str) -> None:
     if not len(array.shape) == 3:
         raise ValueError("%s must be 3 dimensional" % var_nm)
 
+def check_ndarray_is_matrix_or_tensor(array: ndarray, var_nm: str) -> None:
+
+    if not len(array.shape) in [2, 3]:
+        raise ValueError("%s must be 2 or 3 dimensional" % var_nm)
+
 
 def load_config(name: str) -> Dict:
 
@@ -0,0 +1,62 @@
+# time the budget allocation on random response curves
+# usage: python benchmarks/budget_allocation.py --nb-media 50
+from argparse import ArgumentParser
+from timeit import default_timer
+
+import numpy as np
+
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.optimization.budget_allocator import BudgetAllocator
+
+
+def run() -> None:
+
+    parser = ArgumentParser()
+    parser.add_argument("--nb-media", type=int, default=50)
+    args = parser.parse_args()
+
+    np.random.seed(2021)
+
+    predictor_normalizer = Normalizer("log", "max_abs")
+    predictor_normalizer.fit(np.random.rand(100, args.nb_media) * 1000)
+    target_normalizer = Normalizer("log", "max_abs")
+    target_normalizer.fit(np.random.rand(100, 1) * 1e4)
+
+    diminushing_returns_nm_to_params = {
+        "hill": {
+            "ec": np.random.rand(args.nb_media) * 0.5 + 0.3,
+            "slope": np.random.rand(args.nb_media) * 3 + 0.5
+        },
+        "reach": {"half_saturation": np.random.rand(args.nb_media) * 3 + 0.5}
+    }
+
+    for diminushing_returns_nm, params in diminushing_returns_nm_to_params.items():
+
+        param_nm_to_val = {
+            "retain_rate": np.random.rand(args.nb_media),
+            "beta_medias": np.random.rand(args.nb_media) / args.nb_media,
+            "tau": 0.5
+        }
+        param_nm_to_val.update(params)
+
+        budget_allocator = BudgetAllocator(
+            param_nm_to_val, 13, predictor_normalizer, target_normalizer
+        )
+        budget = 300 * args.nb_media
+
+        start_time = default_timer()
+        spends = budget_allocator.allocate(budget, max_spends=np.full(args.nb_media, 1000.))
+        elapsed_time = default_timer() - start_time
+
+        print("%s | %.3fs | response %.4g (equal split %.4g)" % (
+            diminushing_returns_nm,
+            elapsed_time,
+            budget_allocator.get_response(spends),
+            budget_allocator.get_response(np.full(args.nb_media, budget / args.nb_media))
+        ))
+
+
+
+if __name__ == "__main__":
+
+    run()
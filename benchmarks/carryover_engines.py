@@ -0,0 +1,76 @@
+# time the carryover engines on long lag windows
+# usage: python benchmarks/carryover_engines.py --nb-obs 1800 --nb-media 30 --max-lag 180
+from argparse import ArgumentParser
+from timeit import default_timer
+from typing import Callable, Dict
+
+import numpy as np
+
+from bayesian_mmm.spend_transformation.spend_transformation import (
+    compute_adstock,
+    compute_geo_decay,
+    view_lagged_values_along_z
+)
+
+TRANSFO_NM_TO_ENGINE_NMS = {
+    "adstock": ["lag_window", "fft"],
+    "geo_decay": ["lag_window", "fft", "recursive"]
+}
+TRANSFO_NM_TO_FUNC = {"adstock": compute_adstock, "geo_decay": compute_geo_decay}
+
+
+def time_engine(
+    transfo_func: Callable, lagged_spends: np.ndarray, params: Dict, engine_nm: str
+    ) -> float:
+
+    start_time = default_timer()
+    transfo_func(lagged_spends, engine_nm=engine_nm, **params)
+
+    return default_timer() - start_time
+
+
+def run() -> None:
+
+    parser = ArgumentParser()
+    parser.add_argument("--nb-obs", type=int, default=1800)
+    parser.add_argument("--nb-media", type=int, default=30)
+    parser.add_argument("--max-lag", type=int, default=180)
+    args = parser.parse_args()
+
+    np.random.seed(2021)
+
+    lagged_spends = view_lagged_values_along_z(
+        np.random.rand(args.nb_obs, args.nb_media), args.max_lag
+    )
+    transfo_nm_to_params = {
+        "adstock": {
+            "delays": np.random.rand(args.nb_media) * args.max_lag / 4,
+            "retain_rates": np.random.rand(args.nb_media)
+        },
+        "geo_decay": {"retain_rates": np.random.rand(args.nb_media)}
+    }
+
+    for transfo_nm, engine_nms in TRANSFO_NM_TO_ENGINE_NMS.items():
+
+        transfo_func = TRANSFO_NM_TO_FUNC[transfo_nm]
+        params = transfo_nm_to_params[transfo_nm]
+        reference = transfo_func(lagged_spends, **params)
+
+        for engine_nm in engine_nms:
+
+            max_abs_diff = np.abs(
+                transfo_func(lagged_spends, engine_nm=engine_nm, **params) - reference
+            ).max()
+
+            print("%s %s | %.4fs | max abs diff %.1e" % (
+                transfo_nm,
+                engine_nm,
+                time_engine(transfo_func, lagged_spends, params, engine_nm),
+                max_abs_diff
+            ))
+
+
+
+if __name__ == "__main__":
+
+    run()
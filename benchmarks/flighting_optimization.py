@@ -0,0 +1,73 @@
+# time the flighting schedule optimization on random response curves
+# usage: python benchmarks/flighting_optimization.py --nb-periods 52 --nb-media 30 --max-lag 13
+from argparse import ArgumentParser
+from timeit import default_timer
+
+import numpy as np
+
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.optimization.flighting_optimizer import FlightingOptimizer
+
+
+def run() -> None:
+
+    parser = ArgumentParser()
+    parser.add_argument("--nb-periods", type=int, default=52)
+    parser.add_argument("--nb-media", type=int, default=30)
+    parser.add_argument("--max-lag", type=int, default=13)
+    args = parser.parse_args()
+
+    np.random.seed(2021)
+
+    predictor_normalizer = Normalizer("log", "max_abs")
+    predictor_normalizer.fit(np.random.rand(100, args.nb_media) * 1000)
+    target_normalizer = Normalizer("log", "max_abs")
+    target_normalizer.fit(np.random.rand(100, 1) * 1e4)
+
+    history_spends = np.random.rand(args.max_lag, args.nb_media) * 500
+    budget = 200 * args.nb_periods * args.nb_media
+
+    diminushing_returns_nm_to_params = {
+        "hill": {
+            "ec": np.random.rand(args.nb_media) * 0.5 + 0.3,
+            "slope": np.random.rand(args.nb_media) * 3 + 0.5
+        },
+        "reach": {"half_saturation": np.random.rand(args.nb_media) * 3 + 0.5}
+    }
+
+    for diminushing_returns_nm, params in diminushing_returns_nm_to_params.items():
+
+        param_nm_to_val = {
+            "retain_rate": np.random.rand(args.nb_media),
+            "delay": np.random.rand(args.nb_media) * 2,
+            "beta_medias": np.random.rand(args.nb_media) / args.nb_media,
+            "tau": 0.5
+        }
+        param_nm_to_val.update(params)
+
+        flighting_optimizer = FlightingOptimizer(
+            param_nm_to_val, args.max_lag, predictor_normalizer, target_normalizer
+        )
+
+        start_time = default_timer()
+        schedule = flighting_optimizer.optimize(
+            budget, history_spends, args.nb_periods, max_spends=600.
+        )
+        elapsed_time = default_timer() - start_time
+
+        flat_schedule = np.full(
+            (args.nb_periods, args.nb_media), budget / args.nb_periods / args.nb_media
+        )
+
+        print("%s | %.3fs | total response %.6g (flat schedule %.6g)" % (
+            diminushing_returns_nm,
+            elapsed_time,
+            flighting_optimizer.get_response(schedule, history_spends).sum(),
+            flighting_optimizer.get_response(flat_schedule, history_spends).sum()
+        ))
+
+
+
+if __name__ == "__main__":
+
+    run()
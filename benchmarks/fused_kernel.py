@@ -0,0 +1,62 @@
+# time the fused kernel, with and without numba, vs InferenceMachine.predict
+# usage: python benchmarks/fused_kernel.py --nb-obs 260 --nb-media 30 --nb-calls 1000
+from argparse import ArgumentParser
+from timeit import default_timer
+
+import numpy as np
+
+from bayesian_mmm.inference_machine.fused_inference_machine import (
+    FusedInferenceMachine,
+    NUMBA_IS_AVAILABLE
+)
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+
+
+def run() -> None:
+
+    parser = ArgumentParser()
+    parser.add_argument("--nb-obs", type=int, default=260)
+    parser.add_argument("--nb-media", type=int, default=30)
+    parser.add_argument("--max-lag", type=int, default=13)
+    parser.add_argument("--nb-calls", type=int, default=1000)
+    args = parser.parse_args()
+
+    np.random.seed(2021)
+
+    param_nm_to_val = {
+        "retain_rate": np.random.rand(args.nb_media),
+        "delay": np.random.rand(args.nb_media) * 2,
+        "ec": np.random.rand(args.nb_media) * 0.5 + 0.2,
+        "slope": np.random.rand(args.nb_media) * 3 + 0.5,
+        "beta_medias": np.random.rand(args.nb_media) / args.nb_media,
+        "tau": 0.5
+    }
+    spends = np.random.rand(args.nb_obs, args.nb_media)
+
+    inference_machines = [("predict", InferenceMachine(param_nm_to_val, args.max_lag))]
+    inference_machines.append(
+        ("fused numpy", FusedInferenceMachine(param_nm_to_val, args.max_lag, False))
+    )
+    if NUMBA_IS_AVAILABLE:
+        inference_machines.append(
+            ("fused numba", FusedInferenceMachine(param_nm_to_val, args.max_lag, True))
+        )
+
+    for inference_machine_nm, inference_machine in inference_machines:
+
+        # first call out of the timing, it compiles the numba kernel
+        inference_machine.predict(spends, None)
+
+        start_time = default_timer()
+        for _ in range(args.nb_calls):
+            inference_machine.predict(spends, None)
+        print(
+            "%s | %.1fus per call"
+            % (inference_machine_nm, (default_timer() - start_time) / args.nb_calls * 1e6)
+        )
+
+
+
+if __name__ == "__main__":
+
+    run()
@@ -0,0 +1,76 @@
+# time the closed form inverse response vs a bisection on InferenceMachine.predict
+# usage: python benchmarks/inverse_response.py --nb-targets 10000 --nb-media 30
+from argparse import ArgumentParser
+from timeit import default_timer
+
+import numpy as np
+
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.response_analysis.inverse_response import InverseResponseCalculator
+
+
+def run() -> None:
+
+    parser = ArgumentParser()
+    parser.add_argument("--nb-targets", type=int, default=10000)
+    parser.add_argument("--nb-media", type=int, default=30)
+    parser.add_argument("--max-lag", type=int, default=13)
+    parser.add_argument("--nb-bisection-iter", type=int, default=50)
+    parser.add_argument("--nb-bisection-targets", type=int, default=5)
+    args = parser.parse_args()
+
+    np.random.seed(2021)
+
+    param_nm_to_val = {
+        "retain_rate": np.random.rand(args.nb_media),
+        "delay": np.random.rand(args.nb_media) * 2,
+        "half_saturation": np.random.rand(args.nb_media) * 3 + 0.5,
+        "beta_medias": np.random.rand(args.nb_media) / args.nb_media,
+        "tau": 0.5
+    }
+    predictor_normalizer = Normalizer("log", "max_abs")
+    predictor_normalizer.fit(np.random.rand(100, args.nb_media) * 1e3)
+    target_normalizer = Normalizer("log", "max_abs")
+    target_normalizer.fit(np.random.rand(100, 1) * 1e4)
+
+    inverse_response_calculator = InverseResponseCalculator(
+        param_nm_to_val, args.max_lag, predictor_normalizer, target_normalizer
+    )
+    incremental_outcomes = inverse_response_calculator.get_incremental_outcomes(
+        np.random.rand(args.nb_targets, args.nb_media) * 1e3
+    )
+
+    start_time = default_timer()
+    inverse_response_calculator.get_required_spends(incremental_outcomes)
+    print(
+        "closed form | %.2fus per target and media"
+        % ((default_timer() - start_time) / incremental_outcomes.size * 1e6)
+    )
+
+    # bisection on the contribution of the last of max_lag periods of constant spends
+    start_time = default_timer()
+    for target_incremental_outcomes in incremental_outcomes[:args.nb_bisection_targets]:
+        for media_index in range(args.nb_media):
+            low, high = 0., 1e4
+            for _ in range(args.nb_bisection_iter):
+                mid = (low + high) / 2
+                values = np.zeros((args.max_lag, args.nb_media))
+                values[:, media_index] = mid
+                y = inverse_response_calculator.predict(predictor_normalizer.transform(values), None)
+                contribution = target_normalizer.reverse_transform(
+                    np.array([[y[-1] - param_nm_to_val["tau"]]])
+                    )[0, 0]
+                if contribution < target_incremental_outcomes[media_index]:
+                    low = mid
+                else:
+                    high = mid
+    print(
+        "bisection on predict | %.2fus per target and media"
+        % ((default_timer() - start_time) / (args.nb_bisection_targets * args.nb_media) * 1e6)
+    )
+
+
+
+if __name__ == "__main__":
+
+    run()
@@ -0,0 +1,60 @@
+# time and peak memory of the dense lagged spends tensor vs the strided view
+# usage: python benchmarks/lagged_values.py --nb-media 20 --max-lag 13
+from argparse import ArgumentParser
+from timeit import default_timer
+from tracemalloc import get_traced_memory, start, stop
+from typing import Callable, Tuple
+
+import numpy as np
+
+from bayesian_mmm.spend_transformation.spend_transformation import (
+    add_lagged_values_along_z,
+    compute_geo_decay,
+    view_lagged_values_along_z
+)
+
+NB_OBS_GRID = [1000, 10000, 100000]
+
+
+def measure(func: Callable, spends: np.ndarray, max_lag: int) -> Tuple[float, float]:
+
+    retain_rates = np.full(spends.shape[1], 0.5)
+
+    start()
+    start_time = default_timer()
+    compute_geo_decay(func(spends, max_lag), retain_rates)
+    elapsed_time = default_timer() - start_time
+    _, peak_memory = get_traced_memory()
+    stop()
+
+    return elapsed_time, peak_memory / 1024 ** 2
+
+
+def run() -> None:
+
+    parser = ArgumentParser()
+    parser.add_argument("--nb-media", type=int, default=20)
+    parser.add_argument("--max-lag", type=int, default=13)
+    args = parser.parse_args()
+
+    print("nb obs | dense (lag + geo decay) | view (lag + geo decay)")
+
+    for nb_obs in NB_OBS_GRID:
+
+        spends = np.random.rand(nb_obs, args.nb_media)
+
+        results = [
+            measure(func, spends, args.max_lag)
+            for func in [add_lagged_values_along_z, view_lagged_values_along_z]
+        ]
+
+        print("%d | %s" % (
+            nb_obs,
+            " | ".join(["%.3fs %.1fMB" % result for result in results])
+        ))
+
+
+
+if __name__ == "__main__":
+
+    run()
@@ -0,0 +1,72 @@
+# time the analytical marginal roi curves vs finite differences of posterior predictions
+# usage: python benchmarks/marginal_roi.py --nb-draws 4000 --nb-media 30
+from argparse import ArgumentParser
+from timeit import default_timer
+
+import numpy as np
+
+from bayesian_mmm.inference_machine.posterior_inference_machine import PosteriorInferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.response_analysis.marginal_roi import compute_marginal_roi
+
+
+def run() -> None:
+
+    parser = ArgumentParser()
+    parser.add_argument("--nb-draws", type=int, default=4000)
+    parser.add_argument("--nb-media", type=int, default=30)
+    parser.add_argument("--nb-grid-points", type=int, default=100)
+    parser.add_argument("--max-lag", type=int, default=13)
+    parser.add_argument("--media-chunk-size", type=int, default=5)
+    args = parser.parse_args()
+
+    np.random.seed(2021)
+
+    sampling_results = {
+        "retain_rate": np.random.rand(args.nb_draws, args.nb_media),
+        "delay": np.random.rand(args.nb_draws, args.nb_media) * 2,
+        "half_saturation": np.random.rand(args.nb_draws, args.nb_media) * 3 + 0.5,
+        "beta_medias": np.random.rand(args.nb_draws, args.nb_media) / args.nb_media,
+        "tau": np.random.rand(args.nb_draws)
+    }
+    max_spends = np.full(args.nb_media, 1e3)
+
+    predictor_normalizer = Normalizer("log", "max_abs")
+    predictor_normalizer.fit(np.random.rand(100, args.nb_media) * 1e3)
+    target_normalizer = Normalizer("log", "max_abs")
+    target_normalizer.fit(np.random.rand(100, 1) * 1e4)
+
+    start_time = default_timer()
+    compute_marginal_roi(
+        sampling_results,
+        predictor_normalizer,
+        target_normalizer,
+        max_spends,
+        args.nb_grid_points,
+        media_chunk_size=args.media_chunk_size
+    )
+    print("analytical | %.3fs" % (default_timer() - start_time))
+
+    # two posterior predictions of max_lag periods of constant spends per media and grid point,
+    # timed on one media and extrapolated to all of them
+    posterior_inference_machine = PosteriorInferenceMachine(sampling_results, args.max_lag)
+    eps = 1e-3
+    start_time = default_timer()
+    for spend in np.linspace(0, 1e3, args.nb_grid_points):
+        preds = []
+        for shifted_spend in [spend + eps, max(spend - eps, 0)]:
+            values = np.zeros((args.max_lag, args.nb_media))
+            values[:, 0] = shifted_spend
+            preds.append(posterior_inference_machine.predict_draws(
+                predictor_normalizer.transform(values), None, 500
+            )[:, -1])
+    print(
+        "finite differences | %.3fs (extrapolated from one media)"
+        % ((default_timer() - start_time) * args.nb_media)
+    )
+
+
+
+if __name__ == "__main__":
+
+    run()
@@ -0,0 +1,76 @@
+# time the response surface build and its lookups vs a posterior steady state prediction
+# usage: python benchmarks/response_surface.py --nb-draws 4000 --nb-media 30
+from argparse import ArgumentParser
+from timeit import default_timer
+
+import numpy as np
+
+from bayesian_mmm.inference_machine.posterior_inference_machine import PosteriorInferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.response_analysis.response_surface import create_response_surface
+
+
+def run() -> None:
+
+    parser = ArgumentParser()
+    parser.add_argument("--nb-draws", type=int, default=4000)
+    parser.add_argument("--nb-media", type=int, default=30)
+    parser.add_argument("--nb-grid-points", type=int, default=200)
+    parser.add_argument("--nb-lookups", type=int, default=10000)
+    args = parser.parse_args()
+
+    np.random.seed(2021)
+
+    sampling_results = {
+        "retain_rate": np.random.rand(args.nb_draws, args.nb_media),
+        "delay": np.random.rand(args.nb_draws, args.nb_media) * 2,
+        "half_saturation": np.random.rand(args.nb_draws, args.nb_media) * 3 + 0.5,
+        "beta_medias": np.random.rand(args.nb_draws, args.nb_media) / args.nb_media,
+        "tau": np.random.rand(args.nb_draws)
+    }
+    max_spends = np.full(args.nb_media, 1e3)
+    media_nms = ["media_%d" % media_index for media_index in range(args.nb_media)]
+
+    predictor_normalizer = Normalizer("log", "max_abs")
+    predictor_normalizer.fit(np.random.rand(100, args.nb_media) * 1e3)
+    target_normalizer = Normalizer("log", "max_abs")
+    target_normalizer.fit(np.random.rand(100, 1) * 1e4)
+
+    start_time = default_timer()
+    response_surface = create_response_surface(
+        sampling_results,
+        predictor_normalizer,
+        target_normalizer,
+        media_nms,
+        max_spends,
+        args.nb_grid_points
+    )
+    print("response surface build | %.3fs" % (default_timer() - start_time))
+
+    spends = np.random.rand(args.nb_lookups) * 1e3
+    start_time = default_timer()
+    for spend in spends:
+        response_surface.get_response(media_nms[0], spend)
+    print(
+        "response surface lookup | %.1fus per lookup"
+        % ((default_timer() - start_time) / args.nb_lookups * 1e6)
+    )
+
+    # a steady state prediction of one spend level needs max_lag constant periods
+    posterior_inference_machine = PosteriorInferenceMachine(sampling_results, 13)
+    nb_predictions = 10
+    start_time = default_timer()
+    for spend in spends[:nb_predictions]:
+        posterior_inference_machine.predict_bands(
+            np.full((13, args.nb_media), spend / 1e3), None, [0.5], 500
+        )
+    print(
+        "posterior prediction | %.1fus per prediction"
+        % ((default_timer() - start_time) / nb_predictions * 1e6)
+    )
+
+
+
+if __name__ == "__main__":
+
+    run()
@@ -0,0 +1,62 @@
+# time the batched scenario engine vs one predict call per plan
+# usage: python benchmarks/scenarios.py --nb-plans 2000 --nb-periods 52 --nb-media 30
+from argparse import ArgumentParser
+from timeit import default_timer
+
+import numpy as np
+
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.scenario_analysis.scenario_engine import ScenarioEngine, run_scenarios
+
+
+def run() -> None:
+
+    parser = ArgumentParser()
+    parser.add_argument("--nb-plans", type=int, default=2000)
+    parser.add_argument("--nb-periods", type=int, default=52)
+    parser.add_argument("--nb-media", type=int, default=30)
+    parser.add_argument("--max-lag", type=int, default=13)
+    parser.add_argument("--nb-processes", type=int, default=4)
+    args = parser.parse_args()
+
+    np.random.seed(2021)
+
+    param_nm_to_val = {
+        "retain_rate": np.random.rand(args.nb_media),
+        "delay": np.random.rand(args.nb_media) * 2,
+        "half_saturation": np.random.rand(args.nb_media) * 3 + 0.5,
+        "beta_medias": np.random.rand(args.nb_media) / args.nb_media,
+        "tau": 0.5
+    }
+    target_normalizer = Normalizer("log", "max_abs")
+    target_normalizer.fit(np.random.rand(100, 1) * 1e4)
+
+    plans = np.random.rand(args.nb_plans, args.nb_periods, args.nb_media)
+    prefix_spends = np.random.rand(args.max_lag, args.nb_media)
+
+    inference_machine = InferenceMachine(param_nm_to_val, args.max_lag)
+    start_time = default_timer()
+    for plan in plans:
+        inference_machine.predict(np.concatenate([prefix_spends, plan]), None)
+    print("one predict per plan | %.3fs" % (default_timer() - start_time))
+
+    scenario_engine = ScenarioEngine(param_nm_to_val, args.max_lag)
+
+    for nb_processes in [1, args.nb_processes]:
+        start_time = default_timer()
+        run_scenarios(
+            scenario_engine,
+            target_normalizer,
+            plans,
+            prefix_spends=prefix_spends,
+            nb_processes=nb_processes,
+            min_nb_lagged_spends_per_process=0 # the pool is timed whatever the work
+        )
+        print("run_scenarios, %d process(es) | %.3fs" % (nb_processes, default_timer() - start_time))
+
+
+
+if __name__ == "__main__":
+
+    run()
@@ -0,0 +1,109 @@
+# peak RSS after sampling with the mean response saved as transformed parameters
+# (previous generated models) vs kept as local variables with only the relevant
+# params requested to stan
+# usage: python benchmarks/stan_extraction_memory.py --nb-obs 1000 --nb-media 50 --n-iter 1000
+from argparse import ArgumentParser
+from multiprocessing import get_context
+from resource import RUSAGE_SELF, getrusage
+from typing import Dict
+
+import numpy as np
+
+from bayesian_mmm.sampling.sampler import Sampler
+from bayesian_mmm.sampling.stan_model_generator import StanModelGenerator
+from bayesian_mmm.sampling.stan_model_wrapper import StanModelWrapper
+
+CARRYOVER_TRANSFO_NM = "adstock"
+DIMINUSHING_RETURNS_TRANSFO_NM = "hill"
+MAX_LAG = 13
+
+
+def create_code(with_transformed_parameters: bool) -> str:
+
+    stan_model_generator = StanModelGenerator(
+        CARRYOVER_TRANSFO_NM, DIMINUSHING_RETURNS_TRANSFO_NM, False, vectorized=True
+    )
+    stan_model_generator._StanModelGenerator__create_functions_code()
+    stan_model_generator._StanModelGenerator__create_data_code()
+    stan_model_generator._StanModelGenerator__create_parameters_code()
+    stan_model_generator._StanModelGenerator__create_model_code()
+
+    code_blocks = [
+        stan_model_generator._StanModelGenerator__function_code,
+        stan_model_generator._StanModelGenerator__data_code,
+        stan_model_generator._StanModelGenerator__parameters_code
+    ]
+    model_code = stan_model_generator._StanModelGenerator__model_code
+
+    if with_transformed_parameters:
+        # the mean response moved back from the model block to the transformed parameters
+        mean_response_code = stan_model_generator._StanModelGenerator__get_mean_response_code()
+        code_blocks.append("transformed parameters {\n%s}" % mean_response_code)
+        model_code = model_code.replace(mean_response_code, "")
+
+    return "\n".join(code_blocks + [model_code])
+
+
+def measure_peak_rss(
+    with_transformed_parameters: bool, args: Dict, n_iter: int, chains: int
+    ) -> Dict:
+
+    stan_model = StanModelWrapper(code=create_code(with_transformed_parameters))
+    stan_model.compile()
+
+    sampler = Sampler(stan_model, MAX_LAG)
+    sampler.create_stan_input(args["spends"], None, args["revenue"])
+
+    rss_before_sampling = getrusage(RUSAGE_SELF).ru_maxrss
+
+    if with_transformed_parameters:
+        # everything saved by stan is extracted, as before
+        sampling_results = stan_model.sample(sampler._Sampler__args, n_iter, chains)
+    else:
+        sampling_results = sampler.run_sampling(n_iter, chains)
+
+    return {
+        "rss_before_sampling_mb": rss_before_sampling / 1e3,
+        "peak_rss_mb": getrusage(RUSAGE_SELF).ru_maxrss / 1e3,
+        "extracted_mb": sum(values.nbytes for values in sampling_results.values()) / 1e6
+    }
+
+
+def run() -> None:
+
+    parser = ArgumentParser()
+    parser.add_argument("--nb-obs", type=int, default=1000)
+    parser.add_argument("--nb-media", type=int, default=50)
+    parser.add_argument("--n-iter", type=int, default=1000)
+    parser.add_argument("--chains", type=int, default=3)
+    args = parser.parse_args()
+
+    np.random.seed(2021)
+    sampling_args = {
+        "spends": np.random.rand(args.nb_obs, args.nb_media),
+        "revenue": np.random.rand(args.nb_obs)
+    }
+
+    print("mean response | rss before sampling | peak rss | extracted draws")
+
+    # one fresh process per variant, so that the peak RSS of one does not hide the other
+    with get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        for mode_nm, with_transformed_parameters in [
+            ("transformed parameters", True), ("model locals", False)
+            ]:
+            result = pool.apply(
+                measure_peak_rss,
+                (with_transformed_parameters, sampling_args, args.n_iter, args.chains)
+            )
+            print("%s | %.0fMB | %.0fMB | %.1fMB" % (
+                mode_nm,
+                result["rss_before_sampling_mb"],
+                result["peak_rss_mb"],
+                result["extracted_mb"]
+            ))
+
+
+
+if __name__ == "__main__":
+
+    run()
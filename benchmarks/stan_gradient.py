@@ -0,0 +1,113 @@
+# time the log density gradient of the generated stan models
+# usage: python benchmarks/stan_gradient.py --nb-obs 500 --nb-media 10 --max-lag 13
+from argparse import ArgumentParser
+from itertools import product
+from timeit import default_timer
+from typing import Dict
+
+import numpy as np
+
+from bayesian_mmm.sampling.stan_model_generator import StanModelGenerator
+from bayesian_mmm.spend_transformation.spend_transformation import add_lagged_values_along_z
+
+GENERATOR_MODE_NM_TO_KWARGS = {
+    "reference": {},
+    "vectorized": {"vectorized": True},
+    "convolution": {"vectorized": True, "with_lagged_spends": False}
+}
+NB_CTRL = 2
+
+
+def create_stan_input(
+    spends: np.ndarray, max_lag: int, with_ctrl_vars: bool, with_lagged_spends: bool
+    ) -> Dict:
+
+    nb_obs, nb_media = spends.shape
+
+    args = {
+        "N": nb_obs,
+        "Y": np.random.rand(nb_obs),
+        "max_lag": max_lag,
+        "num_media": nb_media,
+        "X_media": add_lagged_values_along_z(spends, max_lag) if with_lagged_spends else spends
+    }
+
+    if with_ctrl_vars:
+        args.update({"num_ctrl": NB_CTRL, "X_ctrl": np.random.rand(nb_obs, NB_CTRL)})
+
+    return args
+
+
+def time_gradient(
+    generator_kwargs: Dict, stan_input: Dict, nb_repeats: int
+    ) -> float:
+
+    stan_model_generator = StanModelGenerator(**generator_kwargs)
+    stan_model_generator.create_model()
+    stan_model = stan_model_generator.get_model()._StanModelWrapper__model
+
+    fit = stan_model.sampling(
+        data=stan_input, iter=1, chains=1, algorithm="Fixed_param", seed=2021
+    )
+    upars = fit.unconstrain_pars(fit.get_last_position()[0])
+
+    start = default_timer()
+    for _ in range(nb_repeats):
+        fit.grad_log_prob(upars)
+
+    return (default_timer() - start) / nb_repeats
+
+
+def run() -> None:
+
+    parser = ArgumentParser()
+    parser.add_argument("--nb-obs", type=int, default=500)
+    parser.add_argument("--nb-media", type=int, default=10)
+    parser.add_argument("--max-lag", type=int, default=13)
+    parser.add_argument("--nb-repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    np.random.seed(2021)
+
+    print("variant | " + " | ".join(GENERATOR_MODE_NM_TO_KWARGS.keys()) + " | speedup")
+
+    for carryover_transfo_nm, diminushing_returns_transfo_nm, with_ctrl_vars in product(
+        ["adstock", "geo_decay"], ["hill", "reach"], [True, False]
+        ):
+
+        spends = np.random.rand(args.nb_obs, args.nb_media)
+
+        timings = []
+
+        for mode_kwargs in GENERATOR_MODE_NM_TO_KWARGS.values():
+
+            generator_kwargs = {
+                "carryover_transfo_nm": carryover_transfo_nm,
+                "diminushing_returns_transfo_nm": diminushing_returns_transfo_nm,
+                "with_ctrl_vars": with_ctrl_vars
+            }
+            generator_kwargs.update(mode_kwargs)
+
+            np.random.seed(2021)
+            stan_input = create_stan_input(
+                spends,
+                args.max_lag,
+                with_ctrl_vars,
+                mode_kwargs.get("with_lagged_spends", True)
+            )
+
+            timings.append(time_gradient(generator_kwargs, stan_input, args.nb_repeats))
+
+        print("%s %s ctrl=%s | %s | x%.1f" % (
+            carryover_transfo_nm,
+            diminushing_returns_transfo_nm,
+            with_ctrl_vars,
+            " | ".join(["%.1fus" % (timing * 1e6) for timing in timings]),
+            timings[0] / min(timings[1:])
+        ))
+
+
+
+if __name__ == "__main__":
+
+    run()
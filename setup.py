@@ -11,9 +11,15 @@ setup(
     keywords= "bayesian media mix modeling stan sampling carryover shape effect",
     packages= find_packages(exclude=("tests", "docs")),
     python_requires= ">=3.7",
+    extras_require= {
+        'numba': ['numba'],
+        'arrow': ['pyarrow'],
+    },
     entry_points= {
     'console_scripts': [
         'train_bayesian_mmm=bayesian_mmm.train:run',
+        'prebuild_bayesian_mmm=bayesian_mmm.prebuild:run',
+        'serve_bayesian_mmm=bayesian_mmm.serving.scoring_server:run',
         ]
     }
 )
\ No newline at end of file
@@ -85,11 +85,180 @@ def test_get_normalized_contributions(
         MEDIA_NMS,
         ctrl_nms
         )
-    normalized_contributions = contribution_calculator._ContributionCalculator__get_normalized_results(
+    normalized_contributions = contribution_calculator._get_normalized_results(
         SPENDS, ctrl_vars
         )
     normalized_pred = contribution_calculator.predict(
         SPENDS, ctrl_vars
     )
 
-    assert np.allclose(normalized_contributions.sum(axis=1), normalized_pred) #allclose to ignore precision differences
\ No newline at end of file
+    assert np.allclose(normalized_contributions.sum(axis=1), normalized_pred) #allclose to ignore precision differences
+
+@pytest.mark.parametrize(
+    "with_ctrl_vars,predictor_transfo_nm",
+    [(True, None), (False, None), (True, "log"), (False, "sqrt")]
+)
+def test_compute_counterfactuals(with_ctrl_vars, predictor_transfo_nm):
+
+    param_nm_to_val = {
+        "retain_rate":RETAIN_RATES,
+        "delay":DELAYS,
+        "half_saturation":HALF_SATURATIONS,
+        "beta_medias":BETA_MEDIAS,
+        "gamma_ctrl":GAMMA_CTRLS,
+        "tau":TAU
+    }
+    ctrl_vars = CTRL_VARS if with_ctrl_vars else None
+    scaling_factors = [0, 0.9, 1.1]
+    datetime_index = np.arange(len(SPENDS))
+
+    target_normalizer = Normalizer("log", "max_abs")
+    target_normalizer.fit(np.array([[1], [5]]))
+
+    predictor_normalizer = Normalizer(predictor_transfo_nm, "max_abs")
+    predictor_normalizer.fit(np.column_stack([SPENDS, CTRL_VARS]))
+    normalized_spends = predictor_normalizer.transform(np.column_stack([SPENDS, CTRL_VARS]))[:, :2]
+
+    contribution_calculator = ContributionCalculator(
+        param_nm_to_val,
+        3,
+        target_normalizer,
+        MEDIA_NMS,
+        CTRL_NMS if with_ctrl_vars else [],
+        predictor_normalizer=predictor_normalizer
+        )
+    contribution_calculator.compute_counterfactuals(
+        normalized_spends, ctrl_vars, datetime_index, scaling_factors
+    )
+    counterfactuals = contribution_calculator.get_counterfactuals()
+
+    assert len(counterfactuals) == len(scaling_factors) * len(MEDIA_NMS) * len(SPENDS)
+
+    pred = target_normalizer.reverse_transform(
+        contribution_calculator.predict(normalized_spends, ctrl_vars).reshape((-1, 1))
+        )[:, 0]
+
+    # each counterfactual is the prediction on the spends of one media scaled, then normalized
+    for scaling_factor in scaling_factors:
+        for media_index, media_nm in enumerate(MEDIA_NMS):
+
+            scaled_predictors = np.column_stack([SPENDS, CTRL_VARS]).astype(float)
+            scaled_predictors[:, media_index] *= scaling_factor
+            scaled_spends = predictor_normalizer.transform(scaled_predictors)[:, :2]
+            expected_counterfactual_pred = target_normalizer.reverse_transform(
+                contribution_calculator.predict(scaled_spends, ctrl_vars).reshape((-1, 1))
+                )[:, 0]
+
+            media_counterfactuals = counterfactuals[
+                (counterfactuals["scaling_factor"] == scaling_factor)
+                & (counterfactuals["media_nm"] == media_nm)
+            ]
+
+            assert np.array_equal(media_counterfactuals["date"].values, datetime_index)
+            assert np.allclose(media_counterfactuals["pred"].values, pred)
+            assert np.allclose(
+                media_counterfactuals["counterfactual_pred"].values, expected_counterfactual_pred
+            )
+            assert np.allclose(
+                media_counterfactuals["incremental_effect"].values,
+                pred - expected_counterfactual_pred
+            )
+
+
+def test_compute_counterfactuals_input_error():
+
+    contribution_calculator = ContributionCalculator(
+        {"retain_rate": RETAIN_RATES, "half_saturation": HALF_SATURATIONS,
+         "beta_medias": BETA_MEDIAS, "tau": TAU},
+        3,
+        REVENUE_NORMALIZER,
+        MEDIA_NMS,
+        []
+        )
+
+    with pytest.raises(ValueError):
+        contribution_calculator.compute_counterfactuals(SPENDS, None, np.arange(len(SPENDS)))
+
+
+@pytest.mark.parametrize("max_exact_nb_contributors", [12, 2])
+def test_compute_results_shapley(max_exact_nb_contributors):
+
+    param_nm_to_val = {
+        "retain_rate":RETAIN_RATES,
+        "ec":ECS,
+        "slope":SLOPES,
+        "beta_medias":BETA_MEDIAS,
+        "gamma_ctrl":GAMMA_CTRLS,
+        "tau":TAU
+    }
+
+    target_normalizer = Normalizer("log", "max_abs")
+    target_normalizer.fit(np.array([[1], [5]]))
+
+    contribution_calculator = ContributionCalculator(
+        param_nm_to_val,
+        3,
+        target_normalizer,
+        MEDIA_NMS,
+        CTRL_NMS,
+        attribution_nm="shapley",
+        max_exact_nb_contributors=max_exact_nb_contributors
+        )
+    contribution_calculator.compute_results(SPENDS / 40, CTRL_VARS / 7, np.arange(len(SPENDS)))
+    contributions = contribution_calculator.get_results()
+
+    pred = target_normalizer.reverse_transform(
+        contribution_calculator.predict(SPENDS / 40, CTRL_VARS / 7).reshape((-1, 1))
+        )[:, 0]
+
+    # with a log transfo of the target, the contributions sum to the prediction
+    assert list(contributions.columns) == MEDIA_NMS + CTRL_NMS + ["baseline"]
+    assert np.allclose(contributions.sum(axis=1).values, pred)
+
+
+def test_compute_results_shapley_seed():
+
+    param_nm_to_val = {
+        "retain_rate":RETAIN_RATES,
+        "ec":ECS,
+        "slope":SLOPES,
+        "beta_medias":BETA_MEDIAS,
+        "gamma_ctrl":GAMMA_CTRLS,
+        "tau":TAU
+    }
+
+    target_normalizer = Normalizer("log", "max_abs")
+    target_normalizer.fit(np.array([[1], [5]]))
+
+    # the permutations are sampled, the contributions only depend on the seed
+    contributions = []
+    for seed in [2021, 2021, 2022]:
+        contribution_calculator = ContributionCalculator(
+            param_nm_to_val,
+            3,
+            target_normalizer,
+            MEDIA_NMS,
+            CTRL_NMS,
+            attribution_nm="shapley",
+            max_exact_nb_contributors=2,
+            nb_permutations=4,
+            seed=seed
+            )
+        contribution_calculator.compute_results(SPENDS / 40, CTRL_VARS / 7, np.arange(len(SPENDS)))
+        contributions.append(contribution_calculator.get_results().values)
+
+    assert np.array_equal(contributions[0], contributions[1])
+    assert not np.allclose(contributions[0], contributions[2])
+
+
+def test_contribution_calculator_input_error():
+
+    with pytest.raises(ValueError):
+        ContributionCalculator(
+            {"retain_rate":RETAIN_RATES, "half_saturation":HALF_SATURATIONS, "beta_medias":BETA_MEDIAS, "tau":TAU},
+            3,
+            REVENUE_NORMALIZER,
+            MEDIA_NMS,
+            [],
+            attribution_nm="banzhaf"
+        )
@@ -0,0 +1,101 @@
+from os import makedirs
+
+import pytest
+import numpy as np
+
+from bayesian_mmm.contribution_analysis.contribution_calculator import ContributionCalculator
+from bayesian_mmm.contribution_analysis.posterior_contribution_calculator import (
+    PosteriorContributionCalculator
+)
+from bayesian_mmm.normalizer.normalizer import Normalizer
+
+
+MAX_LAG = 3
+NB_DRAWS = 400
+MEDIA_NMS = ["radio", "tv"]
+CTRL_NMS = ["consumer_index"]
+DATETIME_INDEX = np.arange(6)
+
+np.random.seed(2021)
+SPENDS = np.random.rand(6, 2)
+CTRL_VARS = np.random.rand(6, 1)
+SAMPLING_RESULTS = {
+    "retain_rate": np.random.rand(NB_DRAWS, 2),
+    "delay": np.random.rand(NB_DRAWS, 2),
+    "half_saturation": np.random.rand(NB_DRAWS, 2) * 3,
+    "beta_medias": np.random.rand(NB_DRAWS, 2),
+    "gamma_ctrl": np.random.rand(NB_DRAWS, 1),
+    "tau": np.random.rand(NB_DRAWS)
+}
+
+TARGET_NORMALIZER = Normalizer("log", "max_abs")
+TARGET_NORMALIZER.fit(np.array([[1], [5]]))
+
+
+def get_draw_contributions():
+
+    draw_contributions = []
+
+    for draw_index in range(NB_DRAWS):
+        contribution_calculator = ContributionCalculator(
+            {param_nm: values[draw_index] for param_nm, values in SAMPLING_RESULTS.items()},
+            MAX_LAG,
+            TARGET_NORMALIZER,
+            MEDIA_NMS,
+            CTRL_NMS
+        )
+        contribution_calculator.compute_results(SPENDS, CTRL_VARS, DATETIME_INDEX)
+        draw_contributions.append(contribution_calculator.get_results().values)
+
+    return np.array(draw_contributions)
+
+
+@pytest.mark.parametrize("draws_chunk_size", [None, 64])
+def test_compute_results(draws_chunk_size):
+
+    posterior_contribution_calculator = PosteriorContributionCalculator(
+        SAMPLING_RESULTS, MAX_LAG, TARGET_NORMALIZER, MEDIA_NMS, CTRL_NMS, quantiles=[0.1, 0.9]
+    )
+    posterior_contribution_calculator.compute_results(
+        SPENDS, CTRL_VARS, DATETIME_INDEX, draws_chunk_size
+    )
+    stat_nm_to_contributions = posterior_contribution_calculator.get_results()
+
+    draw_contributions = get_draw_contributions()
+    expected_quantiles = np.quantile(draw_contributions, [0.1, 0.9], axis=0)
+
+    assert list(stat_nm_to_contributions.keys()) == ["mean", "quantile_0.1", "quantile_0.9"]
+    for contributions in stat_nm_to_contributions.values():
+        assert list(contributions.columns) == MEDIA_NMS + CTRL_NMS + ["baseline"]
+        assert np.array_equal(contributions.index.values, DATETIME_INDEX)
+
+    assert np.allclose(stat_nm_to_contributions["mean"].values, draw_contributions.mean(axis=0))
+    # running quantiles are estimates
+    spread = expected_quantiles[1] - expected_quantiles[0]
+    assert (np.abs(stat_nm_to_contributions["quantile_0.1"].values - expected_quantiles[0]) < 0.1 * spread + 1e-9).all()
+    assert (np.abs(stat_nm_to_contributions["quantile_0.9"].values - expected_quantiles[1]) < 0.1 * spread + 1e-9).all()
+
+
+def test_write_results(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    makedirs("results")
+
+    posterior_contribution_calculator = PosteriorContributionCalculator(
+        SAMPLING_RESULTS, MAX_LAG, TARGET_NORMALIZER, MEDIA_NMS, []
+    )
+    posterior_contribution_calculator.compute_results(SPENDS, None, DATETIME_INDEX, 100)
+    posterior_contribution_calculator.write_results("test")
+
+    for stat_nm in ["mean", "quantile_0.05", "quantile_0.95"]:
+        assert (tmp_path / "results" / ("contributions_%s_test.csv" % stat_nm)).exists()
+
+
+def test_compute_results_input_error():
+
+    posterior_contribution_calculator = PosteriorContributionCalculator(
+        SAMPLING_RESULTS, MAX_LAG, TARGET_NORMALIZER, MEDIA_NMS, CTRL_NMS
+    )
+
+    with pytest.raises(ValueError):
+        posterior_contribution_calculator.compute_results(SPENDS, CTRL_VARS, DATETIME_INDEX, 0)
@@ -0,0 +1,94 @@
+from itertools import permutations
+
+import pytest
+import numpy as np
+
+from bayesian_mmm.contribution_analysis.shapley_attribution import (
+    compute_exact_shapley_values,
+    compute_sampled_shapley_values,
+    compute_shapley_values
+)
+
+np.random.seed(2021)
+CONTRIBUTIONS = np.random.rand(6, 4) - 0.2
+BASELINE = np.random.rand(6)
+
+
+def value_func(values):
+
+    return np.exp(2 * values) - 1
+
+
+def get_brute_force_shapley_values(contributions, baseline):
+
+    nb_obs, nb_contributors = contributions.shape
+    shapley_values = np.zeros((nb_obs, nb_contributors))
+    all_permutations = list(permutations(range(nb_contributors)))
+
+    for permutation in all_permutations:
+        values = baseline.copy()
+        for contributor_index in permutation:
+            shapley_values[:, contributor_index] += (
+                value_func(values + contributions[:, contributor_index]) - value_func(values)
+            )
+            values = values + contributions[:, contributor_index]
+
+    return shapley_values / len(all_permutations)
+
+
+def test_compute_exact_shapley_values():
+
+    shapley_values = compute_exact_shapley_values(CONTRIBUTIONS, BASELINE, value_func)
+
+    assert np.allclose(shapley_values, get_brute_force_shapley_values(CONTRIBUTIONS, BASELINE))
+    assert np.allclose(
+        shapley_values.sum(axis=1),
+        value_func(BASELINE + CONTRIBUTIONS.sum(axis=1)) - value_func(BASELINE)
+    )
+
+
+def test_compute_exact_shapley_values_additive():
+
+    # without interaction the shapley values are the contributions
+    shapley_values = compute_exact_shapley_values(CONTRIBUTIONS, BASELINE, lambda x: 3 * x)
+
+    assert np.allclose(shapley_values, 3 * CONTRIBUTIONS)
+
+
+def test_compute_sampled_shapley_values():
+
+    shapley_values = compute_sampled_shapley_values(
+        CONTRIBUTIONS, BASELINE, value_func, nb_permutations=2000, seed=0
+    )
+
+    assert np.allclose(
+        shapley_values, get_brute_force_shapley_values(CONTRIBUTIONS, BASELINE), rtol=0.02, atol=0.01
+    )
+    # each permutation shares the value of all contributors between them
+    assert np.allclose(
+        shapley_values.sum(axis=1),
+        value_func(BASELINE + CONTRIBUTIONS.sum(axis=1)) - value_func(BASELINE)
+    )
+
+
+@pytest.mark.parametrize("max_exact_nb_contributors", [4, 3])
+def test_compute_shapley_values(max_exact_nb_contributors):
+
+    shapley_values = compute_shapley_values(
+        CONTRIBUTIONS,
+        BASELINE,
+        value_func,
+        max_exact_nb_contributors,
+        nb_permutations=2000,
+        seed=0
+    )
+
+    assert np.allclose(
+        shapley_values, get_brute_force_shapley_values(CONTRIBUTIONS, BASELINE), rtol=0.02, atol=0.01
+    )
+
+
+def test_compute_sampled_shapley_values_input_error():
+
+    with pytest.raises(ValueError):
+        compute_sampled_shapley_values(CONTRIBUTIONS, BASELINE, value_func, nb_permutations=1)
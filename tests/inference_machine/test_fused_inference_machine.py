@@ -0,0 +1,90 @@
+import pytest
+import numpy as np
+
+from bayesian_mmm.inference_machine.fused_inference_machine import (
+    FusedInferenceMachine,
+    NUMBA_IS_AVAILABLE
+)
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+
+
+np.random.seed(2021)
+SPENDS = np.random.rand(30, 3)
+CTRL_VARS = np.random.rand(30, 2)
+
+MAX_LAG = 4
+CARRYOVER_PARAM_NM_TO_VALS = {
+    "adstock": {"retain_rate": np.array([0.2, 0.9, 0.5]), "delay": np.array([1.5, 1, 0])},
+    "geo_decay": {"retain_rate": np.array([0.2, 0.9, 0.5])}
+}
+DIMINUSHING_RETURNS_PARAM_NM_TO_VALS = {
+    "hill": {"ec": np.array([0.2, 1, 0.5]), "slope": np.array([1, 4, 2])},
+    "reach": {"half_saturation": np.array([2, 3, 0.5])}
+}
+WITH_NUMBAS = [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(not NUMBA_IS_AVAILABLE, reason="numba not installed"))
+]
+
+
+def get_param_nm_to_val(carryover_transfo_nm, diminushing_returns_transfo_nm):
+
+    param_nm_to_val = {
+        "beta_medias": np.array([0.2, 0.4, 0.1]),
+        "gamma_ctrl": np.array([0.5, 1]),
+        "tau": 2
+    }
+    param_nm_to_val.update(CARRYOVER_PARAM_NM_TO_VALS[carryover_transfo_nm])
+    param_nm_to_val.update(DIMINUSHING_RETURNS_PARAM_NM_TO_VALS[diminushing_returns_transfo_nm])
+
+    return param_nm_to_val
+
+
+@pytest.mark.parametrize("with_numba", WITH_NUMBAS)
+@pytest.mark.parametrize("with_ctrl_vars", [True, False])
+@pytest.mark.parametrize("diminushing_returns_transfo_nm", ["hill", "reach"])
+@pytest.mark.parametrize("carryover_transfo_nm", ["adstock", "geo_decay"])
+def test_predict(carryover_transfo_nm, diminushing_returns_transfo_nm, with_ctrl_vars, with_numba):
+
+    param_nm_to_val = get_param_nm_to_val(carryover_transfo_nm, diminushing_returns_transfo_nm)
+    ctrl_vars = CTRL_VARS if with_ctrl_vars else None
+
+    inference_machine = InferenceMachine(param_nm_to_val, MAX_LAG)
+    fused_inference_machine = FusedInferenceMachine(param_nm_to_val, MAX_LAG, with_numba)
+
+    # the workspaces allocated for the longest spends are reused for the shorter ones
+    for nb_obs in [30, 12, 30]:
+
+        y, contributions = fused_inference_machine.predict_with_contributions(
+            SPENDS[:nb_obs], None if ctrl_vars is None else ctrl_vars[:nb_obs]
+        )
+        expected_y = inference_machine.predict(
+            SPENDS[:nb_obs], None if ctrl_vars is None else ctrl_vars[:nb_obs]
+        )
+
+        assert np.allclose(y, expected_y)
+        assert np.allclose(
+            fused_inference_machine.predict(
+                SPENDS[:nb_obs], None if ctrl_vars is None else ctrl_vars[:nb_obs]
+            ),
+            expected_y
+        )
+        assert np.allclose(
+            contributions,
+            inference_machine._get_transformed_spends(SPENDS[:nb_obs]) * param_nm_to_val["beta_medias"]
+        )
+
+
+def test_fused_inference_machine_input_error():
+
+    param_nm_to_val = get_param_nm_to_val("geo_decay", "reach")
+
+    with pytest.raises(ValueError):
+        FusedInferenceMachine(
+            {param_nm: np.stack([values] * 2) for param_nm, values in param_nm_to_val.items()},
+            MAX_LAG
+        )
+
+    fused_inference_machine = FusedInferenceMachine(param_nm_to_val, MAX_LAG)
+    with pytest.raises(ValueError):
+        fused_inference_machine.predict(SPENDS[:, :2], None)
@@ -0,0 +1,78 @@
+import pytest
+import numpy as np
+
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.inference_machine.posterior_inference_machine import PosteriorInferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+
+
+SPENDS = np.array([
+    [10, 20],
+    [0, 8],
+    [1, 30],
+    [5, 40]
+])
+CTRL_VARS = np.array([
+    [2, 4],
+    [5, 2],
+    [6, 4],
+    [7, 2]
+])
+
+MAX_LAG = 2
+NB_DRAWS = 5
+
+np.random.seed(2021)
+SAMPLING_RESULTS = {
+    "retain_rate": np.random.rand(NB_DRAWS, 2),
+    "delay": np.random.rand(NB_DRAWS, 2) * 2,
+    "ec": np.random.rand(NB_DRAWS, 2),
+    "slope": np.random.rand(NB_DRAWS, 2) * 3,
+    "beta_medias": np.random.rand(NB_DRAWS, 2),
+    "gamma_ctrl": np.random.rand(NB_DRAWS, 2),
+    "tau": np.random.rand(NB_DRAWS)
+}
+
+
+def get_expected_draws_y() -> np.ndarray:
+
+    return np.array([
+        InferenceMachine(
+            {param_nm: values[draw_index] for param_nm, values in SAMPLING_RESULTS.items()},
+            MAX_LAG
+        ).predict(SPENDS, CTRL_VARS)
+        for draw_index in range(NB_DRAWS)
+    ])
+
+
+@pytest.mark.parametrize("draws_chunk_size", [None, 1, 2, 5, 10])
+def test_predict_draws(draws_chunk_size):
+
+    posterior_inference_machine = PosteriorInferenceMachine(SAMPLING_RESULTS, MAX_LAG)
+    obtained_y = posterior_inference_machine.predict_draws(SPENDS, CTRL_VARS, draws_chunk_size)
+
+    assert np.allclose(obtained_y, get_expected_draws_y())
+
+
+def test_predict_bands():
+
+    expected_y = get_expected_draws_y()
+    target_normalizer = Normalizer("log", "max_abs")
+    target_normalizer.fit(np.array([[1.], [10.]]))
+    expected_y = target_normalizer.reverse_transform(expected_y.reshape((-1, 1))).reshape(expected_y.shape)
+
+    posterior_inference_machine = PosteriorInferenceMachine(SAMPLING_RESULTS, MAX_LAG)
+    bands = posterior_inference_machine.predict_bands(
+        SPENDS, CTRL_VARS, [0.05, 0.5, 0.95], 2, target_normalizer
+    )
+
+    assert np.allclose(bands["mean"], expected_y.mean(axis=0))
+    assert np.allclose(bands["quantiles"], np.quantile(expected_y, [0.05, 0.5, 0.95], axis=0))
+
+
+def test_predict_draws_input_error():
+
+    posterior_inference_machine = PosteriorInferenceMachine(SAMPLING_RESULTS, MAX_LAG)
+
+    with pytest.raises(ValueError):
+        posterior_inference_machine.predict_draws(SPENDS, CTRL_VARS, 0)
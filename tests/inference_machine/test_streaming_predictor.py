@@ -0,0 +1,85 @@
+import pytest
+import numpy as np
+
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.inference_machine.streaming_predictor import StreamingPredictor
+
+
+SPENDS = np.array([
+    [10, 20],
+    [0, 8],
+    [1, 30],
+    [5, 40],
+    [3, 0],
+    [8, 12]
+])
+CTRL_VARS = np.array([
+    [2, 4],
+    [5, 2],
+    [6, 4],
+    [7, 2],
+    [1, 1],
+    [3, 0]
+])
+
+MAX_LAG = 3
+
+PARAM_NM_TO_VAL = {
+    "retain_rate": [0.2, 0.9],
+    "beta_medias": [0.2, 0.4],
+    "gamma_ctrl": [0.5, 1],
+    "tau": 2
+}
+CARRYOVER_PARAM_NM_TO_VAL = [
+    {"delay": [1.5, 1]},
+    {}
+]
+DIMINUSHING_RETURNS_PARAM_NM_TO_VAL = [
+    {"ec": [0.2, 1], "slope": [1, 4]},
+    {"half_saturation": [2, 3]}
+]
+
+
+@pytest.mark.parametrize("carryover_param_nm_to_val", CARRYOVER_PARAM_NM_TO_VAL)
+@pytest.mark.parametrize("diminushing_returns_param_nm_to_val", DIMINUSHING_RETURNS_PARAM_NM_TO_VAL)
+@pytest.mark.parametrize("batch_size", [1, 2, 6])
+def test_update(carryover_param_nm_to_val, diminushing_returns_param_nm_to_val, batch_size):
+
+    param_nm_to_val = dict(PARAM_NM_TO_VAL)
+    param_nm_to_val.update(carryover_param_nm_to_val)
+    param_nm_to_val.update(diminushing_returns_param_nm_to_val)
+
+    expected_y = InferenceMachine(param_nm_to_val, MAX_LAG).predict(SPENDS, CTRL_VARS)
+
+    streaming_predictor = StreamingPredictor(param_nm_to_val, MAX_LAG)
+    obtained_y = np.concatenate([
+        streaming_predictor.update(SPENDS[start:start + batch_size], CTRL_VARS[start:start + batch_size])
+        for start in range(0, len(SPENDS), batch_size)
+    ])
+
+    assert np.allclose(obtained_y, expected_y)
+
+
+def test_warm_start():
+
+    param_nm_to_val = dict(PARAM_NM_TO_VAL, half_saturation=[2, 3])
+    expected_y = InferenceMachine(param_nm_to_val, MAX_LAG).predict(SPENDS, None)
+
+    streaming_predictor = StreamingPredictor(param_nm_to_val, MAX_LAG)
+    streaming_predictor.update(SPENDS[:4], None)
+    last_spends = streaming_predictor.get_last_spends()
+
+    assert (last_spends == SPENDS[1:4]).all()
+
+    restored_streaming_predictor = StreamingPredictor(param_nm_to_val, MAX_LAG)
+    restored_streaming_predictor.warm_start(last_spends)
+
+    assert np.allclose(restored_streaming_predictor.update(SPENDS[4:], None), expected_y[4:])
+
+
+def test_update_input_error():
+
+    streaming_predictor = StreamingPredictor(dict(PARAM_NM_TO_VAL, half_saturation=[2, 3]), MAX_LAG)
+
+    with pytest.raises(ValueError):
+        streaming_predictor.update(np.ones((1, 3)), None)
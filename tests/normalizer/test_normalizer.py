@@ -62,3 +62,70 @@ def test_reverse_transform(scaler_nm, transfo_nm):
 
     assert np.allclose(TEST_VALUES, normalizer.reverse_transform(normalized_values)) #all close to ignore precision differences
 
+
+
+@pytest.mark.parametrize(
+    "scaler_nm,transfo_nm",
+    [
+        ("max_abs", None),
+        ("min_max", "log"),
+        ("max_abs", "sqrt")
+        ]
+    )
+def test_get_derivative(scaler_nm, transfo_nm):
+
+    normalizer = Normalizer(transfo_nm=transfo_nm, scaler_nm=scaler_nm)
+    normalizer.fit(TEST_VALUES)
+
+    values = TEST_VALUES + 1.
+    eps = 1e-6
+    expected_derivative = (normalizer.transform(values + eps) - normalizer.transform(values - eps)) / (2 * eps)
+
+    assert np.allclose(normalizer.get_derivative(values), expected_derivative)
+
+
+@pytest.mark.parametrize(
+    "scaler_nm,transfo_nm",
+    [
+        ("max_abs", None),
+        ("min_max", "log"),
+        ("max_abs", "sqrt")
+        ]
+    )
+def test_get_reverse_derivative(scaler_nm, transfo_nm):
+
+    normalizer = Normalizer(transfo_nm=transfo_nm, scaler_nm=scaler_nm)
+    normalizer.fit(TEST_VALUES)
+
+    normalized_values = normalizer.transform(TEST_VALUES + 1.)
+    eps = 1e-6
+    expected_derivative = (
+        normalizer.reverse_transform(normalized_values + eps)
+        - normalizer.reverse_transform(normalized_values - eps)
+        ) / (2 * eps)
+
+    assert np.allclose(normalizer.get_reverse_derivative(normalized_values), expected_derivative)
+
+
+@pytest.mark.parametrize(
+    "scaler_nm,transfo_nm",
+    [
+        ("max_abs", None),
+        ("min_max", "log"),
+        ("max_abs", "sqrt")
+        ]
+    )
+def test_spends_methods(scaler_nm, transfo_nm):
+
+    # the spends are the first columns of the predictors
+    normalizer = Normalizer(transfo_nm=transfo_nm, scaler_nm=scaler_nm)
+    normalizer.fit(TEST_VALUES)
+
+    values = TEST_VALUES + 1.
+    spends = values[:, :1]
+
+    assert np.allclose(normalizer.transform_spends(spends), normalizer.transform(values)[:, :1])
+    assert np.allclose(
+        normalizer.reverse_transform_spends(normalizer.transform_spends(spends)), spends
+    )
+    assert np.allclose(normalizer.get_spends_derivative(spends), normalizer.get_derivative(values)[:, :1])
@@ -0,0 +1,154 @@
+import pytest
+import numpy as np
+from itertools import product
+from time import perf_counter
+
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.optimization.budget_allocator import BudgetAllocator
+from bayesian_mmm.optimization.projected_gradient import project_on_budget
+
+
+PREDICTORS = np.array([
+    [100, 20, 50, 1],
+    [0, 80, 10, 3],
+    [300, 40, 0, 2]
+])
+TARGET = np.array([[100], [300], [250]])
+
+MAX_LAG = 3
+BUDGET = 300
+
+PARAM_NM_TO_VAL = {
+    "retain_rate": [0.2, 0.9, 0.5],
+    "beta_medias": [0.2, 0.4, 0.3],
+    "gamma_ctrl": [0.5],
+    "tau": 0.1
+}
+DIMINUSHING_RETURNS_PARAM_NM_TO_VAL = [
+    {"ec": [0.2, 0.6, 0.4], "slope": [1, 2, 0.5]},
+    {"half_saturation": [2, 3, 1]}
+]
+
+
+PREDICTOR_NORMALIZER = Normalizer("log", "max_abs")
+PREDICTOR_NORMALIZER.fit(PREDICTORS)
+TARGET_NORMALIZER = Normalizer("log", "max_abs")
+TARGET_NORMALIZER.fit(TARGET)
+
+
+def create_budget_allocator(diminushing_returns_param_nm_to_val) -> BudgetAllocator:
+
+    param_nm_to_val = dict(PARAM_NM_TO_VAL)
+    param_nm_to_val.update(diminushing_returns_param_nm_to_val)
+
+    return BudgetAllocator(param_nm_to_val, MAX_LAG, PREDICTOR_NORMALIZER, TARGET_NORMALIZER)
+
+
+@pytest.mark.parametrize("diminushing_returns_param_nm_to_val", DIMINUSHING_RETURNS_PARAM_NM_TO_VAL)
+def test_get_response(diminushing_returns_param_nm_to_val):
+
+    budget_allocator = create_budget_allocator(diminushing_returns_param_nm_to_val)
+    spends = np.array([100., 50., 20.])
+    ctrl_vars = np.array([2.])
+
+    # steady state, the prediction on constant spends after max_lag periods
+    normalized_predictors = PREDICTOR_NORMALIZER.transform(
+        np.tile(np.concatenate([spends, ctrl_vars]), (MAX_LAG, 1))
+    )
+    param_nm_to_val = dict(PARAM_NM_TO_VAL)
+    param_nm_to_val.update(diminushing_returns_param_nm_to_val)
+    y = InferenceMachine(param_nm_to_val, MAX_LAG).predict(
+        normalized_predictors[:, :3], normalized_predictors[:, 3:]
+    )[-1]
+    expected_response = TARGET_NORMALIZER.reverse_transform(np.array([[y]]))[0, 0]
+
+    assert np.isclose(budget_allocator.get_response(spends, ctrl_vars), expected_response)
+
+
+@pytest.mark.parametrize("diminushing_returns_param_nm_to_val", DIMINUSHING_RETURNS_PARAM_NM_TO_VAL)
+def test_allocate(diminushing_returns_param_nm_to_val):
+
+    budget_allocator = create_budget_allocator(diminushing_returns_param_nm_to_val)
+    min_spends = np.array([10., 0., 0.])
+    max_spends = np.array([200., 150., 200.])
+
+    spends = budget_allocator.allocate(BUDGET, min_spends, max_spends)
+
+    assert np.isclose(spends.sum(), BUDGET)
+    assert (spends >= min_spends - 1e-9).all() and (spends <= max_spends + 1e-9).all()
+
+    best_response = max([
+        budget_allocator.get_response(np.array([first, second, BUDGET - first - second]))
+        for first, second in product(np.linspace(10, 200, 96), np.linspace(0, 150, 76))
+        if 0 <= BUDGET - first - second <= 200
+    ])
+
+    assert budget_allocator.get_response(spends) >= best_response - 1e-6
+
+
+@pytest.mark.parametrize("seed", [1, 49, 62, 70])
+def test_allocate_many_media(seed):
+
+    # problems on which the line search used to loop on the rounding errors of the projection
+    random_generator = np.random.default_rng(seed)
+    nb_media = 50
+    spends = random_generator.random((100, nb_media)) * 100
+
+    predictor_normalizer = Normalizer(None, "max_abs")
+    predictor_normalizer.fit(spends)
+    target_normalizer = Normalizer(None, "max_abs")
+    target_normalizer.fit(random_generator.random((100, 1)) * 1000)
+
+    budget_allocator = BudgetAllocator(
+        {
+            "retain_rate": random_generator.random(nb_media),
+            "ec": random_generator.random(nb_media),
+            "slope": random_generator.random(nb_media) * 3 + 0.5,
+            "beta_medias": random_generator.random(nb_media),
+            "tau": 0.1
+        },
+        MAX_LAG,
+        predictor_normalizer,
+        target_normalizer
+    )
+    budget = spends.sum(axis=1).mean() * random_generator.uniform(0.1, 5)
+
+    for tol in [1e-9, 0]:
+
+        start = perf_counter()
+        allocated_spends = budget_allocator.allocate(budget, tol=tol)
+
+        assert perf_counter() - start < 5
+        assert np.isclose(allocated_spends.sum(), budget)
+        assert budget_allocator.get_response(allocated_spends) >= budget_allocator.get_response(
+            np.full(nb_media, budget / nb_media)
+        )
+
+
+@pytest.mark.parametrize(
+    "budget,min_spends,max_spends",
+    [
+        (BUDGET, np.array([200., 200., 0.]), None),
+        (BUDGET, None, np.array([50., 50., 50.])),
+        (BUDGET, np.array([-1., 0., 0.]), None),
+        (BUDGET, np.array([100., 0., 0.]), np.array([50., 300., 300.]))
+    ]
+)
+def test_allocate_input_error(budget, min_spends, max_spends):
+
+    budget_allocator = create_budget_allocator(DIMINUSHING_RETURNS_PARAM_NM_TO_VAL[1])
+
+    with pytest.raises(ValueError):
+        budget_allocator.allocate(budget, min_spends, max_spends)
+
+
+def test_project_on_budget():
+
+    spends = np.array([5., -2., 10., 1.])
+    min_spends = np.array([0., 0., 1., 0.])
+    max_spends = np.array([4., 3., 6., 2.])
+
+    projected_spends = project_on_budget(spends, 8, min_spends, max_spends)
+
+    assert np.allclose(projected_spends, [2., 0., 6., 0.])
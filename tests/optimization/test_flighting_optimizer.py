@@ -0,0 +1,169 @@
+import pytest
+import numpy as np
+
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.optimization.flighting_optimizer import FlightingOptimizer
+
+
+PREDICTORS = np.array([
+    [100, 20, 50, 1],
+    [0, 80, 10, 3],
+    [300, 40, 0, 2]
+])
+TARGET = np.array([[100], [300], [250]])
+
+HISTORY_SPENDS = np.array([
+    [100, 20, 50],
+    [0, 80, 10],
+    [300, 40, 0],
+    [50, 60, 30]
+])
+SCHEDULE = np.array([
+    [10, 50, 20],
+    [100, 5, 30],
+    [40, 60, 15],
+    [80, 10, 60],
+    [20, 30, 40]
+], dtype=float)
+CTRL_VARS = np.array([[1], [2], [3], [2], [1]])
+
+MAX_LAG = 3
+BUDGET = 500
+
+PARAM_NM_TO_VAL = {
+    "retain_rate": [0.2, 0.9, 0.5],
+    "beta_medias": [0.2, 0.4, 0.3],
+    "gamma_ctrl": [0.5],
+    "tau": 0.1
+}
+TRANSFO_PARAM_NM_TO_VAL = [
+    {"delay": [1, 0.5, 2], "ec": [0.2, 0.6, 0.4], "slope": [1, 2, 0.5]},
+    {"half_saturation": [2, 3, 1]}
+]
+
+PREDICTOR_NORMALIZER = Normalizer("log", "max_abs")
+PREDICTOR_NORMALIZER.fit(PREDICTORS)
+TARGET_NORMALIZER = Normalizer("log", "max_abs")
+TARGET_NORMALIZER.fit(TARGET)
+
+
+def get_param_nm_to_val(transfo_param_nm_to_val):
+
+    param_nm_to_val = dict(PARAM_NM_TO_VAL)
+    param_nm_to_val.update(transfo_param_nm_to_val)
+
+    return param_nm_to_val
+
+
+@pytest.mark.parametrize("transfo_param_nm_to_val", TRANSFO_PARAM_NM_TO_VAL)
+def test_get_response(transfo_param_nm_to_val):
+
+    param_nm_to_val = get_param_nm_to_val(transfo_param_nm_to_val)
+    flighting_optimizer = FlightingOptimizer(
+        param_nm_to_val, MAX_LAG, PREDICTOR_NORMALIZER, TARGET_NORMALIZER
+    )
+
+    normalized_predictors = PREDICTOR_NORMALIZER.transform(np.concatenate([
+        np.concatenate([HISTORY_SPENDS, np.zeros((len(HISTORY_SPENDS), 1))], axis=1),
+        np.concatenate([SCHEDULE, CTRL_VARS], axis=1)
+    ]))
+    y = InferenceMachine(param_nm_to_val, MAX_LAG).predict(
+        normalized_predictors[:, :3], normalized_predictors[:, 3:]
+    )[len(HISTORY_SPENDS):]
+    expected_response = TARGET_NORMALIZER.reverse_transform(y.reshape((-1, 1))).reshape((-1,))
+
+    obtained_response = flighting_optimizer.get_response(SCHEDULE, HISTORY_SPENDS, CTRL_VARS)
+
+    assert np.allclose(obtained_response, expected_response)
+
+
+@pytest.mark.parametrize("transfo_param_nm_to_val", TRANSFO_PARAM_NM_TO_VAL)
+def test_get_objective_and_gradient(transfo_param_nm_to_val):
+
+    flighting_optimizer = FlightingOptimizer(
+        get_param_nm_to_val(transfo_param_nm_to_val),
+        MAX_LAG,
+        PREDICTOR_NORMALIZER,
+        TARGET_NORMALIZER
+    )
+
+    objective, gradient = flighting_optimizer.get_objective_and_gradient(
+        SCHEDULE, HISTORY_SPENDS, CTRL_VARS
+    )
+
+    assert np.isclose(
+        objective, flighting_optimizer.get_response(SCHEDULE, HISTORY_SPENDS, CTRL_VARS).sum()
+    )
+
+    eps = 1e-5
+    expected_gradient = np.zeros(SCHEDULE.shape)
+    for period_index, media_index in np.ndindex(SCHEDULE.shape):
+        shift = np.zeros(SCHEDULE.shape)
+        shift[period_index, media_index] = eps
+        expected_gradient[period_index, media_index] = (
+            flighting_optimizer.get_response(SCHEDULE + shift, HISTORY_SPENDS, CTRL_VARS).sum()
+            - flighting_optimizer.get_response(SCHEDULE - shift, HISTORY_SPENDS, CTRL_VARS).sum()
+        ) / (2 * eps)
+
+    assert np.allclose(gradient, expected_gradient, rtol=1e-4)
+
+
+@pytest.mark.parametrize("transfo_param_nm_to_val", TRANSFO_PARAM_NM_TO_VAL)
+def test_get_objective_and_gradient_below_training_min(transfo_param_nm_to_val):
+
+    # spends below the training min have negative normalized values with a min_max
+    # scaler, their carryover is clipped and does not move with the spends
+    predictor_normalizer = Normalizer(None, "min_max")
+    predictor_normalizer.fit(PREDICTORS + np.array([30, 30, 30, 0]))
+    flighting_optimizer = FlightingOptimizer(
+        get_param_nm_to_val(transfo_param_nm_to_val),
+        MAX_LAG,
+        predictor_normalizer,
+        TARGET_NORMALIZER
+    )
+    history_spends = np.zeros(HISTORY_SPENDS.shape)
+
+    _, gradient = flighting_optimizer.get_objective_and_gradient(
+        SCHEDULE, history_spends, CTRL_VARS
+    )
+
+    eps = 1e-5
+    expected_gradient = np.zeros(SCHEDULE.shape)
+    for period_index, media_index in np.ndindex(SCHEDULE.shape):
+        shift = np.zeros(SCHEDULE.shape)
+        shift[period_index, media_index] = eps
+        expected_gradient[period_index, media_index] = (
+            flighting_optimizer.get_response(SCHEDULE + shift, history_spends, CTRL_VARS).sum()
+            - flighting_optimizer.get_response(SCHEDULE - shift, history_spends, CTRL_VARS).sum()
+        ) / (2 * eps)
+
+    assert (expected_gradient == 0).any()
+    assert np.allclose(gradient, expected_gradient, rtol=1e-4, atol=1e-6)
+
+
+@pytest.mark.parametrize("transfo_param_nm_to_val", TRANSFO_PARAM_NM_TO_VAL)
+def test_optimize(transfo_param_nm_to_val):
+
+    flighting_optimizer = FlightingOptimizer(
+        get_param_nm_to_val(transfo_param_nm_to_val),
+        MAX_LAG,
+        PREDICTOR_NORMALIZER,
+        TARGET_NORMALIZER
+    )
+    max_spends = np.array([60., 200., 200.])
+
+    schedule = flighting_optimizer.optimize(
+        BUDGET, HISTORY_SPENDS, len(SCHEDULE), max_spends=max_spends
+    )
+
+    assert schedule.shape == SCHEDULE.shape
+    assert np.isclose(schedule.sum(), BUDGET)
+    assert (schedule >= -1e-9).all() and (schedule <= max_spends + 1e-9).all()
+
+    response = flighting_optimizer.get_response(schedule, HISTORY_SPENDS).sum()
+    np.random.seed(2021)
+    for _ in range(20):
+        random_schedule = np.random.dirichlet(np.ones(SCHEDULE.size)).reshape(SCHEDULE.shape) * BUDGET
+        if (random_schedule <= max_spends).all():
+            assert response >= flighting_optimizer.get_response(random_schedule, HISTORY_SPENDS).sum()
@@ -0,0 +1,90 @@
+import pytest
+from concurrent.futures import Future
+from mock import patch
+from os import listdir
+
+from bayesian_mmm.prebuild import run
+
+
+class StubStanModel:
+
+    # stands for pystan.StanModel, picklable so that it can be cached
+    def __init__(self, model_code, verbose=False):
+
+        self.model_code = model_code
+
+
+class InlineExecutor:
+
+    # stands for the ProcessPoolExecutor, runs and records each submitted call
+    submitted_args = []
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *args):
+
+        return False
+
+    def submit(self, fn, *args):
+
+        InlineExecutor.submitted_args.append(args)
+
+        future = Future()
+        future.set_result(fn(*args))
+
+        return future
+
+
+def run_with_config(config):
+
+    InlineExecutor.submitted_args = []
+
+    with patch("bayesian_mmm.prebuild.load_config", new=(lambda x: config)), \
+        patch("bayesian_mmm.prebuild.ProcessPoolExecutor", new=InlineExecutor), \
+        patch("bayesian_mmm.sampling.stan_model_wrapper.pystan.StanModel", new=StubStanModel):
+        run()
+
+    return InlineExecutor.submitted_args
+
+
+@pytest.mark.parametrize(
+    "vectorized_config, expected_vectorized, expected_with_lagged_spends",
+    (
+        [{}, False, True],
+        [{"VECTORIZED_STAN_CODE": True}, True, True],
+        [{"VECTORIZED_STAN_CODE": True, "CARRYOVER_IN_STAN_MODEL": True}, True, False],
+    )
+)
+def test_run(
+    tmp_path, vectorized_config, expected_vectorized, expected_with_lagged_spends
+):
+
+    cache_dir = str(tmp_path / "stan_model_cache")
+    config = {"STAN_MODEL_CACHE": {"cache_dir": cache_dir, "max_size_mb": None}}
+    config.update(vectorized_config)
+
+    submitted_args = run_with_config(config)
+
+    assert sorted(args[:3] for args in submitted_args) == sorted(
+        (carryover_transfo_nm, diminushing_returns_transfo_nm, with_ctrl_vars)
+        for carryover_transfo_nm in ["adstock", "geo_decay"]
+        for diminushing_returns_transfo_nm in ["hill", "reach"]
+        for with_ctrl_vars in [True, False]
+    )
+
+    for args in submitted_args:
+        assert args[3] == expected_vectorized
+        assert args[4] == expected_with_lagged_spends
+        assert args[5] == config["STAN_MODEL_CACHE"]
+
+    # one compiled model per variant stored in the cache
+    assert len(listdir(cache_dir)) == 8
+
+
+@pytest.mark.parametrize("config", [{}, {"STAN_MODEL_CACHE": None}])
+def test_run_without_cache(config):
+
+    with pytest.raises(ValueError):
+        run_with_config(config)
@@ -0,0 +1,62 @@
+import numpy as np
+import yaml
+from os import makedirs
+
+from bayesian_mmm.inference_machine.inference_machine import (
+    InferenceMachine,
+    save_inference_machine
+)
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.predict import predict
+
+
+SPENDS = np.array([
+    [10, 20],
+    [0, 8],
+    [1, 30],
+    [5, 40]
+])
+MAX_LAG = 2
+
+PARAM_NM_TO_VAL = {
+    "retain_rate": [0.2, 0.9],
+    "half_saturation": [2, 3],
+    "beta_medias": [0.2, 0.4],
+    "tau": 2
+}
+
+
+def save_experiment(experiment_nm: str, tau: float) -> None:
+
+    save_inference_machine(
+        InferenceMachine(dict(PARAM_NM_TO_VAL, tau=tau), MAX_LAG), experiment_nm
+    )
+
+    target_normalizer = Normalizer(None, "max_abs")
+    target_normalizer.fit(np.array([[1.], [10.]]))
+    target_normalizer.save("target_" + experiment_nm)
+
+
+def write_config(experiment_nm: str) -> None:
+
+    with open("config/predict.yaml", "w") as f:
+        yaml.dump({"EXPERIMENT_NM": experiment_nm}, f)
+
+
+def test_predict_rereads_config(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    for dir_path in ["config", "results/inference_machine", "results/normalizer"]:
+        makedirs(dir_path)
+
+    save_experiment("a", 2)
+    save_experiment("b", 3)
+
+    write_config("a")
+    pred_a = predict(SPENDS, None)
+
+    # the experiment changed in the config is served without restarting the process
+    write_config("b")
+    pred_b = predict(SPENDS, None)
+
+    assert np.allclose(pred_b - pred_a, 10)
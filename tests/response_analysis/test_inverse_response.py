@@ -0,0 +1,113 @@
+import pytest
+import numpy as np
+
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.response_analysis.inverse_response import InverseResponseCalculator
+
+
+MAX_LAG = 4
+SPENDS = np.array([[0, 0], [10, 5], [60, 20], [100, 50]], dtype=float)
+
+PARAM_NM_TO_VALS = [
+    {
+        "retain_rate": np.array([0.5, 0.8]),
+        "delay": np.array([1, 2]),
+        "ec": np.array([0.4, 0.6]),
+        "slope": np.array([2, 1.5]),
+        "beta_medias": np.array([0.3, 0.2]),
+        "tau": 0.1
+    },
+    {
+        "retain_rate": np.array([0.5, 0.8]),
+        "half_saturation": np.array([2, 1]),
+        "beta_medias": np.array([0.3, 0.2]),
+        "tau": 0.1
+    },
+    {
+        "retain_rate": np.array([[0.5, 0.8], [0.2, 0.3], [0.9, 0.1]]),
+        "half_saturation": np.array([[2, 1], [1, 3], [0.5, 2]]),
+        "beta_medias": np.array([[0.3, 0.2], [0.1, 0.4], [0.2, 0.2]]),
+        "tau": np.array([0.1, 0.2, 0.3])
+    }
+]
+
+PREDICTOR_NORMALIZER = Normalizer("log", "max_abs")
+PREDICTOR_NORMALIZER.fit(np.array([[100, 20, 1], [30, 50, 2]]))
+TARGET_NORMALIZER = Normalizer("log", "max_abs")
+TARGET_NORMALIZER.fit(np.array([[100], [300]]))
+
+
+def get_inverse_response_calculator(param_nm_to_val):
+
+    return InverseResponseCalculator(
+        param_nm_to_val, MAX_LAG, PREDICTOR_NORMALIZER, TARGET_NORMALIZER
+    )
+
+
+@pytest.mark.parametrize("param_nm_to_val", PARAM_NM_TO_VALS)
+def test_get_required_spends(param_nm_to_val):
+
+    inverse_response_calculator = get_inverse_response_calculator(param_nm_to_val)
+
+    incremental_outcomes = inverse_response_calculator.get_incremental_outcomes(SPENDS)
+
+    if incremental_outcomes.ndim == 2:
+        assert np.allclose(inverse_response_calculator.get_required_spends(incremental_outcomes), SPENDS)
+    else:
+        # one matrix of spends per draw
+        for draw_index, draw_incremental_outcomes in enumerate(incremental_outcomes):
+            assert np.allclose(
+                inverse_response_calculator.get_required_spends(draw_incremental_outcomes)[draw_index],
+                SPENDS
+            )
+
+
+@pytest.mark.parametrize("param_nm_to_val", PARAM_NM_TO_VALS[:2])
+def test_get_incremental_outcomes_steady_state(param_nm_to_val):
+
+    inverse_response_calculator = get_inverse_response_calculator(param_nm_to_val)
+
+    # contribution of the last period of max_lag periods of constant spends
+    for spends in SPENDS:
+
+        values = np.zeros((MAX_LAG, PREDICTOR_NORMALIZER.get_nb_features()))
+        values[:, :2] = spends
+        normalized_spends = PREDICTOR_NORMALIZER.transform(values)[:, :2]
+
+        transformed_spends = inverse_response_calculator._get_transformed_spends(normalized_spends)
+        expected_incremental_outcomes = TARGET_NORMALIZER.reverse_transform(
+            (transformed_spends[-1] * param_nm_to_val["beta_medias"]).reshape((-1, 1))
+            ).reshape((-1,))
+
+        assert np.allclose(
+            inverse_response_calculator.get_incremental_outcomes(spends[None, :])[0],
+            expected_incremental_outcomes
+        )
+
+
+def test_get_required_spends_out_of_reach():
+
+    inverse_response_calculator = get_inverse_response_calculator(PARAM_NM_TO_VALS[1])
+
+    # the contribution of a media is below the reverse transform of its beta
+    max_incremental_outcomes = TARGET_NORMALIZER.reverse_transform(
+        PARAM_NM_TO_VALS[1]["beta_medias"].reshape((-1, 1))
+        ).reshape((1, -1))
+
+    required_spends = inverse_response_calculator.get_required_spends(
+        np.concatenate([max_incremental_outcomes * 0.5, max_incremental_outcomes * 2])
+    )
+
+    assert np.isfinite(required_spends[0]).all()
+    assert np.isinf(required_spends[1]).all()
+
+
+def test_get_required_spends_input_error():
+
+    inverse_response_calculator = get_inverse_response_calculator(PARAM_NM_TO_VALS[1])
+
+    with pytest.raises(ValueError):
+        inverse_response_calculator.get_required_spends(np.array([[1, -1]]))
+
+    with pytest.raises(ValueError):
+        inverse_response_calculator.get_required_spends(np.array([[1, 1, 1]]))
@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.response_analysis.inverse_response import InverseResponseCalculator
+from bayesian_mmm.response_analysis.marginal_roi import compute_marginal_roi
+
+
+MAX_LAG = 4
+MAX_SPENDS = np.array([100., 50., 80.])
+NB_DRAWS = 30
+
+np.random.seed(2021)
+SAMPLING_RESULTS = [
+    {
+        "retain_rate": np.random.rand(NB_DRAWS, 3),
+        "ec": np.random.rand(NB_DRAWS, 3) * 0.5 + 0.2,
+        "slope": np.random.rand(NB_DRAWS, 3) * 3 + 0.5,
+        "beta_medias": np.random.rand(NB_DRAWS, 3),
+        "tau": np.random.rand(NB_DRAWS)
+    },
+    {
+        "retain_rate": np.random.rand(NB_DRAWS, 3),
+        "half_saturation": np.random.rand(NB_DRAWS, 3) * 3,
+        "beta_medias": np.random.rand(NB_DRAWS, 3),
+        "tau": np.random.rand(NB_DRAWS)
+    }
+]
+
+PREDICTOR_NORMALIZER = Normalizer("log", "max_abs")
+PREDICTOR_NORMALIZER.fit(np.array([[100, 20, 60, 1], [30, 50, 10, 2]]))
+TARGET_NORMALIZER = Normalizer("log", "max_abs")
+TARGET_NORMALIZER.fit(np.array([[100], [300]]))
+
+
+@pytest.mark.parametrize("sampling_results", SAMPLING_RESULTS)
+def test_compute_marginal_roi(sampling_results):
+
+    quantiles = [0.1, 0.5, 0.9]
+    marginal_roi = compute_marginal_roi(
+        sampling_results,
+        PREDICTOR_NORMALIZER,
+        TARGET_NORMALIZER,
+        MAX_SPENDS,
+        nb_grid_points=11,
+        quantiles=quantiles
+    )
+
+    # finite differences of the steady state contributions of each draw
+    inverse_response_calculator = InverseResponseCalculator(
+        sampling_results, MAX_LAG, PREDICTOR_NORMALIZER, TARGET_NORMALIZER
+    )
+    spends = marginal_roi["spend_grid"][1:]
+    eps = 1e-5
+    expected_marginal_rois = (
+        inverse_response_calculator.get_incremental_outcomes(spends + eps)
+        - inverse_response_calculator.get_incremental_outcomes(spends - eps)
+    ) / (2 * eps)
+
+    assert np.allclose(marginal_roi["spend_grid"][-1], MAX_SPENDS)
+    assert np.allclose(marginal_roi["mean"][1:], expected_marginal_rois.mean(axis=0), rtol=1e-4)
+    assert np.allclose(
+        marginal_roi["quantiles"][:, 1:],
+        np.quantile(expected_marginal_rois, quantiles, axis=0),
+        rtol=1e-4
+    )
+
+
+def test_compute_marginal_roi_media_chunk_size():
+
+    marginal_roi = compute_marginal_roi(
+        SAMPLING_RESULTS[0], PREDICTOR_NORMALIZER, TARGET_NORMALIZER, MAX_SPENDS
+    )
+    chunked_marginal_roi = compute_marginal_roi(
+        SAMPLING_RESULTS[0], PREDICTOR_NORMALIZER, TARGET_NORMALIZER, MAX_SPENDS, media_chunk_size=2
+    )
+
+    assert np.allclose(marginal_roi["mean"], chunked_marginal_roi["mean"])
+    assert np.allclose(marginal_roi["quantiles"], chunked_marginal_roi["quantiles"])
+
+
+def test_compute_marginal_roi_input_error():
+
+    with pytest.raises(ValueError):
+        compute_marginal_roi(
+            SAMPLING_RESULTS[1], PREDICTOR_NORMALIZER, TARGET_NORMALIZER, MAX_SPENDS, nb_grid_points=1
+        )
+
+    with pytest.raises(ValueError):
+        compute_marginal_roi(
+            SAMPLING_RESULTS[1], PREDICTOR_NORMALIZER, TARGET_NORMALIZER, MAX_SPENDS, media_chunk_size=0
+        )
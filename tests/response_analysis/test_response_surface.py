@@ -0,0 +1,125 @@
+import pytest
+import numpy as np
+from os import makedirs
+
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.response_analysis.response_surface import (
+    create_response_surface,
+    load_response_surface,
+    save_response_surface
+)
+from bayesian_mmm.spend_transformation.spend_transformation import compute_hill, compute_reach
+
+
+MEDIA_NMS = ["tv", "radio"]
+MAX_SPENDS = np.array([100., 50.])
+NB_DRAWS = 20
+
+np.random.seed(2021)
+SAMPLING_RESULTS = [
+    {
+        "ec": np.random.rand(NB_DRAWS, 2) * 0.5 + 0.2,
+        "slope": np.random.rand(NB_DRAWS, 2) * 3 + 0.5,
+        "beta_medias": np.random.rand(NB_DRAWS, 2),
+        "tau": np.random.rand(NB_DRAWS)
+    },
+    {
+        "half_saturation": np.random.rand(NB_DRAWS, 2) * 3,
+        "beta_medias": np.random.rand(NB_DRAWS, 2),
+        "tau": np.random.rand(NB_DRAWS)
+    }
+]
+
+PREDICTOR_NORMALIZER = Normalizer("log", "max_abs")
+PREDICTOR_NORMALIZER.fit(np.array([[100, 20, 1], [30, 50, 2]]))
+TARGET_NORMALIZER = Normalizer("log", "max_abs")
+TARGET_NORMALIZER.fit(np.array([[100], [300]]))
+
+
+def get_expected_draw_responses(sampling_results, media_index, spends):
+
+    predictor_values = np.zeros((len(spends), 3))
+    predictor_values[:, media_index] = spends
+    normalized_spends = PREDICTOR_NORMALIZER.transform(predictor_values)[:, :2]
+
+    if "ec" in sampling_results.keys():
+        transformed_spends = compute_hill(
+            normalized_spends, sampling_results["ec"], sampling_results["slope"]
+        )
+    else:
+        transformed_spends = compute_reach(normalized_spends, sampling_results["half_saturation"])
+
+    normalized_responses = transformed_spends[:, :, media_index] * (
+        sampling_results["beta_medias"][:, None, media_index]
+    )
+
+    return TARGET_NORMALIZER.reverse_transform(
+        normalized_responses.reshape((-1, 1))
+        ).reshape(normalized_responses.shape)
+
+
+@pytest.mark.parametrize("sampling_results", SAMPLING_RESULTS)
+def test_get_response(sampling_results):
+
+    response_surface = create_response_surface(
+        sampling_results,
+        PREDICTOR_NORMALIZER,
+        TARGET_NORMALIZER,
+        MEDIA_NMS,
+        MAX_SPENDS,
+        nb_grid_points=5,
+        with_draws=True
+    )
+
+    for media_index, media_nm in enumerate(MEDIA_NMS):
+
+        # grid points are exact, in between is interpolated
+        spends = np.linspace(0, MAX_SPENDS[media_index], 5)
+        expected_draw_responses = get_expected_draw_responses(sampling_results, media_index, spends)
+
+        assert np.allclose(response_surface.get_draw_responses(media_nm, spends), expected_draw_responses)
+        assert np.allclose(
+            response_surface.get_response(media_nm, spends, 0.95),
+            np.quantile(expected_draw_responses, 0.95, axis=0)
+        )
+
+        mid_spend = (spends[1] + spends[2]) / 2
+        assert np.isclose(
+            response_surface.get_response(media_nm, mid_spend),
+            np.quantile(expected_draw_responses, 0.5, axis=0)[1:3].mean()
+        )
+
+
+def test_save_load_response_surface(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    makedirs("results/inference_machine")
+
+    response_surface = create_response_surface(
+        SAMPLING_RESULTS[1], PREDICTOR_NORMALIZER, TARGET_NORMALIZER, MEDIA_NMS, MAX_SPENDS
+    )
+    save_response_surface(response_surface, "demo")
+    loaded_response_surface = load_response_surface("demo")
+
+    spends = np.array([0, 12.5, 60])
+    assert loaded_response_surface.get_media_nms() == MEDIA_NMS
+    assert np.allclose(
+        loaded_response_surface.get_response("radio", spends),
+        response_surface.get_response("radio", spends)
+    )
+
+
+def test_get_response_input_error():
+
+    response_surface = create_response_surface(
+        SAMPLING_RESULTS[1], PREDICTOR_NORMALIZER, TARGET_NORMALIZER, MEDIA_NMS, MAX_SPENDS
+    )
+
+    with pytest.raises(ValueError):
+        response_surface.get_response("newspaper", 10.)
+
+    with pytest.raises(ValueError):
+        response_surface.get_response("tv", 10., 0.3)
+
+    with pytest.raises(ValueError):
+        response_surface.get_draw_responses("tv", 10.)
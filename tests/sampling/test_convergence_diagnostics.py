@@ -0,0 +1,82 @@
+import pytest
+import numpy as np
+
+from bayesian_mmm.sampling.convergence_diagnostics import (
+    compute_diagnostics,
+    compute_ess_bulk,
+    compute_ess_tail,
+    compute_rhat
+)
+
+
+def get_ar_draws(nb_chains: int, nb_draws: int, phi: float, seed: int) -> np.ndarray:
+
+    random_generator = np.random.default_rng(seed)
+
+    draws = np.zeros((nb_chains, nb_draws))
+    for draw_index in range(1, nb_draws):
+        draws[:, draw_index] = phi * draws[:, draw_index - 1] + random_generator.normal(size=nb_chains)
+
+    return draws
+
+
+def test_diagnostics_reference():
+
+    # reference values from arviz rhat(method="rank") and ess(method="bulk"/"tail")
+    draws = get_ar_draws(4, 301, 0.7, 1)
+    draws[1] += 0.3
+
+    assert compute_rhat(draws) == pytest.approx(1.0193060298793555)
+    assert compute_ess_bulk(draws) == pytest.approx(233.65849192530015)
+    assert compute_ess_tail(draws) == pytest.approx(518.9263965316818)
+
+
+def test_diagnostics_independent_draws():
+
+    draws = np.random.default_rng(0).normal(size=(4, 1000, 3))
+
+    assert np.allclose(compute_rhat(draws), 1, atol=0.01)
+    assert (np.abs(compute_ess_bulk(draws) / 4000 - 1) < 0.15).all()
+    assert (np.abs(compute_ess_tail(draws) / 4000 - 1) < 0.15).all()
+
+
+def test_diagnostics_autocorrelated_draws():
+
+    phi = 0.9
+    draws = get_ar_draws(4, 4000, phi, 0)
+
+    expected_ess = 4 * 4000 * (1 - phi) / (1 + phi)
+
+    assert compute_ess_bulk(draws) == pytest.approx(expected_ess, rel=0.15)
+
+
+def test_diagnostics_not_mixed_chains():
+
+    draws = np.random.default_rng(0).normal(size=(4, 1000))
+    draws[0] += 2
+
+    assert compute_rhat(draws) > 1.1
+
+
+def test_compute_diagnostics():
+
+    random_generator = np.random.default_rng(0)
+    chain_draws = {
+        "beta_medias": random_generator.normal(size=(4, 100, 2)),
+        "tau": random_generator.normal(size=(4, 100))
+    }
+    chain_draws["beta_medias"][0, :, 1] += 2
+
+    diagnostics = compute_diagnostics(chain_draws)
+
+    assert np.array(diagnostics["params"]["beta_medias"]["rhat"]).shape == (2,)
+    assert diagnostics["max_rhat"] == diagnostics["params"]["beta_medias"]["rhat"][1]
+    assert diagnostics["min_ess_bulk"] == min(
+        diagnostics["params"]["beta_medias"]["ess_bulk"] + [diagnostics["params"]["tau"]["ess_bulk"]]
+    )
+
+
+def test_diagnostics_input_error():
+
+    with pytest.raises(ValueError):
+        compute_rhat(np.zeros((4, 3)))
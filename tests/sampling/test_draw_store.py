@@ -0,0 +1,142 @@
+import pytest
+import numpy as np
+from os import makedirs, path
+
+from bayesian_mmm.contribution_analysis.posterior_contribution_calculator import (
+    PosteriorContributionCalculator
+)
+from bayesian_mmm.inference_machine.posterior_inference_machine import (
+    PosteriorInferenceMachine,
+    load_posterior_inference_machine,
+    save_posterior_inference_machine
+)
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.sampling.draw_store import DrawStore, load_draws, save_draws
+from bayesian_mmm.sampling.parameter_estimation import estimate_parameters
+
+NB_CHAINS = 3
+NB_DRAWS = 10
+CHAIN_DRAWS = {
+    "beta_medias": np.random.rand(NB_CHAINS, NB_DRAWS, 2),
+    "tau": np.random.rand(NB_CHAINS, NB_DRAWS)
+}
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.mark.parametrize("with_chain_axis", [True, False])
+def test_load_draws(with_chain_axis):
+
+    save_draws(CHAIN_DRAWS, "test")
+    draw_store = load_draws("test", with_chain_axis)
+
+    assert sorted(draw_store.keys()) == ["beta_medias", "tau"]
+
+    for param_nm, chain_draws in CHAIN_DRAWS.items():
+        draws = draw_store[param_nm]
+        assert isinstance(draws, np.memmap)
+        if with_chain_axis:
+            assert (draws == chain_draws).all()
+        else:
+            assert (draws == chain_draws.reshape((-1,) + chain_draws.shape[2:])).all()
+
+
+def test_save_draws_dtype():
+
+    save_draws(CHAIN_DRAWS, "test", "float32")
+    draw_store = load_draws("test", with_chain_axis=True)
+
+    assert draw_store["tau"].dtype == np.float32
+    assert np.allclose(draw_store["tau"], CHAIN_DRAWS["tau"])
+
+
+def test_save_draws_overwrite():
+
+    save_draws(CHAIN_DRAWS, "test")
+    save_draws({"tau": CHAIN_DRAWS["tau"]}, "test")
+
+    assert list(load_draws("test").keys()) == ["tau"]
+
+
+def test_load_draws_estimation():
+
+    save_draws(CHAIN_DRAWS, "test")
+
+    obtained_estimation = estimate_parameters(load_draws("test"), "median")
+
+    assert np.allclose(
+        obtained_estimation["beta_medias"],
+        np.median(CHAIN_DRAWS["beta_medias"].reshape((-1, 2)), axis=0)
+    )
+
+
+def test_load_draws_downstream():
+
+    # the posterior of a geo_decay reach model with ctrl vars
+    random_generator = np.random.default_rng(2021)
+    chain_draws = {
+        "retain_rate": random_generator.random((NB_CHAINS, 200, 2)),
+        "half_saturation": random_generator.random((NB_CHAINS, 200, 2)) * 3,
+        "beta_medias": random_generator.random((NB_CHAINS, 200, 2)),
+        "gamma_ctrl": random_generator.random((NB_CHAINS, 200, 1)),
+        "tau": random_generator.random((NB_CHAINS, 200))
+    }
+    sampling_results = {
+        param_nm: draws.reshape((-1,) + draws.shape[2:]) for param_nm, draws in chain_draws.items()
+    }
+    spends = random_generator.random((8, 2))
+    ctrl_vars = random_generator.random((8, 1))
+    target_normalizer = Normalizer("log", "max_abs")
+    target_normalizer.fit(np.array([[1], [5]]))
+
+    save_draws(chain_draws, "test")
+    draw_store = load_draws("test")
+
+    obtained_estimation = estimate_parameters(draw_store, "median")
+    expected_estimation = estimate_parameters(sampling_results, "median")
+    for param_nm, estimation in expected_estimation.items():
+        assert np.allclose(obtained_estimation[param_nm], estimation)
+
+    # the saved posterior inference machine only refers to the store
+    makedirs("results/inference_machine")
+    save_posterior_inference_machine(PosteriorInferenceMachine(draw_store, 3), "test")
+    posterior_inference_machine = load_posterior_inference_machine("test")
+
+    assert isinstance(
+        posterior_inference_machine._PosteriorInferenceMachine__sampling_results, DrawStore
+    )
+    assert path.getsize("results/inference_machine/posterior_test.pkl") < 1000
+
+    obtained_bands = posterior_inference_machine.predict_bands(
+        spends, ctrl_vars, [0.05, 0.95], 100, target_normalizer
+    )
+    expected_bands = PosteriorInferenceMachine(sampling_results, 3).predict_bands(
+        spends, ctrl_vars, [0.05, 0.95], None, target_normalizer
+    )
+    assert np.allclose(obtained_bands["mean"], expected_bands["mean"])
+    assert np.allclose(obtained_bands["quantiles"], expected_bands["quantiles"])
+
+    contributions = []
+    for posterior in [draw_store, sampling_results]:
+        posterior_contribution_calculator = PosteriorContributionCalculator(
+            posterior, 3, target_normalizer, ["radio", "tv"], ["consumer_index"]
+        )
+        posterior_contribution_calculator.compute_results(spends, ctrl_vars, np.arange(8), 100)
+        contributions.append(posterior_contribution_calculator.get_results())
+
+    for stat_nm, stat_contributions in contributions[1].items():
+        assert np.allclose(contributions[0][stat_nm].values, stat_contributions.values)
+
+
+def test_load_draws_input_error():
+
+    with pytest.raises(ValueError):
+        load_draws("unknown")
+
+    save_draws(CHAIN_DRAWS, "test")
+    with pytest.raises(KeyError):
+        load_draws("test")["ec"]
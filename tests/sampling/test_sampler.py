@@ -1,4 +1,5 @@
 from _pytest.mark import param
+from json import load
 import pytest
 import numpy as np
 
@@ -74,6 +75,194 @@ def test_create_sampler_input(ctrl_vars):
             assert val == obtained_args[key]
 
 
+@pytest.mark.parametrize(
+    "ctrl_vars", [CTRL_VARS, None]
+)
+def test_create_sampler_input_without_lagged_spends(ctrl_vars):
+
+    expected_args = {
+        "N":N,
+        "Y":REVENUE,
+        "max_lag":MAX_LAG,
+        "num_media":NUM_MEDIA,
+        "X_media":SPENDS
+    }
+
+    if type(ctrl_vars) == np.ndarray:
+        expected_args.update({
+            "num_ctrl":NUM_CTRL,
+            "X_ctrl":CTRL_VARS
+        })
+
+    sampler = Sampler(STAN_MODEL, MAX_LAG, with_lagged_spends=False)
+    sampler.create_stan_input(
+        SPENDS, ctrl_vars, REVENUE
+    )
+    obtained_args = sampler._Sampler__args
+
+    assert sorted(obtained_args.keys()) == sorted(expected_args.keys())
+
+    for key, val in expected_args.items():
+        if type(val) == np.ndarray:
+            assert (val == obtained_args[key]).all()
+        else:
+            assert val == obtained_args[key]
+
+
+class RecordingStanModel(StanModelWrapper):
+
+    # draws of every param saved by a stan model, the requested params are recorded
+    def sample(self, args, n_iter, chains, pars=None, permuted=True):
+
+        self.pars = pars
+
+        return {
+            param_nm: np.zeros((n_iter * chains, 2) if permuted else (n_iter, chains, 2))
+            for param_nm in self.get_param_nms() + ["lp__"]
+            if pars is None or param_nm in pars
+        }
+
+
+def test_run_sampling_requested_params():
+
+    stan_model_generator = StanModelGenerator("adstock", "reach", True, vectorized=True)
+    stan_model_generator._StanModelGenerator__create_parameters_code()
+    stan_model = RecordingStanModel(stan_model_generator._StanModelGenerator__parameters_code)
+
+    sampler = Sampler(stan_model, MAX_LAG)
+    sampler.create_stan_input(SPENDS, CTRL_VARS, REVENUE)
+    obtained_results = sampler.run_sampling(100, 3)
+
+    expected_param_nms = ["retain_rate", "delay", "half_saturation", "beta_medias", "gamma_ctrl", "tau"]
+
+    assert stan_model.pars == expected_param_nms
+    assert sorted(obtained_results.keys()) == sorted(expected_param_nms)
+    assert obtained_results["beta_medias"].shape == (100, 2)
+    assert sampler.get_chain_draws()["beta_medias"].shape == (3, 100, 2)
+
+
+class OrderedDrawsStanModel(StanModelWrapper):
+
+    # the draw of each iteration and chain is its position in the (iteration, chain) order
+    def sample(self, args, n_iter, chains, pars=None, permuted=True):
+
+        draws = np.arange(n_iter * chains, dtype=float).reshape((n_iter, chains))
+
+        return {param_nm: draws for param_nm in pars}
+
+
+def test_run_sampling_permuted_draws():
+
+    stan_model_generator = StanModelGenerator("geo_decay", "reach", False, vectorized=True)
+    stan_model_generator._StanModelGenerator__create_parameters_code()
+    stan_model = OrderedDrawsStanModel(stan_model_generator._StanModelGenerator__parameters_code)
+
+    sampler = Sampler(stan_model, MAX_LAG)
+    sampler.create_stan_input(SPENDS, None, REVENUE)
+    obtained_results = sampler.run_sampling(300, 3)
+    # the same seed gives the same draws
+    assert (sampler.run_sampling(300, 3)["tau"] == obtained_results["tau"]).all()
+
+    # the chain draws keep their order, the draws returned are a random subset of them
+    assert (sampler.get_chain_draws()["tau"] == np.arange(900).reshape((300, 3)).T).all()
+
+    tau = obtained_results["tau"]
+    assert len(np.unique(tau)) == 300
+    assert not (np.diff(tau) > 0).all()
+    assert np.bincount(tau.astype(int) % 3).min() > 50
+    assert np.abs(tau.mean() - 450) < 100
+
+    # the params share the permutation
+    assert (obtained_results["retain_rate"] == tau).all()
+
+
+class IndependentDrawsStanModel(StanModelWrapper):
+
+    # independent draws of every param, the calls to sample and continue_sampling are counted
+    def __init__(self, code):
+
+        super().__init__(code)
+        self.random_generator = np.random.default_rng(0)
+        self.nb_continuations = 0
+
+    def sample(self, args, n_iter, chains, pars=None, permuted=True):
+
+        self.chains = chains
+
+        return self.get_draws(n_iter // 2, pars)
+
+    def continue_sampling(self, args, n_iter, pars=None, permuted=True):
+
+        self.nb_continuations += 1
+
+        return self.get_draws(n_iter, pars)
+
+    def get_draws(self, n_iter, pars):
+
+        return {
+            param_nm: self.random_generator.normal(size=(n_iter, self.chains, 2))
+            for param_nm in pars
+        }
+
+
+@pytest.mark.parametrize(
+    "min_ess_bulk, max_nb_rounds, expected_nb_rounds, expected_is_converged",
+    [(300, 10, 1, True), (600, 10, 2, True), (1000, 2, 2, False)]
+)
+def test_run_adaptive_sampling(
+    min_ess_bulk, max_nb_rounds, expected_nb_rounds, expected_is_converged, tmp_path, monkeypatch
+):
+
+    stan_model_generator = StanModelGenerator("geo_decay", "reach", False, vectorized=True)
+    stan_model_generator._StanModelGenerator__create_parameters_code()
+    stan_model = IndependentDrawsStanModel(
+        stan_model_generator._StanModelGenerator__parameters_code
+    )
+
+    sampler = Sampler(stan_model, MAX_LAG)
+    sampler.create_stan_input(SPENDS, None, REVENUE)
+    obtained_results = sampler.run_adaptive_sampling(
+        100, 4, max_rhat=1.05, min_ess_bulk=min_ess_bulk, min_ess_tail=0,
+        max_nb_rounds=max_nb_rounds
+    )
+
+    assert stan_model.nb_continuations == expected_nb_rounds - 1
+    assert obtained_results["beta_medias"].shape == (400 * expected_nb_rounds, 2)
+    assert np.allclose(
+        np.sort(obtained_results["beta_medias"], axis=0),
+        np.sort(sampler.get_chain_draws()["beta_medias"].reshape((-1, 2)), axis=0)
+    )
+    assert sampler.get_chain_draws()["beta_medias"].shape == (4, 100 * expected_nb_rounds, 2)
+
+    diagnostics = sampler.get_diagnostics()
+    assert diagnostics["nb_rounds"] == expected_nb_rounds
+    assert diagnostics["nb_draws_per_chain"] == 100 * expected_nb_rounds
+    assert diagnostics["is_converged"] == expected_is_converged
+    assert (diagnostics["min_ess_bulk"] >= min_ess_bulk) == expected_is_converged
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "results").mkdir()
+    sampler.write_diagnostics("test")
+    with open("results/diagnostics_test.json", "r") as f:
+        assert load(f)["nb_rounds"] == expected_nb_rounds
+
+
+def test_run_adaptive_sampling_max_duration():
+
+    stan_model_generator = StanModelGenerator("geo_decay", "reach", False, vectorized=True)
+    stan_model_generator._StanModelGenerator__create_parameters_code()
+    stan_model = IndependentDrawsStanModel(
+        stan_model_generator._StanModelGenerator__parameters_code
+    )
+
+    sampler = Sampler(stan_model, MAX_LAG)
+    sampler.create_stan_input(SPENDS, None, REVENUE)
+    sampler.run_adaptive_sampling(100, 4, min_ess_bulk=1e6, max_duration_s=0)
+
+    assert stan_model.nb_continuations == 0
+    assert not sampler.get_diagnostics()["is_converged"]
+
+
 # slow to run (stan compilation + sampling)
 @pytest.mark.parametrize(
     "carryover_transfo_nm,diminushing_returns_transfo_nm,with_ctrl_vars",
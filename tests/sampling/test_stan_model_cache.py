@@ -0,0 +1,102 @@
+import pytest
+from os import listdir, path, utime
+
+from bayesian_mmm.sampling.stan_model_cache import StanModelCache
+
+CODE = "data { int<lower=1> N; }"
+TOOLCHAIN_VERSION = "pystan 2.19.1.1"
+
+
+def test_get_key(tmp_path):
+
+    cache = StanModelCache(str(tmp_path))
+    key = cache.get_key(CODE, TOOLCHAIN_VERSION)
+
+    assert key == cache.get_key(CODE, TOOLCHAIN_VERSION)
+    assert key != cache.get_key(CODE + " ", TOOLCHAIN_VERSION)
+    assert key != cache.get_key(CODE, "pystan 2.19.1.2")
+
+
+def test_load_miss(tmp_path):
+
+    cache = StanModelCache(str(tmp_path))
+
+    assert cache.load(cache.get_key(CODE, TOOLCHAIN_VERSION)) is None
+
+
+def test_save_load(tmp_path):
+
+    cache = StanModelCache(str(tmp_path))
+    key = cache.get_key(CODE, TOOLCHAIN_VERSION)
+    cache.save(key, {"code": CODE})
+
+    assert cache.load(key) == {"code": CODE}
+    assert [file_nm for file_nm in listdir(str(tmp_path)) if file_nm.endswith(".tmp")] == []
+
+
+@pytest.mark.parametrize(
+    "entry_content",
+    [
+        b"",
+        b"not a pickle",
+        b"cno_such_pystan_module\nStanModel\n.",
+        b"cpickle\nno_such_attribute\n."
+    ]
+)
+def test_load_incompatible_entry(tmp_path, entry_content):
+
+    cache = StanModelCache(str(tmp_path))
+    key = cache.get_key(CODE, TOOLCHAIN_VERSION)
+    entry_path = path.join(str(tmp_path), key + ".pkl")
+    with open(entry_path, "wb") as f:
+        f.write(entry_content)
+
+    assert cache.load(key) is None
+    assert not path.exists(entry_path)
+
+    cache.save(key, {"code": CODE})
+
+    assert cache.load(key) == {"code": CODE}
+
+
+def test_evict_by_nb_models(tmp_path):
+
+    cache = StanModelCache(str(tmp_path), max_nb_models=2)
+    keys = [cache.get_key(CODE + str(i), TOOLCHAIN_VERSION) for i in range(3)]
+
+    for i, key in enumerate(keys[:2]):
+        cache.save(key, i)
+        utime(path.join(str(tmp_path), key + ".pkl"), (i, i))
+
+    cache.load(keys[0]) # keys[1] becomes the least recently used
+    cache.save(keys[2], 2)
+
+    assert cache.load(keys[0]) == 0
+    assert cache.load(keys[1]) is None
+    assert cache.load(keys[2]) == 2
+
+
+def test_evict_by_size(tmp_path):
+
+    cache = StanModelCache(str(tmp_path), max_size_mb=1.5)
+    keys = [cache.get_key(CODE + str(i), TOOLCHAIN_VERSION) for i in range(2)]
+
+    cache.save(keys[0], b"0" * 1024 ** 2)
+    utime(path.join(str(tmp_path), keys[0] + ".pkl"), (0, 0))
+    cache.save(keys[1], b"1" * 1024 ** 2)
+
+    assert cache.load(keys[0]) is None
+    assert cache.load(keys[1]) == b"1" * 1024 ** 2
+
+
+@pytest.mark.parametrize(
+    "input_nm, input_val",
+    [
+        ("max_size_mb", 0),
+        ("max_nb_models", 0)
+    ]
+)
+def test_init_input_error(tmp_path, input_nm, input_val):
+
+    with pytest.raises(ValueError):
+        StanModelCache(str(tmp_path), **{input_nm: input_val})
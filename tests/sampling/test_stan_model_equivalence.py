@@ -0,0 +1,127 @@
+from itertools import product
+
+import pytest
+import numpy as np
+
+# the generated models are compiled, nothing to check without pystan
+pytest.importorskip("pystan")
+
+from bayesian_mmm.sampling.stan_model_generator import StanModelGenerator
+from bayesian_mmm.spend_transformation.spend_transformation import add_lagged_values_along_z
+
+NB_OBS = 40
+NB_MEDIA = 3
+NB_CTRL = 2
+MAX_LAG = 13
+NB_POINTS = 5
+
+VARIANTS = list(product(["adstock", "geo_decay"], ["hill", "reach"], [True, False]))
+
+random_generator = np.random.default_rng(2021)
+SPENDS = random_generator.random((NB_OBS, NB_MEDIA)) * (random_generator.random((NB_OBS, NB_MEDIA)) > 0.3)
+CTRL_VARS = random_generator.random((NB_OBS, NB_CTRL))
+REVENUE = random_generator.random(NB_OBS) + 0.5
+
+FITS = {}
+
+
+def get_fit(variant, generator_kwargs):
+
+    # compiled once per variant and mode, the fit gives access to the log density
+    key = variant + tuple(sorted(generator_kwargs.items()))
+
+    if key not in FITS:
+
+        stan_model_generator = StanModelGenerator(*variant, **generator_kwargs)
+        stan_model_generator.create_model()
+        stan_model = stan_model_generator.get_model()._StanModelWrapper__model
+
+        FITS[key] = stan_model.sampling(
+            data=get_stan_input(variant, generator_kwargs.get("with_lagged_spends", True)),
+            iter=1,
+            chains=1,
+            algorithm="Fixed_param",
+            seed=2021
+        )
+
+    return FITS[key]
+
+
+def get_stan_input(variant, with_lagged_spends):
+
+    stan_input = {
+        "N": NB_OBS,
+        "Y": REVENUE,
+        "max_lag": MAX_LAG,
+        "num_media": NB_MEDIA,
+        "X_media": add_lagged_values_along_z(SPENDS, MAX_LAG) if with_lagged_spends else SPENDS
+    }
+
+    if variant[2]:
+        stan_input.update({"num_ctrl": NB_CTRL, "X_ctrl": CTRL_VARS})
+
+    return stan_input
+
+
+def get_params(variant):
+
+    # points in the support of the params, the same for every mode
+    carryover_transfo_nm, diminushing_returns_transfo_nm, with_ctrl_vars = variant
+    points = []
+
+    for _ in range(NB_POINTS):
+
+        params = {
+            "noise_var": random_generator.uniform(0.01, 1),
+            "tau": random_generator.uniform(0, 1),
+            "beta_medias": random_generator.uniform(0, 1, NB_MEDIA),
+            "retain_rate": random_generator.uniform(0.05, 0.95, NB_MEDIA)
+        }
+
+        if carryover_transfo_nm == "adstock":
+            params["delay"] = random_generator.uniform(0, MAX_LAG - 1, NB_MEDIA)
+
+        if with_ctrl_vars:
+            params["gamma_ctrl"] = random_generator.normal(size=NB_CTRL)
+
+        if diminushing_returns_transfo_nm == "hill":
+            params["ec"] = random_generator.uniform(0.05, 0.95, NB_MEDIA)
+            params["slope"] = random_generator.uniform(0.5, 3, NB_MEDIA)
+        elif diminushing_returns_transfo_nm == "reach":
+            params["half_saturation"] = random_generator.uniform(0.1, 3, NB_MEDIA)
+
+        points.append(params)
+
+    return points
+
+
+def get_log_prob_and_gradient(fit, points):
+
+    upars = [fit.unconstrain_pars(params) for params in points]
+
+    return (
+        np.array([fit.log_prob(upar) for upar in upars]),
+        np.array([fit.grad_log_prob(upar) for upar in upars])
+    )
+
+
+@pytest.mark.parametrize("variant", VARIANTS)
+@pytest.mark.parametrize(
+    "generator_kwargs",
+    [{"vectorized": True}, {"vectorized": True, "with_lagged_spends": False}]
+)
+def test_vectorized_model_equivalence(variant, generator_kwargs):
+
+    # the default model on lagged spends is the reference, the convolution
+    # mode gets the raw spends and computes the carryover in the model
+    points = get_params(variant)
+
+    expected_log_prob, expected_gradient = get_log_prob_and_gradient(
+        get_fit(variant, {}), points
+    )
+    obtained_log_prob, obtained_gradient = get_log_prob_and_gradient(
+        get_fit(variant, generator_kwargs), points
+    )
+
+    assert np.allclose(obtained_log_prob, expected_log_prob, rtol=1e-10, atol=1e-10)
+    assert np.allclose(obtained_gradient, expected_gradient, rtol=1e-10, atol=1e-10)
@@ -31,6 +31,18 @@ def test_init_input_error(input_nm, input_val):
         StanModelGenerator(**input_nm_to_val)
 
 
+def test_init_input_error_with_lagged_spends():
+
+    with pytest.raises(ValueError):
+        StanModelGenerator(
+            CARRYOVER_TRANSFO_NM,
+            DIMINUSHING_RETURNS_TRANSFO_NM,
+            WITH_CTRL_VARS,
+            vectorized=False,
+            with_lagged_spends=False
+        )
+
+
 @pytest.mark.parametrize(
     "carryover_transfo_nm, diminushing_returns_transfo_nm",
     [
@@ -142,7 +154,7 @@ def test_create_parameters_code(
         ("geo_decay", "hill", False),
     ]
 )
-def test_create_transformed_parameters_code(
+def test_get_mean_response_code(
     carryover_transfo_nm,
     diminushing_returns_transfo_nm,
     with_ctrl_vars
@@ -153,7 +165,7 @@ def test_create_transformed_parameters_code(
         diminushing_returns_transfo_nm,
         str(with_ctrl_vars).lower()
     )
-    with open(EXPECTED_CODE_DIR+"transformed_parameters/"+code_file_nm, "r") as f:
+    with open(EXPECTED_CODE_DIR+"mean_response/"+code_file_nm, "r") as f:
         expected_code = f.read()
 
     input_nm_to_val = {
@@ -163,8 +175,7 @@ def test_create_transformed_parameters_code(
     }
 
     sampler = StanModelGenerator(**input_nm_to_val)
-    sampler._StanModelGenerator__create_transformed_parameters_code()
-    obtained_code = sampler._StanModelGenerator__transformed_parameters_code
+    obtained_code = sampler._StanModelGenerator__get_mean_response_code()
 
     trim_expected_code = trim(expected_code)
     trim_obtained_code = trim(obtained_code)
@@ -215,6 +226,172 @@ def test_create_model_code(carryover_transfo_nm, diminushing_returns_transfo_nm,
 
 
 
+@pytest.mark.parametrize(
+    "carryover_transfo_nm, diminushing_returns_transfo_nm",
+    [
+        ("adstock", "hill"),
+        ("adstock", "reach"),
+        ("geo_decay", "reach"),
+        ("geo_decay", "hill")
+    ]
+)
+def test_create_vectorized_function_code(carryover_transfo_nm, diminushing_returns_transfo_nm):
+
+    code_file_nm = "expected_code_%s_%s.txt" % (
+        carryover_transfo_nm, diminushing_returns_transfo_nm
+    )
+
+    with open(EXPECTED_CODE_DIR+"vectorized/function/"+code_file_nm, "r") as f:
+        expected_code = f.read()
+
+    input_nm_to_val = {
+        "carryover_transfo_nm":carryover_transfo_nm,
+        "diminushing_returns_transfo_nm":diminushing_returns_transfo_nm,
+        "with_ctrl_vars":WITH_CTRL_VARS,
+        "vectorized":True
+    }
+
+    sampler = StanModelGenerator(**input_nm_to_val)
+    sampler._StanModelGenerator__create_functions_code()
+    obtained_code = sampler._StanModelGenerator__function_code
+
+    assert trim(obtained_code) == trim(expected_code)
+
+
+@pytest.mark.parametrize("with_ctrl_vars", [True, False])
+def test_create_vectorized_data_code(with_ctrl_vars):
+
+    code_file_nm = "expected_code_with_ctrl_vars_%s.txt" % str(with_ctrl_vars).lower()
+
+    with open(EXPECTED_CODE_DIR+"vectorized/data/"+code_file_nm, "r") as f:
+        expected_code = f.read()
+
+    input_nm_to_val = {
+        "carryover_transfo_nm":CARRYOVER_TRANSFO_NM,
+        "diminushing_returns_transfo_nm":DIMINUSHING_RETURNS_TRANSFO_NM,
+        "with_ctrl_vars":with_ctrl_vars,
+        "vectorized":True
+    }
+
+    sampler = StanModelGenerator(**input_nm_to_val)
+    sampler._StanModelGenerator__create_data_code()
+    obtained_code = sampler._StanModelGenerator__data_code
+
+    assert trim(obtained_code) == trim(expected_code)
+
+
+@pytest.mark.parametrize(
+    "carryover_transfo_nm, diminushing_returns_transfo_nm, with_ctrl_vars",
+    [
+        ("adstock", "hill", True),
+        ("adstock", "hill", False),
+        ("adstock", "reach", True),
+        ("adstock", "reach", False),
+        ("geo_decay", "reach", True),
+        ("geo_decay", "reach", False),
+        ("geo_decay", "hill", True),
+        ("geo_decay", "hill", False)
+    ]
+)
+@pytest.mark.parametrize("block_nm", ["mean_response", "model"])
+def test_create_vectorized_code(
+    carryover_transfo_nm,
+    diminushing_returns_transfo_nm,
+    with_ctrl_vars,
+    block_nm
+    ):
+
+    code_file_nm = "expected_code_%s_%s_with_ctrl_vars_%s.txt" % (
+        carryover_transfo_nm,
+        diminushing_returns_transfo_nm,
+        str(with_ctrl_vars).lower()
+    )
+
+    with open(EXPECTED_CODE_DIR+"vectorized/"+block_nm+"/"+code_file_nm, "r") as f:
+        expected_code = f.read()
+
+    input_nm_to_val = {
+        "carryover_transfo_nm":carryover_transfo_nm,
+        "diminushing_returns_transfo_nm":diminushing_returns_transfo_nm,
+        "with_ctrl_vars":with_ctrl_vars,
+        "vectorized":True
+    }
+
+    sampler = StanModelGenerator(**input_nm_to_val)
+    if block_nm == "mean_response":
+        obtained_code = sampler._StanModelGenerator__get_mean_response_code()
+    else:
+        sampler._StanModelGenerator__create_model_code()
+        obtained_code = sampler._StanModelGenerator__model_code
+
+    assert trim(obtained_code) == trim(expected_code)
+
+
+@pytest.mark.parametrize("with_ctrl_vars", [True, False])
+def test_create_convolution_data_code(with_ctrl_vars):
+
+    code_file_nm = "expected_code_with_ctrl_vars_%s.txt" % str(with_ctrl_vars).lower()
+
+    with open(EXPECTED_CODE_DIR+"convolution/data/"+code_file_nm, "r") as f:
+        expected_code = f.read()
+
+    input_nm_to_val = {
+        "carryover_transfo_nm":CARRYOVER_TRANSFO_NM,
+        "diminushing_returns_transfo_nm":DIMINUSHING_RETURNS_TRANSFO_NM,
+        "with_ctrl_vars":with_ctrl_vars,
+        "vectorized":True,
+        "with_lagged_spends":False
+    }
+
+    sampler = StanModelGenerator(**input_nm_to_val)
+    sampler._StanModelGenerator__create_data_code()
+    obtained_code = sampler._StanModelGenerator__data_code
+
+    assert trim(obtained_code) == trim(expected_code)
+
+
+@pytest.mark.parametrize(
+    "carryover_transfo_nm, diminushing_returns_transfo_nm, with_ctrl_vars",
+    [
+        ("adstock", "hill", True),
+        ("adstock", "hill", False),
+        ("adstock", "reach", True),
+        ("adstock", "reach", False),
+        ("geo_decay", "reach", True),
+        ("geo_decay", "reach", False),
+        ("geo_decay", "hill", True),
+        ("geo_decay", "hill", False)
+    ]
+)
+def test_get_convolution_mean_response_code(
+    carryover_transfo_nm,
+    diminushing_returns_transfo_nm,
+    with_ctrl_vars
+    ):
+
+    code_file_nm = "expected_code_%s_%s_with_ctrl_vars_%s.txt" % (
+        carryover_transfo_nm,
+        diminushing_returns_transfo_nm,
+        str(with_ctrl_vars).lower()
+    )
+
+    with open(EXPECTED_CODE_DIR+"convolution/mean_response/"+code_file_nm, "r") as f:
+        expected_code = f.read()
+
+    input_nm_to_val = {
+        "carryover_transfo_nm":carryover_transfo_nm,
+        "diminushing_returns_transfo_nm":diminushing_returns_transfo_nm,
+        "with_ctrl_vars":with_ctrl_vars,
+        "vectorized":True,
+        "with_lagged_spends":False
+    }
+
+    sampler = StanModelGenerator(**input_nm_to_val)
+    obtained_code = sampler._StanModelGenerator__get_mean_response_code()
+
+    assert trim(obtained_code) == trim(expected_code)
+
+
 # this one takes a long time to run
 @pytest.mark.parametrize(
     "carryover_transfo_nm, diminushing_returns_transfo_nm, with_ctrl_vars",
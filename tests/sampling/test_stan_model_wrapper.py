@@ -0,0 +1,62 @@
+from bayesian_mmm.sampling.stan_model_wrapper import StanModelWrapper
+
+PARAM_NMS = ["noise_var", "tau", "beta_medias", "gamma_ctrl", "retain_rate", "delay", "ec", "slope"]
+
+
+class RecordingFit:
+
+    def __init__(self, sampling_kwargs):
+
+        self.sampling_kwargs = sampling_kwargs
+
+    def get_last_position(self):
+
+        return [{param_nm: 0.5 for param_nm in self.sampling_kwargs["pars"]}]
+
+    def get_stepsize(self):
+
+        return [0.1]
+
+    def get_inv_metric(self):
+
+        return [[1.]]
+
+    def extract(self, pars=None, permuted=True):
+
+        return {param_nm: [0.5] for param_nm in pars}
+
+
+class RecordingStanModel:
+
+    # stands for the compiled pystan model, the sampling calls are recorded
+    def __init__(self):
+
+        self.sampling_kwargs = []
+
+    def sampling(self, **kwargs):
+
+        self.sampling_kwargs.append(kwargs)
+
+        return RecordingFit(kwargs)
+
+
+def test_get_param_nms():
+
+    assert StanModelWrapper().get_param_nms() == PARAM_NMS
+
+
+def test_sample_saves_parameters_block_only():
+
+    stan_model = StanModelWrapper()
+    stan_model._StanModelWrapper__model = RecordingStanModel()
+
+    results = stan_model.sample({}, 100, 1, ["tau", "beta_medias"], permuted=False)
+    continued_results = stan_model.continue_sampling({}, 50, ["tau"], permuted=False)
+
+    sampling_kwargs = stan_model._StanModelWrapper__model.sampling_kwargs
+
+    # every param is kept to restart the chains, only the requested ones are extracted
+    assert [kwargs["pars"] for kwargs in sampling_kwargs] == [PARAM_NMS, PARAM_NMS]
+    assert sampling_kwargs[1]["init"] == [{param_nm: 0.5 for param_nm in PARAM_NMS}]
+    assert list(results.keys()) == ["tau", "beta_medias"]
+    assert list(continued_results.keys()) == ["tau"]
@@ -0,0 +1,111 @@
+import pytest
+import numpy as np
+
+from bayesian_mmm.contribution_analysis.contribution_calculator import ContributionCalculator
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.scenario_analysis.scenario_engine import ScenarioEngine, run_scenarios
+
+
+PREFIX_SPENDS = np.array([
+    [0.5, 0.2],
+    [0.1, 0.8]
+])
+CTRL_VARS = np.array([
+    [0.2, 0.4],
+    [0.5, 0.2],
+    [0.6, 0.4]
+])
+MAX_LAG = 3
+
+np.random.seed(2021)
+PLANS = np.random.rand(5, 3, 2)
+
+PARAM_NM_TO_VAL = {
+    "retain_rate": [0.2, 0.9],
+    "delay": [1.5, 1],
+    "ec": [0.2, 1],
+    "slope": [1, 4],
+    "beta_medias": [0.2, 0.4],
+    "gamma_ctrl": [0.5, 1],
+    "tau": 0.1
+}
+
+TARGET_NORMALIZER = Normalizer("log", "max_abs")
+TARGET_NORMALIZER.fit(np.array([[100], [300], [250]]))
+
+
+def get_expected_results(plan, with_prefix):
+
+    spends = np.concatenate([PREFIX_SPENDS, plan]) if with_prefix else plan
+    padded_ctrl_vars = np.zeros((len(spends), 2))
+    padded_ctrl_vars[-len(plan):] = CTRL_VARS
+
+    y = InferenceMachine(PARAM_NM_TO_VAL, MAX_LAG).predict(
+        np.concatenate([np.zeros((MAX_LAG, 2)), spends]),
+        np.concatenate([np.zeros((MAX_LAG, 2)), padded_ctrl_vars])
+    )[-len(plan):]
+    target = TARGET_NORMALIZER.reverse_transform(y.reshape((-1, 1))).reshape((-1,))
+
+    contribution_calculator = ContributionCalculator(
+        PARAM_NM_TO_VAL, MAX_LAG, TARGET_NORMALIZER, ["a", "b"], []
+    )
+    contribution_calculator.compute_results(
+        np.concatenate([np.zeros((MAX_LAG, 2)), spends]), None, np.arange(MAX_LAG + len(spends))
+    )
+    contributions = contribution_calculator.get_results().values[-len(plan):, :2]
+
+    return target, contributions
+
+
+@pytest.mark.parametrize(
+    "with_prefix,chunk_size,nb_processes,min_nb_lagged_spends_per_process",
+    [
+        (False, 256, 1, 0),
+        (True, 2, 1, 0),
+        (True, 2, 2, 0),
+        (True, 2, 2, None)
+    ]
+)
+def test_run_scenarios(with_prefix, chunk_size, nb_processes, min_nb_lagged_spends_per_process):
+
+    # a min of 0 always uses the process pool, None keeps the default min
+    kwargs = {}
+    if min_nb_lagged_spends_per_process is not None:
+        kwargs["min_nb_lagged_spends_per_process"] = min_nb_lagged_spends_per_process
+
+
+    results = run_scenarios(
+        ScenarioEngine(PARAM_NM_TO_VAL, MAX_LAG),
+        TARGET_NORMALIZER,
+        PLANS,
+        PLANS[2],
+        CTRL_VARS,
+        PREFIX_SPENDS if with_prefix else None,
+        chunk_size,
+        nb_processes,
+        **kwargs
+    )
+
+    baseline_target, baseline_contributions = get_expected_results(PLANS[2], with_prefix)
+
+    for plan_index, plan in enumerate(PLANS):
+
+        target, contributions = get_expected_results(plan, with_prefix)
+
+        assert np.allclose(results["target"][plan_index], target)
+        assert np.allclose(results["contributions"][plan_index], contributions)
+        assert np.allclose(results["target_delta"][plan_index], target - baseline_target)
+        assert np.allclose(
+            results["contributions_delta"][plan_index], contributions - baseline_contributions
+        )
+
+    assert np.allclose(results["target_delta"][2], 0)
+
+
+def test_run_scenarios_input_error():
+
+    with pytest.raises(ValueError):
+        run_scenarios(
+            ScenarioEngine(PARAM_NM_TO_VAL, MAX_LAG), TARGET_NORMALIZER, PLANS[0]
+        )
@@ -0,0 +1,125 @@
+import pytest
+import numpy as np
+from os import makedirs, remove, utime
+
+from bayesian_mmm.inference_machine.inference_machine import (
+    InferenceMachine,
+    save_inference_machine
+)
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.serving.model_registry import ModelRegistry
+
+
+SPENDS = np.array([
+    [10, 20],
+    [0, 8],
+    [1, 30],
+    [5, 40]
+])
+MAX_LAG = 2
+
+PARAM_NM_TO_VAL = {
+    "retain_rate": [0.2, 0.9],
+    "half_saturation": [2, 3],
+    "beta_medias": [0.2, 0.4],
+    "tau": 2
+}
+
+
+@pytest.fixture
+def results_dir(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    makedirs("results/inference_machine")
+    makedirs("results/normalizer")
+
+    return tmp_path
+
+
+def save_experiment(experiment_nm: str, tau: float) -> None:
+
+    save_inference_machine(
+        InferenceMachine(dict(PARAM_NM_TO_VAL, tau=tau), MAX_LAG), experiment_nm
+    )
+
+    target_normalizer = Normalizer(None, "max_abs")
+    target_normalizer.fit(np.array([[1.], [10.]]))
+    target_normalizer.save("target_" + experiment_nm)
+
+
+def test_predict(results_dir):
+
+    save_experiment("demo", 2)
+    model_registry = ModelRegistry()
+
+    expected_y = 10 * InferenceMachine(PARAM_NM_TO_VAL, MAX_LAG).predict(SPENDS, None)
+
+    assert np.allclose(model_registry.predict("demo", SPENDS, None), expected_y)
+
+
+def test_get_loads_once(results_dir):
+
+    save_experiment("demo", 2)
+    model_registry = ModelRegistry()
+
+    assert model_registry.get("demo") is model_registry.get("demo")
+
+
+def test_get_reloads_updated_artifacts(results_dir):
+
+    save_experiment("demo", 2)
+    model_registry = ModelRegistry()
+    entry = model_registry.get("demo")
+
+    save_experiment("demo", 3)
+    utime("results/inference_machine/demo.pkl", ns=(0, 0))
+    updated_entry = model_registry.get("demo")
+
+    assert updated_entry is not entry
+    assert updated_entry["inference_machine"]._tau == 3
+
+
+def test_get_skips_touched_artifacts_with_content_hash(results_dir):
+
+    save_experiment("demo", 2)
+    model_registry = ModelRegistry(with_content_hash=True)
+    entry = model_registry.get("demo")
+
+    utime("results/inference_machine/demo.pkl", ns=(0, 0))
+
+    assert model_registry.get("demo")["inference_machine"] is entry["inference_machine"]
+
+
+def test_get_keeps_loaded_entry_while_artifacts_are_replaced(results_dir):
+
+    save_experiment("demo", 2)
+    model_registry = ModelRegistry()
+    entry = model_registry.get("demo")
+
+    # a training run removes the artifacts before writing the new ones
+    remove("results/normalizer/scaler_target_demo.pkl")
+
+    assert model_registry.get("demo") is entry
+
+    with pytest.raises(OSError):
+        ModelRegistry().get("demo")
+
+
+def test_get_evicts_least_recently_used(results_dir):
+
+    for experiment_nm in ["a", "b", "c"]:
+        save_experiment(experiment_nm, 2)
+
+    model_registry = ModelRegistry(max_nb_models=2)
+    model_registry.get("a")
+    model_registry.get("b")
+    model_registry.get("a")
+    model_registry.get("c")
+
+    assert model_registry.get_loaded_experiment_nms() == ["a", "c"]
+
+
+def test_init_input_error():
+
+    with pytest.raises(ValueError):
+        ModelRegistry(max_nb_models=0)
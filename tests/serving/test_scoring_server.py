@@ -0,0 +1,169 @@
+import pytest
+import numpy as np
+from json import dumps, loads
+from os import makedirs
+from threading import Thread
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from bayesian_mmm.inference_machine.inference_machine import (
+    InferenceMachine,
+    save_inference_machine
+)
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.serving.model_registry import ModelRegistry
+from bayesian_mmm.serving.scoring_server import (
+    ARROW_CONTENT_TYPE,
+    PYARROW_IS_AVAILABLE,
+    MicroBatcher,
+    create_scoring_server,
+    read_arrow_payload,
+    write_arrow_payload
+)
+
+
+SPENDS = np.array([
+    [10, 20],
+    [0, 8],
+    [1, 30],
+    [5, 40]
+])
+CTRL_VARS = np.array([
+    [2, 4],
+    [5, 2],
+    [6, 4],
+    [7, 2]
+])
+MAX_LAG = 3
+
+PARAM_NM_TO_VAL = {
+    "retain_rate": [0.2, 0.9],
+    "half_saturation": [2, 3],
+    "beta_medias": [0.2, 0.4],
+    "gamma_ctrl": [0.5, 1],
+    "tau": 2
+}
+
+
+@pytest.fixture
+def model_registry(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    makedirs("results/inference_machine")
+    makedirs("results/normalizer")
+
+    save_inference_machine(InferenceMachine(PARAM_NM_TO_VAL, MAX_LAG), "demo")
+
+    target_normalizer = Normalizer(None, "max_abs")
+    target_normalizer.fit(np.array([[1.], [10.]]))
+    target_normalizer.save("target_demo")
+
+    return ModelRegistry()
+
+
+def test_micro_batcher(model_registry):
+
+    requests = [
+        (SPENDS, CTRL_VARS),
+        (SPENDS[:2] * 2, None),
+        (SPENDS[1:], CTRL_VARS[1:]),
+        (np.ones((2, 3)), None)
+    ]
+
+    micro_batcher = MicroBatcher(model_registry, batch_window_ms=50)
+    futures = [micro_batcher.submit("demo", spends, ctrl_vars) for spends, ctrl_vars in requests]
+    micro_batcher.start()
+
+    for (spends, ctrl_vars), future in zip(requests[:3], futures[:3]):
+        padded_spends = np.concatenate([np.zeros((MAX_LAG, 2)), spends])
+        padded_ctrl_vars = np.zeros((len(padded_spends), 2))
+        if ctrl_vars is not None:
+            padded_ctrl_vars[MAX_LAG:] = ctrl_vars
+        expected_pred = model_registry.predict("demo", padded_spends, padded_ctrl_vars)[MAX_LAG:]
+        assert np.allclose(future.result(1), expected_pred)
+
+    # spends with a wrong nb of media only fail their own request
+    with pytest.raises(ValueError):
+        futures[3].result(1)
+
+    micro_batcher.stop()
+
+
+def test_scoring_server(model_registry):
+
+    scoring_server = create_scoring_server(port=0, model_registry=model_registry)
+    Thread(target=scoring_server.serve_forever, daemon=True).start()
+
+    url = "http://127.0.0.1:%d" % scoring_server.server_address[1]
+
+    try:
+        request = Request(
+            url + "/predict",
+            data=dumps({
+                "experiment_nm": "demo",
+                "spends": SPENDS.tolist(),
+                "ctrl_vars": CTRL_VARS.tolist()
+            }).encode(),
+            headers={"Content-Type": "application/json"}
+        )
+        with urlopen(request) as response:
+            pred = loads(response.read())["pred"]
+
+        with urlopen(url + "/metrics") as response:
+            metrics = loads(response.read())
+
+    finally:
+        scoring_server.shutdown()
+        scoring_server.server_close()
+
+    assert np.allclose(pred, model_registry.predict("demo", SPENDS, CTRL_VARS))
+    assert metrics["nb_requests"] == 1
+    assert metrics["nb_errors"] == 0
+
+
+
+def test_scoring_server_without_pyarrow(model_registry, monkeypatch):
+
+    monkeypatch.setattr("bayesian_mmm.serving.scoring_server.PYARROW_IS_AVAILABLE", False)
+
+    scoring_server = create_scoring_server(port=0, model_registry=model_registry)
+    Thread(target=scoring_server.serve_forever, daemon=True).start()
+
+    try:
+        request = Request(
+            "http://127.0.0.1:%d/predict?experiment_nm=demo" % scoring_server.server_address[1],
+            data=b"",
+            headers={"Content-Type": ARROW_CONTENT_TYPE}
+        )
+        with pytest.raises(HTTPError) as error:
+            urlopen(request)
+
+    finally:
+        scoring_server.shutdown()
+        scoring_server.server_close()
+
+    assert error.value.code == 415
+
+
+
+@pytest.mark.skipif(not PYARROW_IS_AVAILABLE, reason="pyarrow not installed")
+def test_arrow_payload():
+
+    from pyarrow import BufferOutputStream, ipc, table
+
+    spends_table = table({
+        "TV": SPENDS[:, 0], "radio": SPENDS[:, 1], "ctrl_index": CTRL_VARS[:, 0]
+    })
+    sink = BufferOutputStream()
+    with ipc.new_stream(sink, spends_table.schema) as writer:
+        writer.write_table(spends_table)
+
+    spends, ctrl_vars = read_arrow_payload(sink.getvalue().to_pybytes())
+
+    assert np.allclose(spends, SPENDS)
+    assert np.allclose(ctrl_vars, CTRL_VARS[:, :1])
+
+    pred = np.array([1., 2.])
+    pred_table = ipc.open_stream(write_arrow_payload(pred)).read_all()
+
+    assert np.allclose(pred_table.column("pred").to_numpy(), pred)
@@ -6,7 +6,12 @@ from bayesian_mmm.spend_transformation.spend_transformation import (
     compute_adstock,
     compute_geo_decay,
     compute_hill,
-    compute_reach
+    compute_hill_derivative,
+    compute_hill_inverse,
+    compute_reach,
+    compute_reach_derivative,
+    compute_reach_inverse,
+    view_lagged_values_along_z
 )
 
 SPENDS = np.array([[10, 20], [0, 8], [1, 30], [5, 40]])
@@ -34,6 +39,14 @@ def test_add_lagged_values_along_z():
     assert (add_lagged_values_along_z(SPENDS, MAX_LAG) == LAGGED_SPENDS).all()
 
 
+def test_view_lagged_values_along_z():
+
+    lagged_spends = view_lagged_values_along_z(SPENDS, MAX_LAG)
+
+    assert (lagged_spends == LAGGED_SPENDS).all()
+    assert not lagged_spends.flags.writeable
+
+
 def test_compute_adstock():
 
     ADSTOCK_SPENDS = np.array([
@@ -82,3 +95,101 @@ def test_compute_reach():
         ])
 
     assert (compute_reach(SPENDS, HALF_SATURATIONS) == REACH_SPENDS).all()
+
+
+@pytest.mark.parametrize(
+    "transfo_func,spends,param_nm_to_val",
+    [
+        (compute_adstock, LAGGED_SPENDS, {"delays":[DELAYS, [1, 0.5]], "retain_rates":[RETAIN_RATES, [0.5, 0.1]]}),
+        (compute_geo_decay, LAGGED_SPENDS, {"retain_rates":[RETAIN_RATES, [0.5, 0.1]]}),
+        (compute_hill, SPENDS, {"ecs":[ECS, [0.5, 0.1]], "slopes":[SLOPES, [2, 0.5]]}),
+        (compute_reach, SPENDS, {"half_saturations":[HALF_SATURATIONS, [0.5, 1]]})
+    ]
+)
+def test_compute_with_draws(transfo_func, spends, param_nm_to_val):
+
+    nb_draws = 2
+
+    obtained_spends = transfo_func(
+        spends,
+        **{param_nm:np.array(values) for param_nm, values in param_nm_to_val.items()}
+        )
+
+    assert obtained_spends.shape == (nb_draws, SPENDS.shape[0], SPENDS.shape[1])
+
+    for draw_index in range(nb_draws):
+        expected_spends = transfo_func(
+            spends,
+            **{param_nm:values[draw_index] for param_nm, values in param_nm_to_val.items()}
+            )
+        assert np.allclose(obtained_spends[draw_index], expected_spends)
+
+
+@pytest.mark.parametrize(
+    "transfo_func,engine_nm,param_nm_to_val",
+    [
+        (compute_adstock, "fft", {"delays":DELAYS, "retain_rates":RETAIN_RATES}),
+        (compute_adstock, "fft", {"delays":[DELAYS, [1, 0.5]], "retain_rates":[RETAIN_RATES, [0.5, 0.1]]}),
+        (compute_geo_decay, "fft", {"retain_rates":RETAIN_RATES}),
+        (compute_geo_decay, "recursive", {"retain_rates":RETAIN_RATES}),
+        (compute_geo_decay, "recursive", {"retain_rates":[RETAIN_RATES, [1, 0]]})
+    ]
+)
+def test_compute_carryover_engines(transfo_func, engine_nm, param_nm_to_val):
+
+    param_nm_to_val = {param_nm:np.array(values) for param_nm, values in param_nm_to_val.items()}
+
+    obtained_spends = transfo_func(LAGGED_SPENDS, engine_nm=engine_nm, **param_nm_to_val)
+    expected_spends = transfo_func(LAGGED_SPENDS, **param_nm_to_val)
+
+    assert np.allclose(obtained_spends, expected_spends)
+
+
+@pytest.mark.parametrize(
+    "transfo_func,engine_nm,param_nm_to_val",
+    [
+        (compute_adstock, "recursive", {"delays":DELAYS, "retain_rates":RETAIN_RATES}),
+        (compute_geo_decay, "unknown", {"retain_rates":RETAIN_RATES})
+    ]
+)
+def test_compute_carryover_engines_input_error(transfo_func, engine_nm, param_nm_to_val):
+
+    with pytest.raises(ValueError):
+        transfo_func(LAGGED_SPENDS, engine_nm=engine_nm, **param_nm_to_val)
+
+
+@pytest.mark.parametrize(
+    "transfo_func,derivative_func,param_nm_to_val",
+    [
+        (compute_hill, compute_hill_derivative, {"ecs":ECS, "slopes":SLOPES}),
+        (compute_reach, compute_reach_derivative, {"half_saturations":HALF_SATURATIONS})
+    ]
+)
+def test_compute_derivative(transfo_func, derivative_func, param_nm_to_val):
+
+    spends = SPENDS / 40 + 0.1
+    eps = 1e-6
+
+    expected_derivative = (
+        transfo_func(spends + eps, **param_nm_to_val) - transfo_func(spends - eps, **param_nm_to_val)
+        ) / (2 * eps)
+
+    assert np.allclose(derivative_func(spends, **param_nm_to_val), expected_derivative)
+
+
+@pytest.mark.parametrize(
+    "transfo_func,inverse_func,param_nm_to_val",
+    [
+        (compute_hill, compute_hill_inverse, {"ecs":ECS, "slopes":SLOPES}),
+        (compute_reach, compute_reach_inverse, {"half_saturations":HALF_SATURATIONS}),
+        (compute_reach, compute_reach_inverse, {"half_saturations":[HALF_SATURATIONS, [1, 0.5]]})
+    ]
+)
+def test_compute_inverse(transfo_func, inverse_func, param_nm_to_val):
+
+    spends = SPENDS / 40
+
+    transformed_spends = transfo_func(spends, **param_nm_to_val)
+
+    assert np.allclose(inverse_func(transformed_spends, **param_nm_to_val), spends)
+    assert np.isinf(inverse_func(np.array([[1, 1.5]]), **param_nm_to_val)).all()
@@ -0,0 +1,108 @@
+from os import makedirs
+from pickle import dumps, loads
+
+import pytest
+import numpy as np
+
+from bayesian_mmm.contribution_analysis.contribution_calculator import ContributionCalculator
+from bayesian_mmm.inference_machine.inference_machine import InferenceMachine
+from bayesian_mmm.normalizer.normalizer import Normalizer
+from bayesian_mmm.spend_transformation.carryover_visualizor import CarryoverVisualizor
+from bayesian_mmm.spend_transformation.transform_cache import (
+    TransformCache,
+    get_array_key,
+    get_transform_key
+)
+
+
+SPENDS = np.array([
+    [10, 20],
+    [0, 8],
+    [1, 30],
+    [5, 40]
+]) / 40
+PARAM_NM_TO_VAL = {
+    "retain_rate": [0.2, 0.9],
+    "delay": [1.5, 1],
+    "half_saturation": [2, 3],
+    "beta_medias": [0.2, 0.4],
+    "tau": 2
+}
+MAX_LAG = 3
+
+
+def test_get():
+
+    transform_cache = TransformCache()
+    compute_func = lambda: SPENDS * 2
+
+    transformed_spends = transform_cache.get(("double", get_array_key(SPENDS)), compute_func)
+    # same values, other array
+    cached_transformed_spends = transform_cache.get(
+        ("double", get_array_key(SPENDS.copy())), compute_func
+    )
+
+    assert cached_transformed_spends is transformed_spends
+    assert (transform_cache.get_nb_hits(), transform_cache.get_nb_misses()) == (1, 1)
+    with pytest.raises(ValueError):
+        transformed_spends[0, 0] = 1
+
+
+def test_get_max_size():
+
+    # room for two (4, 2) float arrays
+    transform_cache = TransformCache(max_size_mb=128 / 1e6)
+
+    for factor in [1, 2, 3, 1]:
+        transform_cache.get((factor,), lambda: SPENDS * factor)
+
+    assert transform_cache.get_size_mb() == 128 / 1e6
+    assert transform_cache.get_nb_misses() == 4
+
+    transform_cache.get((3,), lambda: SPENDS * 3)
+    assert transform_cache.get_nb_hits() == 1
+
+
+def test_transform_cache_shared_by_consumers(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    makedirs("results/plot")
+
+    transform_cache = TransformCache()
+
+    inference_machine = InferenceMachine(PARAM_NM_TO_VAL, MAX_LAG)
+    expected_pred = inference_machine.predict(SPENDS, None)
+
+    # the carryover of the visualizor is reused by the inference machine,
+    # the transformed spends of the inference machine by the contribution calculator
+    carryover_visualizor = CarryoverVisualizor(
+        PARAM_NM_TO_VAL, ["radio", "tv"], MAX_LAG, transform_cache=transform_cache
+    )
+    carryover_visualizor.write_fig(SPENDS, "test")
+    assert transform_cache.get_nb_misses() == 1
+
+    inference_machine.set_transform_cache(transform_cache)
+    assert np.allclose(inference_machine.predict(SPENDS, None), expected_pred)
+    assert (transform_cache.get_nb_hits(), transform_cache.get_nb_misses()) == (1, 2)
+
+    target_normalizer = Normalizer()
+    target_normalizer.fit(np.array([[1], [2]]))
+    contribution_calculator = ContributionCalculator(
+        PARAM_NM_TO_VAL, MAX_LAG, target_normalizer, ["radio", "tv"], []
+    )
+    contribution_calculator.set_transform_cache(transform_cache)
+    contribution_calculator.compute_results(SPENDS, None, np.arange(len(SPENDS)))
+    assert (transform_cache.get_nb_hits(), transform_cache.get_nb_misses()) == (2, 2)
+
+    # the cache is not pickled with the inference machine
+    loaded_inference_machine = loads(dumps(inference_machine))
+    assert np.allclose(loaded_inference_machine.predict(SPENDS, None), expected_pred)
+    assert transform_cache.get_nb_hits() == 2
+
+
+def test_get_transform_key():
+
+    assert get_transform_key(np.exp, {"a": [1, 2], "b": "x"}, 3) == get_transform_key(
+        np.exp, {"b": "x", "a": np.array([1, 2])}, 3
+    )
+    assert get_transform_key(np.exp, {"a": [1, 2]}) != get_transform_key(np.exp, {"a": [1, 3]})
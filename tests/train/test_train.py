@@ -1,11 +1,15 @@
 import pytest
 import numpy as np
+import yaml
 from mock import patch
+from functools import partial
 from json import load
+from os import listdir, makedirs, path, symlink
 from pandas import read_csv, set_option
 
+from bayesian_mmm.inference_machine.posterior_inference_machine import load_posterior_inference_machine
+from bayesian_mmm.sampling.draw_store import DrawStore
 from bayesian_mmm.train import run
-from bayesian_mmm.sampling.sampler import Sampler
 
 set_option('mode.chained_assignment', 'raise')
 
@@ -48,7 +52,12 @@ def test_run(
 
     config_file_nm = "../tests/train/config/"+identifier_nm
 
-    with patch.object(Sampler, "run_sampling", new = (lambda x, y, z: sample)):
+    # the sample is given by the stub as the draws of one chain
+    draws = {param_nm: values[:, None] for param_nm, values in sample.items()}
+    with patch(
+        "bayesian_mmm.sampling.stan_model_wrapper.pystan.StanModel",
+        new=partial(StubStanModel, draws=draws)
+        ):
         run(config_file_nm)
 
     with open("./results/performance_test.json", "r") as f:
@@ -108,4 +117,207 @@ def create_sampler_run_sampling_output(
     if nb_ctrl > 0:
         sample["gamma_ctrl"] = np.random.rand(N_ITER, nb_ctrl)
 
-    return sample
\ No newline at end of file
+    return sample
+
+
+class StubFit:
+
+    # the draws of each param, of shape (nb_draws, nb_chains) + param shape
+    def __init__(self, draws):
+
+        self.__draws = draws
+
+    def get_last_position(self):
+
+        return [
+            {param_nm: draws[-1, chain] for param_nm, draws in self.__draws.items()}
+            for chain in range(self.__draws["tau"].shape[1])
+        ]
+
+    def get_stepsize(self):
+
+        return [0.1] * self.__draws["tau"].shape[1]
+
+    def get_inv_metric(self):
+
+        return [np.ones(1)] * self.__draws["tau"].shape[1]
+
+    def extract(self, pars=None, permuted=True):
+
+        return {param_nm: self.__draws[param_nm] for param_nm in pars}
+
+
+class StubStanModel:
+
+    # stands for pystan.StanModel, picklable so that it can be cached, the
+    # fits have the given draws or random draws of pars in their bounds
+    def __init__(self, model_code, verbose=False, draws=None):
+
+        self.model_code = model_code
+        self.draws = draws
+
+    def sampling(self, data, iter, chains, pars, warmup=None, **kwargs):
+
+        if self.draws is not None:
+            return StubFit(self.draws)
+
+        nb_draws = iter - (iter // 2 if warmup is None else warmup)
+        random_generator = np.random.default_rng(2021)
+        param_nm_to_shape = {
+            "noise_var": (), "tau": (), "gamma_ctrl": (data.get("num_ctrl", 0),)
+        }
+
+        return StubFit({
+            param_nm: random_generator.uniform(
+                0.2, 0.8, (nb_draws, chains) + param_nm_to_shape.get(param_nm, (NB_MEDIA,))
+            )
+            for param_nm in pars
+        })
+
+
+def run_on_stub_stan_model(tmp_path, monkeypatch, config_update):
+
+    # an adstock hill model with ctrl vars, trained in tmp_path on random draws
+    test_dir_path = path.dirname(path.abspath(__file__))
+    with open(path.join(test_dir_path, "config/adstock_hill_with_ctrl_vars_true.yaml"), "r") as f:
+        config = yaml.load(f, Loader=yaml.FullLoader)
+    config.update(config_update, SAMPLING_N_ITER=40)
+
+    data_path = path.join(test_dir_path, "../../data/mmm.csv")
+    monkeypatch.chdir(tmp_path)
+    for dir_path in ["config", "data", "results/plot", "results/normalizer", "results/inference_machine"]:
+        makedirs(dir_path, exist_ok=True)
+    if not path.exists("./data/mmm.csv"):
+        symlink(data_path, "./data/mmm.csv")
+    with open("./config/train.yaml", "w") as f:
+        yaml.dump(config, f)
+
+    with patch("bayesian_mmm.sampling.stan_model_wrapper.pystan.StanModel", new=StubStanModel):
+        run()
+
+
+def test_run_stan_model_cache(tmp_path, monkeypatch):
+
+    config_update = {"STAN_MODEL_CACHE": {"cache_dir": "./stan_model_cache", "max_size_mb": 100}}
+
+    for _ in range(2):
+        run_on_stub_stan_model(tmp_path, monkeypatch, config_update)
+
+    assert len(listdir("./stan_model_cache")) == 1
+
+
+
+def test_run_response_surface(tmp_path, monkeypatch):
+
+    run_on_stub_stan_model(tmp_path, monkeypatch, {
+        "RESPONSE_SURFACE": {
+            "max_spends_ratio": 2, "nb_grid_points": 10, "quantiles": [0.05, 0.95], "with_draws": False
+        }
+    })
+
+    assert path.exists("./results/inference_machine/response_surface_test.npz")
+
+
+
+def test_run_counterfactuals(tmp_path, monkeypatch):
+
+    run_on_stub_stan_model(tmp_path, monkeypatch, {"COUNTERFACTUAL_SCALING_FACTORS": [0, 1.1]})
+
+    counterfactuals = read_csv("./results/counterfactuals_test.csv")
+
+    assert len(counterfactuals) == 2 * NB_MEDIA * len(read_csv("./results/contributions_test.csv"))
+    assert (counterfactuals.loc[counterfactuals["scaling_factor"] == 0, "incremental_effect"] >= 0).all()
+
+
+
+def test_run_shapley_attribution(tmp_path, monkeypatch):
+
+    run_on_stub_stan_model(tmp_path, monkeypatch, {
+        "CONTRIBUTION_ATTRIBUTION": {
+            "attribution_nm": "shapley", "max_exact_nb_contributors": 2, "nb_permutations": 4, "seed": 2021
+        }
+    })
+
+    contributions = read_csv("./results/contributions_test.csv")
+    prediction = read_csv("./results/prediction_test.csv")
+
+    # the shapley values and the baseline sum to the prediction on the train obs
+    assert list(contributions.columns) == ["TV", "radio", "newspaper", "consumer_index", "baseline"]
+    assert np.allclose(contributions.sum(axis=1).values, prediction["pred"].values[:len(contributions)])
+
+
+
+def test_run_posterior_contributions(tmp_path, monkeypatch):
+
+    run_on_stub_stan_model(tmp_path, monkeypatch, {
+        "POSTERIOR_CONTRIBUTIONS": {"quantiles": [0.05, 0.95], "draws_chunk_size": 30}
+    })
+
+    contributions = read_csv("./results/contributions_test.csv")
+
+    for stat_nm in ["mean", "quantile_0.05", "quantile_0.95"]:
+        assert read_csv("./results/contributions_%s_test.csv" % stat_nm).shape == contributions.shape
+
+
+
+def test_run_draw_store(tmp_path, monkeypatch):
+
+    run_on_stub_stan_model(tmp_path, monkeypatch, {"DRAW_STORE": {"dtype": "float32"}})
+
+    assert sorted(listdir("./results/draws/test")) == sorted([
+        "%s.npy" % param_nm for param_nm in
+        ["tau", "beta_medias", "gamma_ctrl", "retain_rate", "delay", "ec", "slope"]
+    ])
+    assert np.load("./results/draws/test/beta_medias.npy").dtype == np.float32
+
+
+
+@pytest.mark.parametrize(
+    "config_update,nb_draws_per_chain",
+    (
+        ({}, 20),
+        ({"ADAPTIVE_SAMPLING": {"n_iter_per_round": 40, "max_nb_rounds": 2}}, 80)
+    )
+)
+def test_run_diagnostics(tmp_path, monkeypatch, config_update, nb_draws_per_chain):
+
+    run_on_stub_stan_model(tmp_path, monkeypatch, config_update)
+
+    with open("./results/diagnostics_test.json", "r") as f:
+        diagnostics = load(f)
+
+    # iid draws of 3 chains do not reach the default min ess in the first round
+    assert diagnostics["nb_draws_per_chain"] == nb_draws_per_chain
+
+
+
+def test_run_carryover_in_stan_model(tmp_path, monkeypatch):
+
+    # the stan input is the only difference, the stub fits have the same draws
+    run_on_stub_stan_model(tmp_path, monkeypatch, {})
+    expected_prediction = read_csv("./results/prediction_test.csv")
+
+    run_on_stub_stan_model(
+        tmp_path, monkeypatch, {"VECTORIZED_STAN_CODE": True, "CARRYOVER_IN_STAN_MODEL": True}
+    )
+    obtained_prediction = read_csv("./results/prediction_test.csv")
+
+    assert np.allclose(obtained_prediction.pred.values, expected_prediction.pred.values)
+
+
+
+@pytest.mark.parametrize("with_draw_store", [False, True])
+def test_run_posterior_inference_machine(tmp_path, monkeypatch, with_draw_store):
+
+    run_on_stub_stan_model(tmp_path, monkeypatch, {})
+    assert not path.exists("./results/inference_machine/posterior_test.pkl")
+
+    config_update = {"SAVE_POSTERIOR_INFERENCE_MACHINE": True}
+    if with_draw_store:
+        config_update["DRAW_STORE"] = {"dtype": None}
+    run_on_stub_stan_model(tmp_path, monkeypatch, config_update)
+
+    posterior_inference_machine = load_posterior_inference_machine("test")
+    assert isinstance(
+        posterior_inference_machine._PosteriorInferenceMachine__sampling_results, DrawStore
+    ) == with_draw_store
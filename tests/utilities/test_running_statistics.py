@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+
+from bayesian_mmm.utilities.running_statistics import RunningStatistics
+
+QUANTILES = [0.05, 0.5, 0.95]
+
+
+@pytest.mark.parametrize(
+    "nb_values,chunk_size", [(3, 3), (4, 1), (2000, 1), (2000, 250), (6000, 1), (6000, 500)]
+)
+def test_running_statistics(nb_values, chunk_size):
+
+    values = np.random.default_rng(2021).normal(size=(nb_values, 10, 3))
+
+    running_statistics = RunningStatistics(QUANTILES, (10, 3))
+    for start in range(0, nb_values, chunk_size):
+        running_statistics.update(values[start:start + chunk_size])
+
+    expected_quantiles = np.quantile(values, QUANTILES, axis=0)
+
+    assert running_statistics.get_nb_values() == nb_values
+    assert np.allclose(running_statistics.get_mean(), values.mean(axis=0))
+    if nb_values <= 2 * 1000:
+        assert np.allclose(running_statistics.get_quantiles(), expected_quantiles)
+    else:
+        assert np.abs(running_statistics.get_quantiles() - expected_quantiles).max() < 0.2
+        assert np.abs(running_statistics.get_quantiles() - expected_quantiles).mean() < 0.02
+
+
+@pytest.mark.parametrize("order_nm", ["sorted", "autocorrelated"])
+def test_running_statistics_ordered_values(order_nm):
+
+    random_generator = np.random.default_rng(2021)
+
+    if order_nm == "sorted":
+        values = np.sort(random_generator.normal(size=(6000, 50)), axis=0)
+    else:
+        # 3 chains of AR(0.99) draws following each other
+        values = np.zeros((3, 2000, 50))
+        for draw_index in range(1, 2000):
+            values[:, draw_index] = 0.99 * values[:, draw_index - 1] + np.sqrt(1 - 0.99**2) * (
+                random_generator.normal(size=(3, 50))
+            )
+        values = values.reshape((6000, 50))
+
+    running_statistics = RunningStatistics(QUANTILES, (50,))
+    for start in range(0, 6000, 500):
+        running_statistics.update(values[start:start + 500])
+
+    expected_quantiles = np.quantile(values, QUANTILES, axis=0)
+
+    assert np.abs(running_statistics.get_quantiles() - expected_quantiles).max() < 0.05
+
+
+def test_running_statistics_input_error():
+
+    with pytest.raises(ValueError):
+        RunningStatistics([0.5, 1], (2,))
+
+    with pytest.raises(ValueError):
+        RunningStatistics(QUANTILES, (2,), nb_summary_values=1)
+
+    running_statistics = RunningStatistics(QUANTILES, (2,))
+    with pytest.raises(ValueError):
+        running_statistics.update(np.zeros((4, 3)))